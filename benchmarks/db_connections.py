@@ -0,0 +1,98 @@
+"""
+Запросы в секунду при разных режимах подключения к PostgreSQL: новое подключение на каждый запрос
+(CONN_MAX_AGE=0, как было), постоянные подключения (CONN_MAX_AGE) и пул psycopg 3 (DB_POOL=1).
+Для каждого режима запускается сервер с соответствующими переменными окружения и нагрузка
+из benchmarks/loadtest.py. БД берётся из тех же переменных, что и в settings (POSTGRES_DB, DB_HOST, ...).
+
+    python manage.py seed_orders 10000
+    python benchmarks/db_connections.py --ids 1-10000 --server gunicorn
+    python benchmarks/db_connections.py --ids 1-10000 --server uvicorn --mode no_reuse --mode pool
+
+Результат — JSON-строка на режим и сценарий, как у loadtest.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from loadtest import SCENARIOS, run, summarize
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODES: Dict[str, Dict[str, str]] = {
+    'no_reuse': {'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_POOL': '1'},
+}
+
+SERVERS = {
+    'gunicorn': ['gunicorn', 'iikoLike.wsgi', '--workers', '{workers}', '--bind', '127.0.0.1:{port}'],
+    'uvicorn': ['uvicorn', 'iikoLike.asgi:application', '--workers', '{workers}', '--port', '{port}',
+                '--log-level', 'warning'],
+}
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'Сервер не поднялся на порту {port} за {timeout:.0f} с')
+
+
+def bench_mode(mode: str, args: argparse.Namespace, ids: List[int]) -> None:
+    env = {key: value for key, value in os.environ.items() if key not in ('DB_CONN_MAX_AGE', 'DB_POOL')}
+    env.update(MODES[mode])
+    command = [part.format(workers=args.workers, port=args.port) for part in SERVERS[args.server]]
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        # Прогрев: импорт представлений, подключения пула, кэш шаблонов
+        asyncio.run(run(f'http://127.0.0.1:{args.port}', args.scenario[0], ids, args.concurrency, 1.0))
+        for scenario in args.scenario:
+            latencies, errors = asyncio.run(
+                run(f'http://127.0.0.1:{args.port}', scenario, ids, args.concurrency, args.duration)
+            )
+            print(json.dumps(summarize(f'{args.server}:{mode}', scenario, args.concurrency, args.duration,
+                                       latencies, errors)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=SERVERS, default='gunicorn')
+    parser.add_argument('--mode', action='append', choices=MODES, help='по умолчанию — все режимы')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='по умолчанию — order_detail')
+    parser.add_argument('--ids', default='1', help='id заказов через запятую или диапазон 1-100')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+    args.scenario = args.scenario or ['order_detail']
+
+    if '-' in args.ids:
+        first, last = map(int, args.ids.split('-'))
+        ids = list(range(first, last + 1))
+    else:
+        ids = [int(pk) for pk in args.ids.split(',')]
+
+    for mode in args.mode or MODES:
+        bench_mode(mode, args, ids)
+
+
+if __name__ == '__main__':
+    main()
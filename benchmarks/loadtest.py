@@ -0,0 +1,131 @@
+"""
+Нагрузочный тест HTTP API: N одновременных keep-alive соединений в течение заданного времени.
+Нужна только стандартная библиотека, поэтому скрипт можно запускать рядом с любым сервером.
+
+Пример сравнения WSGI и ASGI при одинаковом числе воркеров:
+
+    gunicorn iikoLike.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn iikoLike.asgi:application --workers 4 --port 8002
+    python benchmarks/loadtest.py --base http://127.0.0.1:8001 --label wsgi
+    python benchmarks/loadtest.py --base http://127.0.0.1:8002 --label asgi
+
+Результат печатается в stdout одной JSON-строкой на сценарий.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Сценарий: (название, метод, путь, тело). В пути {id} заменяется на случайный заказ из --ids.
+SCENARIOS = {
+    'order_detail': ('GET', '/api-v1/orders/{id}/', None),
+    'revenue': ('GET', '/api-v1/revenue/', None),
+    'order_status': ('POST', '/api-v1/orders/update-status/{id}/', '{"status": "ready"}'),
+}
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+                   method: str, path: str, body: Optional[str]) -> Tuple[int, bool]:
+    """Отправляет запрос и читает ответ; возвращает статус и признак того, что сервер закрыл соединение."""
+    payload = (body or '').encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    closed = headers.get('connection', '').lower() == 'close'
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while (size := int((await reader.readline()).strip(), 16)) != 0:
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.read()
+        closed = True
+    return int(status_line.split()[1]), closed
+
+
+async def _worker(base: str, scenario: str, ids: List[int], deadline: float,
+                  latencies: List[float], errors: List[int]) -> None:
+    url = urlsplit(base)
+    method, path, body = SCENARIOS[scenario]
+    while time.perf_counter() < deadline:
+        # Синхронные воркеры gunicorn не держат keep-alive: время на новое соединение входит в задержку
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            closed = False
+            while not closed and time.perf_counter() < deadline:
+                status, closed = await _request(
+                    reader, writer, url.netloc, method, path.format(id=random.choice(ids)), body,
+                )
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors.append(status)
+                started = time.perf_counter()
+        finally:
+            writer.close()
+
+
+async def run(base: str, scenario: str, ids: List[int], concurrency: int, duration: float) -> Tuple[List[float], List[int]]:
+    latencies: List[float] = []
+    errors: List[int] = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_worker(base, scenario, ids, deadline, latencies, errors) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def percentile_ms(latencies: List[float], p: float) -> float:
+    """Перцентиль p (0..1) отсортированного списка задержек в секундах, в миллисекундах."""
+    return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2)
+
+
+def summarize(label: str, scenario: str, concurrency: int, duration: float,
+              latencies: List[float], errors: List[int]) -> Dict[str, object]:
+    latencies = sorted(latencies)
+    return {
+        'label': label,
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / duration, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'p50_ms': percentile_ms(latencies, 0.50),
+        'p99_ms': percentile_ms(latencies, 0.99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base', default='http://127.0.0.1:8000')
+    parser.add_argument('--label', default='')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='по умолчанию — все сценарии')
+    parser.add_argument('--ids', default='1', help='id заказов через запятую или диапазон 1-100')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    if '-' in args.ids:
+        first, last = map(int, args.ids.split('-'))
+        ids = list(range(first, last + 1))
+    else:
+        ids = [int(pk) for pk in args.ids.split(',')]
+
+    for scenario in args.scenario or SCENARIOS:
+        latencies, errors = asyncio.run(run(args.base, scenario, ids, args.concurrency, args.duration))
+        print(json.dumps(summarize(args.label, scenario, args.concurrency, args.duration, latencies, errors)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Время рендера HTML-страниц списка заказов и выручки (django.test.Client, без HTTP-сервера):
+как оно зависит от размера страницы и от числа заказов, изменившихся между показами.
+
+Сценарии для каждой страницы списка (?limit=N):
+  baseline  — без кэша шаблонов и строк: каждый запрос разбирает шаблоны и рендерит все строки (как раньше);
+  cold      — кэш шаблонов есть, кэш строк очищается перед каждым запросом;
+  warm      — между запросами заказы не менялись: все строки из кэша;
+  changed-K — перед каждым запросом меняются K заказов страницы: перерисовываются только они.
+Для страницы выручки — baseline, cold и warm. Изменение заказа в бенчмарке — увеличение его version
+(UPDATE мимо Order.save()), чтобы не менять порядок и состав страницы.
+
+Заполнение базы (--rows N --seed) удаляет все заказы: запускайте на отдельной базе.
+
+    POSTGRES_DB=iikolike_bench python benchmarks/render.py --rows 100000 --seed --limits 50 200 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iikoLike.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.cache import get_cache
+from core.models import Order
+from loadtest import percentile_ms
+
+# TEMPLATES без cached.Loader — как было до кэширования шаблонов
+UNCACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': True,
+    'OPTIONS': {key: value for key, value in settings.TEMPLATES[0]['OPTIONS'].items() if key != 'loaders'},
+}]
+
+
+def measure(client: Client, url: str, repeat: int, before: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Задержка (wall) и процессорное время на запрос; подготовка перед запросом в замер не входит."""
+    wall: List[float] = []
+    cpu: List[float] = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started, started_cpu = time.perf_counter(), time.process_time()
+        response = client.get(url)
+        wall.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - started_cpu)
+        if response.status_code != 200:
+            raise SystemExit(f"{url}: HTTP {response.status_code}")
+    wall.sort()
+    return {
+        'p50_ms': percentile_ms(wall, 0.50),
+        'p99_ms': percentile_ms(wall, 0.99),
+        'cpu_ms': round(statistics.median(cpu) * 1000, 2),
+        'bytes': len(response.content),
+    }
+
+
+def scenarios(url: str, page_ids: List[int], changed: List[int]) -> Dict[str, Optional[Callable[[], None]]]:
+    result: Dict[str, Optional[Callable[[], None]]] = {'cold': get_cache().clear, 'warm': None}
+    for count in changed:
+        ids = page_ids[:count]
+        result[f'changed-{count}'] = lambda ids=ids: Order.objects.filter(pk__in=ids).update(version=F('version') + 1)
+    return result
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    client = Client()
+    results = []
+
+    def record(page: str, scenario: str, url: str, before: Optional[Callable[[], None]]) -> None:
+        for _ in range(args.warmup):
+            client.get(url)
+        result = {'page': page, 'scenario': scenario, **measure(client, url, args.repeat, before)}
+        results.append(result)
+        print(f"{page} {scenario}: p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"cpu {result['cpu_ms']} ms", file=sys.stderr)
+
+    pages = [(f'order_list?limit={limit}', f"{reverse('core:order_list')}?limit={limit}", limit)
+             for limit in args.limits]
+    pages.append(('revenue', reverse('core:revenue'), 0))
+    for page, url, limit in pages:
+        with override_settings(TEMPLATES=UNCACHED_TEMPLATES):
+            record(page, 'baseline', url, get_cache().clear)
+        page_ids = list(Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True)[:limit])
+        for scenario, before in scenarios(url, page_ids, args.changed if limit else []).items():
+            record(page, scenario, url, before)
+    return {'rows': Order.objects.count(), 'results': results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, help='сколько заказов создать при --seed')
+    parser.add_argument('--seed', action='store_true', help='перед замером заполнить базу --rows заказами')
+    parser.add_argument('--days', type=int, default=365, help='за сколько дней распределить заказы при заполнении')
+    parser.add_argument('--limits', type=int, nargs='+', default=[50, 200, 500], help='размеры страницы списка')
+    parser.add_argument('--changed', type=int, nargs='*', default=[1, 10], help='сколько заказов страницы менять')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('-o', '--output', help='файл для JSON-результата (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    if args.seed:
+        if not args.rows:
+            raise SystemExit("--seed требует --rows")
+        call_command('seed_orders', args.rows, clear=True, days=args.days, stdout=sys.stderr)
+    # Шаблоны ссылаются на статические файлы через манифест collectstatic, как в production
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+    report = {'meta': {'database': settings.DATABASES['default']['ENGINE'], 'repeat': args.repeat}, 'run': run(args)}
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
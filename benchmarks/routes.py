@@ -0,0 +1,338 @@
+"""
+Бенчмарк всех представлений из core/urls.py в одном процессе (django.test.Client, без HTTP-сервера):
+задержка p50/p99, число и время SQL-запросов и пиковая память Python на запрос.
+Результат — один JSON-документ, который можно сравнить с результатом прошлого релиза (--compare).
+
+Заполнение базы (--rows ... --seed) удаляет все заказы: запускайте на отдельной базе.
+
+    # PostgreSQL: отдельная база для замеров
+    POSTGRES_DB=iikolike_bench python manage.py migrate
+    POSTGRES_DB=iikolike_bench python benchmarks/routes.py --rows 10000 100000 1000000 --seed -o bench.json
+
+    # SQLite вместо PostgreSQL, если сервера БД под рукой нет
+    DB_ENGINE=sqlite SQLITE_PATH=/tmp/bench.sqlite3 python manage.py migrate
+    DB_ENGINE=sqlite SQLITE_PATH=/tmp/bench.sqlite3 python benchmarks/routes.py --rows 10000 --seed
+
+    # Сравнение с прошлым результатом: код выхода 1, если есть регрессии
+    python benchmarks/routes.py --compare bench-1.4.json -o bench-1.5.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iikoLike.settings')
+
+import django
+
+django.setup()
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils.timezone import localdate
+
+from core.cache import get_cache
+from core.management.commands.seed_orders import _random_items
+from core.models import Order
+from core.urls import urlpatterns
+from loadtest import percentile_ms
+
+
+class Context(NamedTuple):
+    rng: random.Random
+    ids: List[int]
+
+    def order_id(self) -> int:
+        return self.rng.choice(self.ids)
+
+    def order(self) -> Order:
+        return Order.objects.get(pk=self.order_id())
+
+    def new_order(self) -> Order:
+        # Для удаления и смены статуса — свой заказ на каждый запрос, чтобы не менять выборку
+        items = _random_items(self.rng)
+        return Order.objects.create(table_number=self.rng.randint(1, 30), items=items)
+
+
+# Подготовка запроса (вне замера): функция от Context, которая возвращает (аргументы URL, данные).
+Prepare = Callable[[Context], Tuple[List[Any], Any]]
+
+
+class Route(NamedTuple):
+    name: str
+    method: str
+    url_name: str
+    prepare: Prepare
+
+
+def _no_args(data: Any = None) -> Prepare:
+    return lambda ctx: ([], data)
+
+
+def _edit_form(ctx: Context) -> Tuple[List[Any], Any]:
+    order = ctx.order()
+    items = json.dumps(_random_items(ctx.rng))
+    return [order.pk], {"table_number": order.table_number, "status": order.status,
+                        "items_json": items, "version": order.version}
+
+
+def _bulk_update(ctx: Context) -> Tuple[List[Any], Any]:
+    ids = ctx.rng.sample(ctx.ids, min(20, len(ctx.ids)))
+    return [], {"orders": [{"id": pk, "table_number": ctx.rng.randint(1, 30)} for pk in ids]}
+
+
+# Метод: get / post (данные формы), json-post / json-put / json-delete (тело JSON),
+# stream — время до первого события потока (поток бесконечный).
+ROUTES: List[Route] = [
+    # Web-интерфейс
+    Route('order_list', 'get', 'order_list', _no_args()),
+    Route('order_list?status=paid', 'get', 'order_list', _no_args({"status": "paid"})),
+    Route('order_add', 'get', 'order_add', _no_args()),
+    Route('order_add:post', 'post', 'order_add',
+          lambda ctx: ([], {"table_number": 3, "items_json": json.dumps(_random_items(ctx.rng))})),
+    Route('order_edit', 'get', 'order_edit', lambda ctx: ([ctx.order_id()], None)),
+    Route('order_edit:post', 'post', 'order_edit', _edit_form),
+    Route('order_delete', 'get', 'order_delete', lambda ctx: ([ctx.order_id()], None)),
+    Route('order_delete:post', 'post', 'order_delete', lambda ctx: ([ctx.new_order().pk], None)),
+    Route('update_order_status', 'post', 'update_order_status', lambda ctx: ([ctx.new_order().pk], {"status": "ready"})),
+    Route('revenue', 'get', 'revenue', _no_args()),
+    Route('order_board', 'get', 'order_board', _no_args()),
+    # API
+    Route('order_list_api', 'get', 'order_list_api', _no_args()),
+    Route('order_list_api?table_number', 'get', 'order_list_api',
+          lambda ctx: ([], {"table_number": ctx.rng.randint(1, 30), "limit": 100})),
+    Route('order_export_api', 'get', 'order_export_api',
+          lambda ctx: ([], {"created_from": localdate().isoformat()})),
+    Route('order_create_api', 'json-post', 'order_create_api',
+          lambda ctx: ([], {"table_number": 6, "items": _random_items(ctx.rng)})),
+    Route('order_bulk_create_api', 'json-post', 'order_bulk_create_api',
+          lambda ctx: ([], {"orders": [{"table_number": 7, "items": _random_items(ctx.rng)} for _ in range(50)]})),
+    Route('order_bulk_update_api', 'json-put', 'order_bulk_update_api', _bulk_update),
+    Route('order_bulk_update_status_api', 'json-post', 'order_bulk_update_status_api',
+          lambda ctx: ([], {"changes": [{"id": ctx.new_order().pk, "status": "ready"} for _ in range(20)]})),
+    Route('order_detail_api', 'get', 'order_detail_api', lambda ctx: ([ctx.order_id()], None)),
+    Route('order_detail_api:put', 'json-put', 'order_detail_api',
+          lambda ctx: ([ctx.order_id()], {"table_number": ctx.rng.randint(1, 30)})),
+    Route('order_detail_api:delete', 'json-delete', 'order_detail_api', lambda ctx: ([ctx.new_order().pk], None)),
+    Route('order_update_api', 'json-put', 'order_update_api',
+          lambda ctx: ([ctx.order_id()], {"items": _random_items(ctx.rng)})),
+    Route('order_delete_api', 'json-delete', 'order_delete_api', lambda ctx: ([ctx.new_order().pk], None)),
+    Route('update_order_status_api', 'json-post', 'update_order_status_api',
+          lambda ctx: ([ctx.new_order().pk], {"status": "ready"})),
+    Route('order_active_api', 'get', 'order_active_api', _no_args()),
+    Route('order_stream_api', 'stream', 'order_stream_api', _no_args()),
+    Route('revenue_api', 'get', 'revenue_api', _no_args()),
+    Route('revenue_series_api', 'get', 'revenue_series_api', _no_args()),
+    Route('revenue_series_api?month', 'get', 'revenue_series_api',
+          lambda ctx: ([], {"from": localdate().replace(month=1, day=1).isoformat(), "granularity": "month"})),
+    Route('dish_analytics_api', 'get', 'dish_analytics_api', _no_args()),
+    Route('cache_stats_api', 'get', 'cache_stats_api', _no_args()),
+    Route('metrics', 'get', 'metrics', _no_args()),
+]
+
+
+def check_coverage() -> None:
+    """Каждое представление из core/urls.py должно быть в ROUTES, иначе замеры неполные."""
+    url_names = {pattern.name for pattern in urlpatterns if isinstance(pattern, URLPattern)}
+    missing = url_names - {route.url_name for route in ROUTES}
+    if missing:
+        raise SystemExit(f"Нет в ROUTES: {', '.join(sorted(missing))}")
+
+
+def _open_stream(url: str) -> int:
+    async def first_event():
+        response = await AsyncClient().get(url)
+        await anext(response.streaming_content)
+        await response.streaming_content.aclose()
+        return response.status_code
+
+    return async_to_sync(first_event)()
+
+
+def request(client: Client, route: Route, args: List[Any], data: Any) -> int:
+    url = reverse(f'core:{route.url_name}', args=args)
+    if route.method == 'stream':
+        return _open_stream(url)
+    if route.method.startswith('json-'):
+        body = json.dumps(data) if data is not None else None
+        response = getattr(client, route.method[len('json-'):])(url, data=body, content_type='application/json')
+    else:
+        response = getattr(client, route.method)(url, data) if data is not None else getattr(client, route.method)(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def measure(client: Client, route: Route, ctx: Context, repeat: int, profile: int, cold: bool) -> Dict[str, Any]:
+    """
+    Сначала repeat запросов без профилирования — только задержка;
+    затем profile запросов под tracemalloc и CaptureQueriesContext — запросы к БД и память
+    (трассировка памяти сильно замедляет код, поэтому задержку так не меряем).
+    """
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    queries: List[int] = []
+    query_ms: List[float] = []
+    peaks: List[int] = []
+
+    def one(profiled: bool) -> None:
+        # Подготовка (в том числе создание заказов) не попадает ни в задержку, ни в профиль
+        args, data = route.prepare(ctx)
+        if cold:
+            get_cache().clear()
+        if not profiled:
+            started = time.perf_counter()
+            status = request(client, route, args, data)
+            latencies.append(time.perf_counter() - started)
+        else:
+            tracemalloc.start()
+            try:
+                with CaptureQueriesContext(connection) as captured:
+                    status = request(client, route, args, data)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            queries.append(len(captured.captured_queries))
+            query_ms.append(sum(float(query['time']) for query in captured.captured_queries) * 1000)
+        if status >= 400:
+            errors[status] = errors.get(status, 0) + 1
+
+    for _ in range(repeat):
+        one(profiled=False)
+    for _ in range(profile):
+        one(profiled=True)
+
+    latencies.sort()
+    return {
+        'route': route.name,
+        'method': route.method,
+        'url_name': route.url_name,
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'p50_ms': percentile_ms(latencies, 0.50),
+        'p99_ms': percentile_ms(latencies, 0.99),
+        'queries': max(queries) if queries else None,
+        'query_ms': round(statistics.median(query_ms), 2) if query_ms else None,
+        'peak_kb': round(max(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def sample_ids(rng: random.Random, size: int) -> List[int]:
+    """Случайные id существующих заказов без загрузки всех id (на миллионе строк это заметно)."""
+    ids = list(Order.objects.order_by('pk').values_list('pk', flat=True)[:size])
+    last = Order.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if last is None or len(ids) < size:
+        return ids
+    candidates = rng.sample(range(ids[0], last + 1), min(size * 2, last - ids[0] + 1))
+    return list(Order.objects.filter(pk__in=candidates).values_list('pk', flat=True)[:size])
+
+
+def run(rows: Optional[int], args: argparse.Namespace) -> Dict[str, Any]:
+    if rows is not None and args.seed:
+        call_command('seed_orders', rows, clear=True, days=args.days, stdout=sys.stderr)
+    rng = random.Random(0)
+    ctx = Context(rng, sample_ids(rng, 1000))
+    if not ctx.ids:
+        raise SystemExit("В базе нет заказов: заполните её (--rows N --seed или manage.py seed_orders N)")
+    total = Order.objects.count()
+
+    client = Client()
+    results = []
+    for route in ROUTES:
+        if args.route and route.name not in args.route:
+            continue
+        for _ in range(args.warmup):
+            request(client, route, *route.prepare(ctx))
+        results.append(measure(client, route, ctx, args.repeat, args.profile, args.cold))
+        print(f"[{total} rows] {route.name}: p50 {results[-1]['p50_ms']} ms, p99 {results[-1]['p99_ms']} ms, "
+              f"{results[-1]['queries']} queries", file=sys.stderr)
+    return {'rows': total, 'routes': results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Регрессии относительно прошлого результата: задержка p99 или память выросли больше чем в threshold раз,
+    число запросов к БД выросло. Сравниваются прогоны с одинаковым числом строк.
+    """
+    previous = {
+        (run_['rows'], result['route']): result
+        for run_ in baseline['runs'] for result in run_['routes']
+    }
+    regressions = []
+    for run_ in current['runs']:
+        for result in run_['routes']:
+            old = previous.get((run_['rows'], result['route']))
+            if old is None:
+                continue
+            where = f"[{run_['rows']} rows] {result['route']}"
+            if result['p99_ms'] > old['p99_ms'] * threshold:
+                regressions.append(f"{where}: p99 {old['p99_ms']} -> {result['p99_ms']} ms")
+            if (result['queries'] or 0) > (old['queries'] or 0):
+                regressions.append(f"{where}: queries {old['queries']} -> {result['queries']}")
+            if (result['peak_kb'] or 0) > (old['peak_kb'] or 0) * threshold:
+                regressions.append(f"{where}: peak memory {old['peak_kb']} -> {result['peak_kb']} KB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='*', default=[],
+                        help='размеры таблицы заказов, например 10000 100000 1000000 (по умолчанию — текущая база)')
+    parser.add_argument('--seed', action='store_true', help='перед каждым прогоном заполнить базу --rows заказами')
+    parser.add_argument('--days', type=int, default=365, help='за сколько дней распределить заказы при заполнении')
+    parser.add_argument('--route', action='append', help='замерить только эти маршруты (имя из ROUTES)')
+    parser.add_argument('--repeat', type=int, default=200, help='запросов на маршрут для задержки')
+    parser.add_argument('--profile', type=int, default=5, help='запросов на маршрут для числа запросов к БД и памяти')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--cold', action='store_true', help='очищать кэш перед каждым запросом')
+    parser.add_argument('-o', '--output', help='файл для JSON-результата (по умолчанию stdout)')
+    parser.add_argument('--compare', help='JSON прошлого прогона: регрессии печатаются, код выхода 1')
+    parser.add_argument('--threshold', type=float, default=1.25, help='допустимый рост p99 и памяти при --compare')
+    args = parser.parse_args()
+
+    check_coverage()
+    # Шаблоны ссылаются на статические файлы через манифест collectstatic, как в production;
+    # собираем каждый раз, чтобы манифест не отставал от новых файлов
+    call_command('collectstatic', interactive=False, verbosity=0)
+    report = {
+        'meta': {
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'cold_cache': args.cold,
+            'repeat': args.repeat,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'runs': [run(rows, args) for rows in args.rows or [None]],
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text(encoding='utf-8')), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Сравнение сериализаторов JSON (core.serialization) на списках заказов разного размера:
+кодирование ответа order_list_api/экспорта и разбор Order.items при чтении из БД.
+Ни БД, ни сервер не нужны. Результат — JSON-строка на каждый размер и операцию.
+
+    python benchmarks/serialization.py --sizes 20 100 1000 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iikoLike.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+
+from core.management.commands.seed_orders import _random_items
+from core.models import Order, order_items_total
+from core.serialization import dumps, loads, orjson
+
+
+def order_page(size: int) -> Dict[str, Any]:
+    """Страница как у order_list_api: заказы с items, Decimal-суммой и временем создания."""
+    rng = random.Random(size)
+    created_at = now()
+    orders = []
+    for pk in range(size, 0, -1):
+        items = _random_items(rng)
+        orders.append({
+            "id": pk,
+            "table_number": rng.randint(1, 30),
+            "status": rng.choice(Order.Status.values),
+            "items": items,
+            "total_price": order_items_total(items),
+            "created_at": created_at - timedelta(minutes=pk),
+        })
+    return {"orders": orders, "next_cursor": "MjAyNS0wMy0wMVQxMjozMDoxNS4xMjNaOjE"}
+
+
+def best_time(function: Callable[[], Any], budget: float = 0.2, rounds: int = 5) -> float:
+    """Лучшее среднее время вызова из rounds замеров, каждый не короче budget секунд."""
+    best = float('inf')
+    for _ in range(rounds):
+        calls, started = 0, time.perf_counter()
+        while (elapsed := time.perf_counter() - started) < budget:
+            function()
+            calls += 1
+        best = min(best, elapsed / calls)
+    return best
+
+
+def measure(size: int) -> List[Dict[str, Any]]:
+    page = order_page(size)
+    stored_items = [json.dumps(order["items"], cls=DjangoJSONEncoder) for order in page["orders"]]
+    operations = {
+        # Прежний JsonResponse (DjangoJSONEncoder + encode в UTF-8) против core.serialization.dumps
+        'encode_page': (
+            lambda: json.dumps(page, cls=DjangoJSONEncoder).encode(),
+            lambda: dumps(page),
+        ),
+        # JSONField.from_db_value для каждого заказа страницы
+        'decode_items': (
+            lambda: [json.loads(value) for value in stored_items],
+            lambda: [loads(value) for value in stored_items],
+        ),
+    }
+    results = []
+    for name, (stdlib, fast) in operations.items():
+        json_s, orjson_s = best_time(stdlib), best_time(fast)
+        results.append({
+            'orders': size,
+            'operation': name,
+            'json_ms': round(json_s * 1000, 3),
+            'orjson_ms': round(orjson_s * 1000, 3),
+            'speedup': round(json_s / orjson_s, 1),
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 1000, 10000])
+    args = parser.parse_args()
+    if orjson is None or settings.JSON_SERIALIZER == 'json':
+        raise SystemExit("Нужен orjson (pip install orjson) и JSON_SERIALIZER = 'auto' или 'orjson'")
+
+    for size in args.sizes:
+        for result in measure(size):
+            print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Снимок активных заказов (в ожидании и готовых) для кухонных экранов: order_active_api и доска /orders/board/.
+
+Снимок хранится в памяти процесса вместе с версией списка заказов (core.cache.orders_version), на которой
+он построен. Любая запись в заказы меняет эту версию, и следующее чтение перестраивает снимок одним
+запросом по частичному индексу core_order_active_idx. Остальные чтения стоят один запрос к кэшу за версией:
+без обращения к БД и без сериализации, сколько бы оплаченных заказов ни накопилось.
+
+Версия живёт в кэше ORDER_CACHE_ALIAS: с общим кэшем (Redis) запись в одном воркере сбрасывает снимки всех,
+с LocMem — только своего процесса, поэтому снимок дополнительно перестраивается не реже,
+чем раз в ACTIVE_ORDERS_MAX_AGE секунд.
+"""
+import hashlib
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+
+from core.cache import aorders_version, orders_version, stats
+from core.models import Order
+from core.serialization import dumps
+
+ACTIVE_ORDER_FIELDS = ('id', 'table_number', 'status', 'items', 'total_price', 'created_at', 'updated_at', 'version')
+
+
+class ActiveOrders(NamedTuple):
+    version: int
+    built_at: float
+    # Заказы по времени создания, старые первыми — в порядке приготовления
+    orders: List[Dict[str, Any]]
+    # Готовое тело ответа order_active_api и его ETag
+    content: bytes
+    etag: str
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        return [order for order in self.orders if order['status'] == status]
+
+
+def _max_age() -> float:
+    return getattr(settings, 'ACTIVE_ORDERS_MAX_AGE', 5)
+
+
+class ActiveOrdersSnapshot:
+    stats_name = 'order_active'
+
+    def __init__(self) -> None:
+        self._current: Optional[ActiveOrders] = None
+
+    def _fresh(self, version: int) -> Optional[ActiveOrders]:
+        current = self._current
+        if current is not None and current.version == version and time.monotonic() - current.built_at < _max_age():
+            stats.hit(self.stats_name)
+            return current
+        stats.miss(self.stats_name)
+        return None
+
+    def _store(self, version: int, orders: List[Dict[str, Any]]) -> ActiveOrders:
+        content = dumps({'orders': orders})
+        snapshot = ActiveOrders(
+            version, time.monotonic(), orders, content, f'"active-{hashlib.md5(content).hexdigest()}"',
+        )
+        # Присваивание атомарно: параллельные читатели видят либо старый, либо новый снимок целиком
+        self._current = snapshot
+        return snapshot
+
+    def get(self) -> ActiveOrders:
+        version = orders_version()
+        return self._fresh(version) or self._store(version, list(active_orders_queryset()))
+
+    async def aget(self) -> ActiveOrders:
+        version = await aorders_version()
+        return self._fresh(version) or self._store(version, [row async for row in active_orders_queryset()])
+
+    def clear(self) -> None:
+        self._current = None
+
+
+def active_orders_queryset():
+    # Условие совпадает с условием частичного индекса, поэтому оплаченные заказы не читаются вовсе
+    return (
+        Order.objects.filter(status__in=Order.ACTIVE_STATUSES)
+        .order_by('created_at', 'id')
+        .values(*ACTIVE_ORDER_FIELDS)
+    )
+
+
+snapshot = ActiveOrdersSnapshot()
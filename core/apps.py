@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.metrics import install_query_recorder
+
+        # Учёт SQL-запросов для RequestMetricsMiddleware на каждом новом подключении к БД
+        connection_created.connect(install_query_recorder, dispatch_uid='core.metrics.install_query_recorder')
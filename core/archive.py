@@ -0,0 +1,240 @@
+"""
+Архив оплаченных заказов: сжатые файлы только на дозапись, по одному на месяц создания заказа.
+
+Команда archive_orders переносит оплаченные заказы старше ORDER_ARCHIVE_AFTER_MONTHS месяцев из core_order
+в ORDER_ARCHIVE_DIR и удаляет их из таблицы пачками. Файл месяца orders-ГГГГ-ММ.ndjson.gz — цепочка
+gzip-блоков по ORDER_ARCHIVE_BLOCK_SIZE заказов (по строке NDJSON на заказ); gzip читает такую цепочку
+как один поток, поэтому файл можно разобрать и обычным zcat. Рядом лежит маленький индекс
+orders-ГГГГ-ММ.index.json: смещение и длина каждого блока, диапазон id и дат создания в нём.
+Поиск заказа по id читает индексы (они кэшируются в памяти до изменения файла) и распаковывает
+только блоки, в диапазон id которых он попадает.
+
+Выручка архивных заказов остаётся в DailyRevenue: заказы удаляются из таблицы запросом по QuerySet,
+мимо Order.delete(), который вычел бы их из выручки. Остальные чтения, которым нужны сами заказы,
+переходят в архив прозрачно: order_detail_api (заказа нет в таблице — ищется в архиве),
+core.revenue.dish_sales (за архивные месяцы) и rebuild_daily_revenue.
+"""
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import localdate
+
+from core.cache import invalidate_orders
+from core.models import Order
+from core.serialization import dumps, loads
+
+ARCHIVE_FIELDS = ('id', 'table_number', 'status', 'items', 'total_price', 'created_at', 'updated_at', 'version')
+FILE_RE = re.compile(r'^orders-(\d{4})-(\d{2})\.ndjson\.gz$')
+
+
+class Block(NamedTuple):
+    offset: int
+    length: int
+    first_id: int
+    last_id: int
+    # Даты создания (локальные) первого и последнего заказа блока, ISO
+    created_from: str
+    created_to: str
+
+
+def archive_dir() -> Path:
+    return Path(settings.ORDER_ARCHIVE_DIR)
+
+
+def _data_path(month: date) -> Path:
+    return archive_dir() / f'orders-{month.year:04d}-{month.month:02d}.ndjson.gz'
+
+
+def _index_path(month: date) -> Path:
+    return archive_dir() / f'orders-{month.year:04d}-{month.month:02d}.index.json'
+
+
+def archived_months() -> List[date]:
+    if not archive_dir().is_dir():
+        return []
+    months = []
+    for path in archive_dir().iterdir():
+        match = FILE_RE.match(path.name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+class _IndexCache:
+    """Индексы файлов архива в памяти процесса; индекс перечитывается, когда файл на диске сменился."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._indexes: Dict[Path, Tuple[Tuple[int, int], List[Block]]] = {}
+
+    def get(self, month: date) -> List[Block]:
+        path = _index_path(month)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return []
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._indexes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        blocks = [Block(*block) for block in json.loads(path.read_bytes())['blocks']]
+        with self._lock:
+            self._indexes[path] = (signature, blocks)
+        return blocks
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+indexes = _IndexCache()
+
+
+def _to_record(row: Dict[str, Any]) -> bytes:
+    return dumps({field: row[field] for field in ARCHIVE_FIELDS}) + b'\n'
+
+
+def _from_record(line: bytes) -> Dict[str, Any]:
+    order = loads(line)
+    order['total_price'] = Decimal(order['total_price'])
+    order['created_at'] = parse_datetime(order['created_at'])
+    order['updated_at'] = parse_datetime(order['updated_at'])
+    return order
+
+
+def _append_block(month: date, rows: List[Dict[str, Any]]) -> None:
+    """Дописывает в файл месяца один gzip-блок и переписывает индекс (через rename — атомарно)."""
+    data_path = _data_path(month)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    rows = sorted(rows, key=lambda row: row['id'])
+    payload = gzip.compress(b''.join(_to_record(row) for row in rows))
+    with open(data_path, 'ab') as data_file:
+        offset = data_file.tell()
+        data_file.write(payload)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+    created = sorted(localdate(row['created_at']).isoformat() for row in rows)
+    blocks = indexes.get(month) + [
+        Block(offset, len(payload), rows[0]['id'], rows[-1]['id'], created[0], created[-1]),
+    ]
+    index_path = _index_path(month)
+    tmp_path = index_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps({'blocks': [list(block) for block in blocks]}))
+    os.replace(tmp_path, index_path)
+
+
+def _read_lines(month: date, block: Block) -> List[bytes]:
+    with open(_data_path(month), 'rb') as data_file:
+        data_file.seek(block.offset)
+        payload = data_file.read(block.length)
+    return [line for line in gzip.decompress(payload).splitlines() if line]
+
+
+def _read_block(month: date, block: Block) -> Iterator[Dict[str, Any]]:
+    for line in _read_lines(month, block):
+        yield _from_record(line)
+
+
+def get_archived_order(pk: int) -> Optional[Dict[str, Any]]:
+    """Заказ из архива по id или None. Распаковываются только блоки, в диапазон id которых попадает pk."""
+    # id — первое поле записи: разбирается только строка нужного заказа (orjson пишет без пробелов, json — с ними)
+    prefixes = (b'{"id":%d,' % pk, b'{"id": %d,' % pk)
+    for month in archived_months():
+        for block in indexes.get(month):
+            if block.first_id <= pk <= block.last_id:
+                for line in _read_lines(month, block):
+                    if line.startswith(prefixes):
+                        return _from_record(line)
+    return None
+
+
+aget_archived_order = sync_to_async(get_archived_order)
+
+
+def iter_archived_orders(date_from: Optional[date] = None, date_to: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Архивные заказы, созданные в диапазоне [date_from, date_to] (локальные даты; без границ — все).
+    Читаются только файлы и блоки, пересекающиеся с диапазоном; на блок — один запрос к core_order,
+    чтобы пропустить копии заказов, которые из таблицы так и не удалились.
+    """
+    seen = set()
+    for month in archived_months():
+        if date_to is not None and month > date_to:
+            break
+        for block in indexes.get(month):
+            if (date_from is not None and block.created_to < date_from.isoformat()
+                    or date_to is not None and block.created_from > date_to.isoformat()):
+                continue
+            orders = [
+                order for order in _read_block(month, block)
+                if (date_from is None or localdate(order['created_at']) >= date_from)
+                and (date_to is None or localdate(order['created_at']) <= date_to)
+            ]
+            # Сбой между записью блока и удалением строк оставляет копию заказа в архиве, а сам заказ — в таблице;
+            # повторный archive_orders допишет его в архив ещё раз. Считается только одна копия, и только если
+            # заказа в таблице нет — иначе выручка и продажи блюд учли бы его дважды
+            live = set(Order.objects.filter(pk__in=[order['id'] for order in orders]).values_list('pk', flat=True))
+            for order in orders:
+                if order['id'] in seen or order['id'] in live:
+                    continue
+                seen.add(order['id'])
+                yield order
+
+
+def has_archived_orders(date_from: date, date_to: date) -> bool:
+    return any(date_from.replace(day=1) <= month <= date_to for month in archived_months())
+
+
+def archive_orders(before: datetime, batch_size: Optional[int] = None) -> int:
+    """
+    Переносит оплаченные заказы, созданные раньше before, в архив и удаляет их из core_order.
+    Каждая пачка — отдельная транзакция: строки блокируются, блок дописывается на диск и только потом
+    строки удаляются, так что заказ не теряется ни при каком сбое. Если удаление не состоялось, в архиве
+    остаётся копия заказа из таблицы: читатели архива (iter_archived_orders) такие копии пропускают.
+    Возвращает число перенесённых заказов.
+    """
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BLOCK_SIZE
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Order.objects.select_for_update()
+                .filter(status=Order.Status.PAID, created_at__lt=before)
+                .order_by('created_at', 'id')
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return archived
+            by_month: Dict[date, List[Dict[str, Any]]] = {}
+            for row in rows:
+                by_month.setdefault(localdate(row['created_at']).replace(day=1), []).append(row)
+            for month, month_rows in by_month.items():
+                _append_block(month, month_rows)
+            ids = [row['id'] for row in rows]
+            # QuerySet.delete(), а не Order.delete(): выручка архивных заказов остаётся в DailyRevenue.
+            # OrderItem удаляются каскадом, блюда в аналитике за эти месяцы берутся из архива
+            Order.objects.filter(pk__in=ids).delete()
+            invalidate_orders(ids)
+        archived += len(rows)
+
+
+def archived_revenue(orders: Iterable[Dict[str, Any]]) -> Dict[Tuple[date, int], Tuple[Decimal, int]]:
+    """Выручка и число заказов по (день создания, стол) — как строки DailyRevenue."""
+    totals: Dict[Tuple[date, int], Tuple[Decimal, int]] = {}
+    for order in orders:
+        key = (localdate(order['created_at']), order['table_number'])
+        total, count = totals.get(key, (Decimal('0.00'), 0))
+        totals[key] = (total + order['total_price'], count + 1)
+    return totals
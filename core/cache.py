@@ -0,0 +1,273 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# Версии: при любой записи номер версии увеличивается, и старые ключи ответов больше не читаются.
+# Сами устаревшие ответы удаляются кэшем по таймауту/LRU.
+LIST_VERSION_KEY = 'orders:version:list'
+REVENUE_VERSION_KEY = 'orders:version:revenue'
+
+
+def _order_version_key(order_id: int) -> str:
+    return f'orders:version:order:{order_id}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'ORDER_CACHE_ALIAS', 'default')]
+
+
+def _timeout() -> Optional[int]:
+    return getattr(settings, 'ORDER_CACHE_TIMEOUT', 300)
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов по endpoint'ам (в пределах процесса)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, list] = defaultdict(lambda: [0, 0])
+
+    def hit(self, name: str) -> None:
+        with self._lock:
+            self._counts[name][0] += 1
+
+    def miss(self, name: str) -> None:
+        with self._lock:
+            self._counts[name][1] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts = {name: list(values) for name, values in self._counts.items()}
+        return {
+            name: {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0}
+            for name, (hits, misses) in counts.items()
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+def _get_version(key: str) -> int:
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # Если ключ версии вытеснен, новая версия берётся из времени, чтобы не совпасть со старой
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aget_version(key: str) -> int:
+    cache = get_cache()
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump(keys: Iterable[str]) -> None:
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def _invalidate(keys: Iterable[str]) -> None:
+    # Сразу — чтобы текущий запрос не прочитал свой же старый ответ,
+    # и после коммита — чтобы сбросить то, что параллельные запросы успели закэшировать до коммита
+    keys = list(keys)
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_orders(order_ids: Iterable[int]) -> None:
+    _invalidate([LIST_VERSION_KEY, *(_order_version_key(order_id) for order_id in order_ids)])
+
+
+def invalidate_order(order_id: int) -> None:
+    invalidate_orders([order_id])
+
+
+def invalidate_revenue() -> None:
+    _invalidate([REVENUE_VERSION_KEY])
+
+
+def orders_version() -> int:
+    """Версия списка заказов: меняется при любой записи в заказы (создание, изменение, удаление)."""
+    return _get_version(LIST_VERSION_KEY)
+
+
+async def aorders_version() -> int:
+    return await _aget_version(LIST_VERSION_KEY)
+
+
+def order_detail_key(order_id: int) -> str:
+    return f'orders:detail:{order_id}:{_get_version(_order_version_key(order_id))}'
+
+
+async def aorder_detail_key(order_id: int) -> str:
+    return f'orders:detail:{order_id}:{await _aget_version(_order_version_key(order_id))}'
+
+
+def order_row_key(order_id: int, version: int) -> str:
+    # Версия заказа растёт при любом его изменении, поэтому строка под этим ключом никогда не устаревает
+    return f'orders:fragment:row:{order_id}:{version}'
+
+
+def order_list_key(params: Dict[str, str]) -> str:
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f'orders:list:{_get_version(LIST_VERSION_KEY)}:{digest}'
+
+
+def revenue_key(suffix: str) -> str:
+    return f'orders:revenue:{_get_version(REVENUE_VERSION_KEY)}:{suffix}'
+
+
+async def arevenue_key(suffix: str) -> str:
+    return f'orders:revenue:{await _aget_version(REVENUE_VERSION_KEY)}:{suffix}'
+
+
+def cached_value(name: str, key: str, build: Callable[[], Any]) -> Any:
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        stats.hit(name)
+        return value
+    stats.miss(name)
+    value = build()
+    cache.set(key, value, _timeout())
+    return value
+
+
+def cached_many(name: str, builds: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Как cached_value, но для многих ключей сразу: один get_many и один set_many на все промахи
+    (с Redis — два обращения к кэшу вместо одного на каждый ключ).
+    """
+    cache = get_cache()
+    values = cache.get_many(list(builds))
+    missing = {}
+    for key, build in builds.items():
+        if key in values:
+            stats.hit(name)
+        else:
+            stats.miss(name)
+            values[key] = missing[key] = build()
+    if missing:
+        cache.set_many(missing, _timeout())
+    return values
+
+
+async def acached_value(name: str, key: str, build: Callable[[], Awaitable[Any]]) -> Any:
+    """Асинхронный вариант cached_value для async-представлений."""
+    cache = get_cache()
+    value = await cache.aget(key)
+    if value is not None:
+        stats.hit(name)
+        return value
+    stats.miss(name)
+    value = await build()
+    await cache.aset(key, value, _timeout())
+    return value
+
+
+def _cacheable(response: HttpResponse) -> Optional[Tuple[str, bytes]]:
+    if response.status_code == 200 and not response.streaming:
+        return response['Content-Type'], response.content
+    return None
+
+
+def cached_response(name: str, key: str, build: Callable[[], HttpResponse]) -> HttpResponse:
+    """
+    Отдаёт закэшированное тело ответа или строит ответ и кладёт его в кэш.
+    Кэшируются только ответы 200, поэтому ошибки валидации всегда считаются заново.
+    """
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        stats.hit(name)
+        content_type, content = cached
+        return HttpResponse(content, content_type=content_type)
+    stats.miss(name)
+    response = build()
+    if (cacheable := _cacheable(response)) is not None:
+        cache.set(key, cacheable, _timeout())
+    return response
+
+
+async def acached_response(name: str, key: str, build: Callable[[], Awaitable[HttpResponse]]) -> HttpResponse:
+    """Асинхронный вариант cached_response для async-представлений."""
+    cache = get_cache()
+    cached = await cache.aget(key)
+    if cached is not None:
+        stats.hit(name)
+        content_type, content = cached
+        return HttpResponse(content, content_type=content_type)
+    stats.miss(name)
+    response = await build()
+    if (cacheable := _cacheable(response)) is not None:
+        await cache.aset(key, cacheable, _timeout())
+    return response
+
+
+def _not_modified(request: HttpRequest, etag: str,
+                  last_modified: Optional[datetime]) -> Tuple[Optional[HttpResponse], Optional[int]]:
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp), timestamp
+
+
+def _set_validators(response: HttpResponse, etag: str, timestamp: Optional[int]) -> HttpResponse:
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def conditional_response(request: HttpRequest, name: str, key: str,
+                         validator: Callable[[], Tuple[Optional[str], Optional[datetime]]],
+                         build: Callable[[], HttpResponse]) -> HttpResponse:
+    """
+    Условный GET: если ETag/Last-Modified клиента совпадают с текущими, возвращает 304,
+    не строя ответ. Валидатор кэшируется под тем же ключом версии, что и сам ответ,
+    поэтому повторный опрос без изменений не обращается к БД.
+    """
+    etag, last_modified = cached_value(name, f'{key}:validator', validator)
+    if etag is None:
+        return build()
+
+    response, timestamp = _not_modified(request, etag, last_modified)
+    if response is None:
+        response = build()
+    return _set_validators(response, etag, timestamp)
+
+
+async def aconditional_response(request: HttpRequest, name: str, key: str,
+                                validator: Callable[[], Awaitable[Tuple[Optional[str], Optional[datetime]]]],
+                                build: Callable[[], Awaitable[HttpResponse]]) -> HttpResponse:
+    """Асинхронный вариант conditional_response для async-представлений."""
+    etag, last_modified = await acached_value(name, f'{key}:validator', validator)
+    if etag is None:
+        return await build()
+
+    response, timestamp = _not_modified(request, etag, last_modified)
+    if response is None:
+        response = await build()
+    return _set_validators(response, etag, timestamp)
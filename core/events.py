@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+EVENT_CREATED = 'created'
+EVENT_UPDATED = 'updated'
+EVENT_STATUS = 'status'
+EVENT_DELETED = 'deleted'
+
+# Сколько событий может ждать медленный подписчик; при переполнении его поток закрывается,
+# и EventSource переподключается сам
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Канал Postgres LISTEN/NOTIFY. Полезная нагрузка NOTIFY ограничена 8000 байт,
+# поэтому в событии только поля заказа без списка блюд
+PG_CHANNEL = 'core_order_events'
+PG_RECONNECT_DELAY = 1.0
+PG_POLL_TIMEOUT = 5.0
+
+_CLOSE = object()
+
+
+class SubscriptionClosed(Exception):
+    """Подписка закрыта брокером (клиент не успевал читать события)."""
+
+
+class LocalBackend:
+    """Доставляет события подписчикам текущего процесса (один воркер или тесты)."""
+
+    def __init__(self, deliver: Callable[[str], None]) -> None:
+        self.deliver = deliver
+
+    def start(self) -> None:
+        pass
+
+    def publish(self, message: str) -> None:
+        self.deliver(message)
+
+
+class PostgresBackend:
+    """
+    Рассылка между воркерами через Postgres: publish делает NOTIFY,
+    а в каждом процессе с подписчиками поток-слушатель (LISTEN) передаёт события в брокер.
+    """
+
+    def __init__(self, deliver: Callable[[str], None]) -> None:
+        self.deliver = deliver
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen_forever, name='order-events-listener', daemon=True)
+            self._thread.start()
+
+    def publish(self, message: str) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [PG_CHANNEL, message])
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        db = settings.DATABASES['default']
+        conn = psycopg2.connect(
+            dbname=db['NAME'], user=db['USER'], password=db['PASSWORD'], host=db['HOST'], port=db['PORT'],
+        )
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {PG_CHANNEL}')
+        return conn
+
+    def _listen_forever(self) -> None:
+        while True:
+            try:
+                conn = self._connect()
+                try:
+                    while True:
+                        if select.select([conn], [], [], PG_POLL_TIMEOUT) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self.deliver(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception('Order events listener failed, reconnecting')
+                time.sleep(PG_RECONNECT_DELAY)
+
+
+class Subscription:
+    """Очередь событий одного SSE-клиента, привязанная к его event loop."""
+
+    def __init__(self, broker: 'EventBroker') -> None:
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put_threadsafe(self, message: Any) -> None:
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: Any) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать: закрываем поток, чтобы он переподключился и перечитал список
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(_CLOSE)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """Следующее событие или None, если за timeout секунд событий не было."""
+        try:
+            message = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is _CLOSE:
+            raise SubscriptionClosed
+        return message
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class EventBroker:
+    """
+    Pub/sub событий заказов. Публикация идёт после коммита транзакции через бэкенд
+    (ORDER_EVENTS_BACKEND), а бэкенд доставляет сообщения подписчикам процесса.
+    """
+
+    def __init__(self, backend_path: str) -> None:
+        self._backend = import_string(backend_path)(self._deliver)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        with self._lock:
+            if not self._started:
+                self._backend.start()
+                self._started = True
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscribers_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> None:
+        message = dumps({'type': event_type, **payload}).decode()
+        # Подписчики не должны видеть изменения, которые ещё могут откатиться
+        transaction.on_commit(lambda: self._backend.publish(message))
+
+    def _deliver(self, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put_threadsafe(message)
+
+
+_broker: Optional[EventBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> EventBroker:
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = EventBroker(getattr(settings, 'ORDER_EVENTS_BACKEND', 'core.events.LocalBackend'))
+        return _broker
+
+
+def order_event_payload(order: Any) -> Dict[str, Any]:
+    return {
+        'id': order.pk,
+        'table_number': order.table_number,
+        'status': order.status,
+        'total_price': order.total_price,
+        'updated_at': order.updated_at,
+        'version': order.version,
+    }
+
+
+def publish_order_event(event_type: str, order: Any) -> None:
+    get_broker().publish(event_type, order_event_payload(order))
+
+
+def publish_order_deleted(order_id: int) -> None:
+    get_broker().publish(EVENT_DELETED, {'id': order_id})
+
+
+async def iter_messages(subscription: Subscription, keepalive: float) -> AsyncIterator[Optional[str]]:
+    """Сообщения подписки; None — пауза длиной keepalive секунд без событий."""
+    while True:
+        try:
+            yield await subscription.get(keepalive)
+        except SubscriptionClosed:
+            return
@@ -0,0 +1,186 @@
+"""
+Заголовок Idempotency-Key для POST-эндпоинтов заказов: кассы на нестабильном Wi-Fi повторяют запрос,
+не дождавшись ответа, и без ключа повтор создаёт второй заказ.
+
+Первый запрос с ключом занимает его одним INSERT ... ON CONFLICT DO NOTHING в таблице IdempotencyKey
+(уникальный индекс по представлению и ключу), выполняется как обычно и сохраняет ответ. Повтор читает
+сохранённый ответ одним запросом по тому же индексу и к таблице заказов не обращается. Пока первый запрос
+ещё выполняется, повтор получает 409 с Retry-After. Тот же ключ с другим телом — ошибка клиента (422).
+Ответы 5xx и исключения не сохраняются: ключ освобождается, и повтор выполнится заново.
+Если воркер погиб, не дойдя до сохранения ответа, ключ так и остался бы занятым: поэтому занятый ключ без
+ответа старше IDEMPOTENCY_LEASE секунд повтор забирает себе условным UPDATE и выполняет запрос заново.
+
+Ключи живут IDEMPOTENCY_KEY_TTL секунд. Просроченные удаляются пачками в фоновом потоке не чаще,
+чем раз в IDEMPOTENCY_EVICT_INTERVAL секунд, а также командой evict_idempotency_keys (для cron).
+"""
+import functools
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.utils.timezone import now
+
+from core.models import IdempotencyKey
+from core.serialization import JsonResponse
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE', 60))
+
+
+def _evict_interval() -> float:
+    return getattr(settings, 'IDEMPOTENCY_EVICT_INTERVAL', 300)
+
+
+def _request_hash(request: HttpRequest) -> str:
+    digest = hashlib.sha256(f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def evict_expired_keys() -> int:
+    return IdempotencyKey.objects.evict_expired(now() - _ttl())
+
+
+class _Evictor:
+    """Запускает удаление просроченных ключей в фоновом потоке не чаще, чем раз в IDEMPOTENCY_EVICT_INTERVAL."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Отсчёт от старта процесса: короткоживущие процессы (тесты, команды) поток не запускают
+        self._last_run = time.monotonic()
+
+    def maybe_run(self) -> None:
+        if time.monotonic() - self._last_run < _evict_interval() or not self._lock.acquire(blocking=False):
+            return
+        self._last_run = time.monotonic()
+        threading.Thread(target=self._run, name='idempotency-evictor', daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            evict_expired_keys()
+        finally:
+            # Соединение принадлежит этому потоку и больше никому не понадобится
+            connection.close()
+            self._lock.release()
+
+
+evictor = _Evictor()
+
+
+def _begin(endpoint: str, key: str, request_hash: str) -> tuple[Optional[int], Optional[HttpResponse]]:
+    """
+    Занимает ключ. Возвращает (id записи, None), если запрос нужно выполнить,
+    или (None, ответ) — сохранённый ответ, 409 или 422 — если нет.
+    """
+    for _ in range(2):
+        claimed = IdempotencyKey.objects.claim(endpoint, key, request_hash)
+        if claimed is not None:
+            evictor.maybe_run()
+            return claimed, None
+        stored = IdempotencyKey.objects.filter(endpoint=endpoint, key=key).first()
+        if stored is None:
+            # Ключ успели освободить между INSERT и SELECT
+            continue
+        if stored.created_at < now() - _ttl():
+            # Просроченный ключ, до которого ещё не дошло фоновое удаление, считается свободным
+            IdempotencyKey.objects.filter(pk=stored.pk, created_at=stored.created_at).delete()
+            continue
+        if stored.request_hash != request_hash:
+            return None, JsonResponse(
+                {'error': f'{IDEMPOTENCY_HEADER} уже использован с другим запросом'}, status=422,
+            )
+        if stored.status_code is None:
+            if stored.created_at < now() - _lease():
+                # Запрос, занявший ключ, не завершился (воркер убит): ключ забирает тот, чей UPDATE прошёл первым
+                if IdempotencyKey.objects.filter(
+                    pk=stored.pk, status_code__isnull=True, created_at=stored.created_at,
+                ).update(created_at=now()):
+                    return stored.pk, None
+                continue
+            response = JsonResponse({'error': 'Запрос с этим ключом ещё выполняется'}, status=409)
+            response['Retry-After'] = '1'
+            return None, response
+        response = HttpResponse(bytes(stored.content), status=stored.status_code, content_type=stored.content_type)
+        response[REPLAYED_HEADER] = 'true'
+        return None, response
+    return None, JsonResponse({'error': 'Запрос с этим ключом ещё выполняется'}, status=409)
+
+
+def _finish(claimed: int, response: Optional[HttpResponse]) -> None:
+    """Сохраняет ответ для повторов; без ответа (исключение) или при 5xx освобождает ключ."""
+    if response is None or response.status_code >= 500 or response.streaming:
+        IdempotencyKey.objects.filter(pk=claimed).delete()
+        return
+    IdempotencyKey.objects.filter(pk=claimed).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        content=response.content,
+    )
+
+
+def _parse_key(request: HttpRequest) -> tuple[Optional[str], Optional[HttpResponse]]:
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None or request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return None, None
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return None, JsonResponse(
+            {'error': f'{IDEMPOTENCY_HEADER} должен быть непустым и не длиннее {MAX_KEY_LENGTH} символов'},
+            status=400,
+        )
+    return key, None
+
+
+def idempotent(view: Callable) -> Callable:
+    """
+    Декоратор представления: повтор запроса с тем же Idempotency-Key возвращает сохранённый ответ.
+    Запросы без заголовка выполняются как раньше, без лишних запросов к БД. Работает с sync и async представлениями.
+    """
+    endpoint = view.__name__
+
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            key, error = _parse_key(request)
+            if key is None:
+                return error or await view(request, *args, **kwargs)
+            claimed, stored = await sync_to_async(_begin)(endpoint, key, _request_hash(request))
+            if claimed is None:
+                return stored
+            response = None
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                await sync_to_async(_finish)(claimed, response)
+            return response
+    else:
+        @functools.wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            key, error = _parse_key(request)
+            if key is None:
+                return error or view(request, *args, **kwargs)
+            claimed, stored = _begin(endpoint, key, _request_hash(request))
+            if claimed is None:
+                return stored
+            response = None
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _finish(claimed, response)
+            return response
+
+    return wrapper
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import localdate, make_aware
+
+from core.archive import archive_dir, archive_orders
+from core.partitioning import add_months
+
+
+class Command(BaseCommand):
+    help = "Переносит оплаченные заказы старше N месяцев в сжатый архив и удаляет их из core_order"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.ORDER_ARCHIVE_AFTER_MONTHS,
+                            help="Архивировать заказы, созданные раньше, чем столько полных месяцев назад")
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_ARCHIVE_BLOCK_SIZE,
+                            help="Заказов в одной транзакции (и в одном блоке архива)")
+
+    def handle(self, *args, **options):
+        # Граница — начало месяца: заказы одного месяца уходят в архив за один запуск
+        cutoff = add_months(localdate().replace(day=1), -options['months'])
+        archived = archive_orders(make_aware(datetime(cutoff.year, cutoff.month, 1)), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"В архив {archive_dir()} перенесено заказов: {archived} (созданных до {cutoff:%d.%m.%Y})"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import evict_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные ключи Idempotency-Key (старше IDEMPOTENCY_KEY_TTL)"
+
+    def handle(self, *args, **options):
+        deleted = evict_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Удалено ключей: {deleted}"))
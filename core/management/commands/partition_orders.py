@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import localdate
+
+from core.partitioning import (
+    PartitioningError, add_months, convert_orders_table, detach_partitions, ensure_partitions, is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = "Создаёт секции core_order на будущие месяцы и отсоединяет старые (см. core.partitioning)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help="Перевести обычную таблицу core_order на помесячные секции")
+        parser.add_argument('--ahead', type=int, default=settings.ORDER_PARTITIONS_AHEAD,
+                            help="На сколько месяцев вперёд создавать секции")
+        parser.add_argument('--retain', type=int, default=settings.ORDER_PARTITION_RETENTION_MONTHS,
+                            help="Отсоединить секции месяцев старше этого числа месяцев (по умолчанию не отсоединять)")
+
+    def handle(self, *args, **options):
+        if options['convert']:
+            try:
+                with transaction.atomic():
+                    created = convert_orders_table(connection, options['ahead'])
+            except PartitioningError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"core_order секционирована: {len(created)} секций"))
+            return
+
+        if not is_partitioned(connection):
+            self.stdout.write("core_order не секционирована, делать нечего")
+            return
+
+        for name in ensure_partitions(connection, options['ahead']):
+            self.stdout.write(f"Создана секция {name}")
+        if options['retain']:
+            before = add_months(localdate().replace(day=1), -options['retain'])
+            for name in detach_partitions(connection, before):
+                self.stdout.write(f"Отсоединена секция {name}")
+        self.stdout.write(self.style.SUCCESS("Секции core_order в порядке"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.revenue import rebuild_daily_revenue
+
+
+class Command(BaseCommand):
+    help = "Пересобирает таблицу DailyRevenue по оплаченным заказам"
+
+    def handle(self, *args, **options):
+        created = rebuild_daily_revenue()
+        self.stdout.write(self.style.SUCCESS(f"DailyRevenue пересобрана: {created} строк"))
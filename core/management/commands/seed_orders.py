@@ -0,0 +1,103 @@
+import random
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import localtime, now
+
+from core.cache import invalidate_orders
+from core.models import Order, OrderItem, order_items_total
+from core.revenue import rebuild_daily_revenue
+
+SEED_BATCH_SIZE = 5000
+
+# Меню кафе: items сгенерированных заказов похожи на настоящие — повторяющиеся блюда с постоянной ценой
+MENU = [
+    ("Борщ", "4.50"), ("Солянка", "5.20"), ("Суп дня", "3.80"), ("Цезарь с курицей", "6.90"),
+    ("Оливье", "4.20"), ("Греческий салат", "5.10"), ("Стейк рибай", "24.00"), ("Котлета по-киевски", "9.80"),
+    ("Пельмени", "7.40"), ("Вареники с картофелем", "6.10"), ("Бефстроганов", "11.50"), ("Плов", "8.30"),
+    ("Паста карбонара", "9.20"), ("Лосось на гриле", "16.40"), ("Драники", "5.60"), ("Блины с икрой", "12.90"),
+    ("Картофель фри", "2.90"), ("Хлеб", "0.80"), ("Чизкейк", "4.70"), ("Медовик", "4.30"),
+    ("Мороженое", "3.10"), ("Чай", "1.90"), ("Кофе", "2.40"), ("Капучино", "2.80"),
+    ("Морс", "2.20"), ("Компот", "1.70"), ("Лимонад", "3.30"), ("Квас", "2.10"),
+]
+
+
+def _random_items(rng: random.Random) -> List[Dict[str, object]]:
+    dishes = rng.sample(MENU, rng.randint(1, 6))
+    return [
+        {"name": name, "price": price, "quantity": rng.choices((1, 2, 3, 4), weights=(70, 20, 7, 3))[0]}
+        for name, price in dishes
+    ]
+
+
+def _random_status(rng: random.Random, created_at: datetime, today_start: datetime) -> str:
+    # Прошлые заказы почти все оплачены, сегодняшние — ещё в работе
+    if created_at < today_start:
+        return rng.choices(Order.Status.values, weights=(1, 2, 97))[0]
+    return rng.choices(Order.Status.values, weights=(40, 30, 30))[0]
+
+
+class Command(BaseCommand):
+    help = "Заполняет базу случайными заказами для бенчмарков (benchmarks/routes.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help="Сколько заказов создать")
+        parser.add_argument('--days', type=int, default=365, help="За сколько последних дней распределить заказы")
+        parser.add_argument('--tables', type=int, default=30, help="Число столов в зале")
+        parser.add_argument('--clear', action='store_true', help="Удалить все заказы перед заполнением")
+        parser.add_argument('--seed', type=int, default=0, help="Начальное значение генератора случайных чисел")
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count, days, batch_size = options['count'], options['days'], options['batch_size']
+        if count < 0 or days < 1 or batch_size < 1:
+            raise CommandError("count должен быть не меньше 0, --days и --batch-size — больше 0")
+        rng = random.Random(options['seed'])
+
+        if options['clear']:
+            self._clear(batch_size)
+
+        # Время создания по возрастанию, как у настоящих заказов: id растёт вместе с created_at
+        current = now()
+        today_start = localtime(current).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today_start - timedelta(days=days - 1)
+        span = (current - start).total_seconds()
+        timestamps = sorted(start + timedelta(seconds=rng.uniform(0, span)) for _ in range(count))
+
+        for offset in range(0, count, batch_size):
+            self._create_batch(rng, timestamps[offset:offset + batch_size], today_start, options['tables'])
+            self.stdout.write(f"Создано заказов: {min(offset + batch_size, count)} из {count}")
+
+        rebuild_daily_revenue()
+        invalidate_orders([])
+        self.stdout.write(self.style.SUCCESS(f"Заказов в базе: {Order.objects.count()}"))
+
+    def _clear(self, batch_size: int) -> None:
+        # Удаление пачками по id: Order.objects.all().delete() загрузил бы все заказы в память ради каскада
+        OrderItem.objects.all().delete()
+        while ids := list(Order.objects.values_list('pk', flat=True)[:batch_size]):
+            Order.objects.filter(pk__in=ids).only('pk').delete()
+
+    def _create_batch(self, rng: random.Random, timestamps: List[datetime], today_start: datetime,
+                      tables: int) -> None:
+        orders = []
+        for created_at in timestamps:
+            items = _random_items(rng)
+            orders.append(Order(
+                table_number=rng.randint(1, tables),
+                status=_random_status(rng, created_at, today_start),
+                items=items,
+                total_price=order_items_total(items),
+            ))
+        with transaction.atomic():
+            Order.objects.bulk_create(orders)
+            # bulk_create проставляет created_at = now() (auto_now_add), поэтому время создания
+            # задаётся отдельным UPDATE на каждый час — с точностью до часа
+            pairs = zip(orders, timestamps)
+            for hour, group in groupby(pairs, key=lambda pair: pair[1].replace(minute=0, second=0, microsecond=0)):
+                ids = [order.pk for order, _ in group]
+                Order.objects.filter(pk__in=ids).update(created_at=hour, updated_at=hour)
+            OrderItem.objects.replace_for(orders, created=True)
@@ -0,0 +1,160 @@
+"""
+Метрики запросов в формате Prometheus: гистограммы задержки, числа и времени SQL-запросов
+и размера ответа по представлениям. Считаются в пределах процесса (как CacheStats в core.cache):
+при нескольких воркерах каждый отдаёт на /metrics свои значения.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Границы корзин гистограмм (значение попадает в первую корзину с le >= значения)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Сколько SQL-запросов одного HTTP-запроса хранить для предупреждения о превышении бюджета
+MAX_RECORDED_QUERIES = 1000
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами для каждого набора значений меток."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # метки -> [счётчики по корзинам (+Inf последней), сумма, количество]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {round(total, 6)}"
+            yield f"{self.name}_count{{{label_text}}} {count}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], int] = {}
+
+    def inc(self, labels: Tuple[str, ...]) -> None:
+        self._values[labels] = self._values.get(labels, 0) + 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{{{_labels(self.label_names, labels)}}} {value}"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class RequestMetrics:
+    """Все метрики запросов процесса; запись и выдача под одной блокировкой."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._create()
+
+    def _create(self) -> None:
+        self.requests = Counter('http_requests_total', 'HTTP requests by view, method and status',
+                                ('view', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', 'Time to build the response',
+                                 ('view', 'method'), LATENCY_BUCKETS)
+        self.db_queries = Histogram('http_request_db_queries', 'SQL queries per request',
+                                    ('view', 'method'), QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram('http_request_db_duration_seconds', 'Time spent in SQL queries per request',
+                                 ('view', 'method'), LATENCY_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', 'Response body size (non-streaming responses)',
+                                       ('view', 'method'), SIZE_BUCKETS)
+
+    def record(self, view: str, method: str, status: int, duration: float, queries: int, db_time: float,
+               size: Optional[int]) -> None:
+        labels = (view, method)
+        with self._lock:
+            self.requests.inc((view, method, str(status)))
+            self.latency.observe(labels, duration)
+            self.db_queries.observe(labels, queries)
+            self.db_time.observe(labels, db_time)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                line
+                for metric in (self.requests, self.latency, self.db_queries, self.db_time, self.response_size)
+                for line in metric.render()
+            ]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._create()
+
+
+metrics = RequestMetrics()
+
+
+class QueryLog:
+    """SQL-запросы текущего HTTP-запроса: число, суммарное время и сами запросы (первые MAX_RECORDED_QUERIES)."""
+
+    __slots__ = ('count', 'duration', 'queries')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.queries: List[Tuple[float, str]] = []
+
+
+# QueryLog запроса, который сейчас обрабатывается. Через contextvars он виден и в потоках
+# sync_to_async, где асинхронные представления выполняют ORM-запросы на своём подключении
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar('current_query_log', default=None)
+
+
+def record_query(execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+    """execute_wrapper для каждого подключения к БД: учитывает запрос в QueryLog текущего HTTP-запроса."""
+    log = current_query_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        log.count += 1
+        log.duration += duration
+        if len(log.queries) < MAX_RECORDED_QUERIES:
+            log.queries.append((duration, sql))
+
+
+def install_query_recorder(sender: Any, connection: Any, **kwargs: Any) -> None:
+    """Обработчик connection_created: подключает record_query к новому подключению."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,75 @@
+import logging
+import time
+from typing import Any, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from core.metrics import QueryLog, current_query_log, metrics
+
+logger = logging.getLogger('core.metrics')
+
+# Сколько самых долгих SQL-запросов выводить в предупреждении о превышении бюджета
+SLOW_REQUEST_LOGGED_QUERIES = 10
+
+
+class RequestMetricsMiddleware:
+    """
+    Записывает в core.metrics задержку, число и время SQL-запросов и размер ответа по каждому представлению
+    и пишет предупреждение в лог 'core.metrics', если запрос вышел за METRICS_QUERY_BUDGET
+    или METRICS_TIME_BUDGET_MS. Стоит первым в MIDDLEWARE, чтобы задержка включала остальные middleware.
+
+    Накладные расходы — порядка 10 мкс на запрос и около 1 мкс на SQL-запрос
+    (бюджет — METRICS_OVERHEAD_BUDGET_US, проверяется тестом), поэтому middleware включено и в production.
+    Для потоковых ответов (экспорт, SSE) задержка — время до начала ответа, размер не учитывается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.query_budget = settings.METRICS_QUERY_BUDGET
+        self.time_budget = settings.METRICS_TIME_BUDGET_MS / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        log = QueryLog()
+        token = current_query_log.set(log)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_log.reset(token)
+        self.record(request, response, log, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        log = QueryLog()
+        token = current_query_log.set(log)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_log.reset(token)
+        self.record(request, response, log, time.perf_counter() - started)
+        return response
+
+    def record(self, request: HttpRequest, response: HttpResponse, log: QueryLog, duration: float) -> None:
+        # Имя маршрута, а не путь: иначе каждый id заказа стал бы отдельной серией в Prometheus
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        metrics.record(view, request.method, response.status_code, duration, log.count, log.duration, size)
+
+        if log.count > self.query_budget or duration > self.time_budget:
+            slowest = sorted(log.queries, reverse=True)[:SLOW_REQUEST_LOGGED_QUERIES]
+            logger.warning(
+                "Request over budget: %s %s (%s) took %.1f ms, %d SQL queries in %.1f ms; slowest:\n%s",
+                request.method, request.path, view, duration * 1000, log.count, log.duration * 1000,
+                "\n".join(f"  {query_duration * 1000:.2f} ms  {sql}" for query_duration, sql in slowest),
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+from core.migrations._operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись в core_order, но не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='core_order_created_id_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='core_order_status_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(fields=['table_number', '-created_at', '-id'], name='core_order_table_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'paid')), fields=['created_at'], include=('total_price',), name='core_order_paid_created_idx'),
+        ),
+    ]
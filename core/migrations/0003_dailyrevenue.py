@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:16
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_daily_revenue(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    DailyRevenue = apps.get_model('core', 'DailyRevenue')
+    rows = (
+        Order.objects.filter(status='paid')
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'table_number')
+        .annotate(total=Sum('total_price'), orders_count=Count('id'))
+        .order_by()
+    )
+    DailyRevenue.objects.bulk_create(
+        (DailyRevenue(date=row['day'], table_number=row['table_number'], total=row['total'],
+                      orders_count=row['orders_count']) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('table_number', models.PositiveIntegerField(verbose_name='Номер стола')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Выручка')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='Число оплаченных заказов')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'table_number'), name='core_dailyrevenue_date_table_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_daily_revenue, migrations.RunPython.noop),
+    ]
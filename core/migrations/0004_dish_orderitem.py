@@ -0,0 +1,77 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:23
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def parse_item(item):
+    name = str(item.get('name') or item.get('item') or '')[:200]
+    try:
+        price = Decimal(str(item.get('price', 0))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except ArithmeticError:
+        price = Decimal('0.00')
+    try:
+        quantity = max(int(item.get('quantity', 1)), 0)
+    except (TypeError, ValueError):
+        quantity = 1
+    return name, price, quantity
+
+
+def fill_order_items(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    Dish = apps.get_model('core', 'Dish')
+    OrderItem = apps.get_model('core', 'OrderItem')
+
+    dish_ids = {}
+    lines = []
+
+    def flush():
+        names = {name for _, (name, _, _) in lines if name and name not in dish_ids}
+        if names:
+            Dish.objects.bulk_create([Dish(name=name) for name in names], ignore_conflicts=True)
+            dish_ids.update(Dish.objects.filter(name__in=names).values_list('name', 'id'))
+        OrderItem.objects.bulk_create([
+            OrderItem(order_id=order_id, dish_id=dish_ids.get(name), price=price, quantity=quantity)
+            for order_id, (name, price, quantity) in lines
+        ])
+        lines.clear()
+
+    for order_id, items in Order.objects.values_list('id', 'items').iterator(chunk_size=BATCH_SIZE):
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict):
+                lines.append((order_id, parse_item(item)))
+        if len(lines) >= BATCH_SIZE:
+            flush()
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dish',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Название')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('dish', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='core.dish', verbose_name='Блюдо')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='core.order', verbose_name='Заказ')),
+            ],
+        ),
+        migrations.RunPython(fill_order_items, migrations.RunPython.noop),
+    ]
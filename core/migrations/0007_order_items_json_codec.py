@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:58
+
+import core.serialization
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_order_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='items',
+            field=models.JSONField(decoder=core.serialization.OrderJSONDecoder, default=list, encoder=core.serialization.OrderJSONEncoder, verbose_name='Список блюд'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+from core.migrations._operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись в core_order, но не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_order_items_json_codec'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'ready'])), fields=['created_at', 'id'], name='core_order_active_idx'),
+        ),
+    ]
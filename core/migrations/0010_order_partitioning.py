@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import migrations
+
+from core.partitioning import convert_orders_table, is_partitioned
+
+
+def partition_orders(apps, schema_editor):
+    # Только с ORDER_PARTITIONING=1 и на PostgreSQL; включить позже можно командой partition_orders --convert
+    connection = schema_editor.connection
+    if settings.ORDER_PARTITIONING and connection.vendor == 'postgresql' and not is_partitioned(connection):
+        convert_orders_table(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        # Схема для Django не меняется: секционирование — деталь хранения таблицы core_order.
+        # Обратно на обычную таблицу миграция не переводит
+        migrations.RunPython(partition_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+"""Операции миграций, общие для нескольких миграций core."""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    # На SQLite (бенчмарки без PostgreSQL) CONCURRENTLY не поддерживается — там обычный CREATE INDEX.
+    # На секционированной таблице (core.partitioning) тоже: индекс строится на каждой секции под блокировкой
+    def _concurrently(self, app_label, schema_editor, state) -> bool:
+        if schema_editor.connection.vendor != 'postgresql':
+            return False
+        table = state.apps.get_model(app_label, self.model_name)._meta.db_table
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                           [table])
+            return cursor.fetchone()[0]
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self._concurrently(app_label, schema_editor, to_state):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self._concurrently(app_label, schema_editor, from_state):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
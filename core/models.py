@@ -1,5 +1,208 @@
-from django.db import models
-from django.core.serializers.json import DjangoJSONEncoder
+from collections import defaultdict
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import DatabaseError, connections, models, transaction
+from django.db.models import Q
+from django.utils.timezone import localdate, now
+
+from core.cache import invalidate_order, invalidate_revenue
+from core.serialization import OrderJSONDecoder, OrderJSONEncoder, dumps
+from core.events import EVENT_CREATED, EVENT_STATUS, EVENT_UPDATED, publish_order_deleted, publish_order_event
+
+# (дата, номер стола, сумма) оплаченного заказа — то, что он вносит в DailyRevenue
+RevenueState = Optional[Tuple[date, int, Decimal]]
+
+
+class ConcurrentUpdateError(DatabaseError):
+    """Заказ изменён или удалён другим запросом после того, как был прочитан (версия не совпала)."""
+
+
+class InvalidStatusTransition(ValueError):
+    """Переход статуса не разрешён Order.STATUS_TRANSITIONS (например, из «Оплачено» обратно в «В ожидании»)."""
+
+    def __init__(self, current: str, requested: str) -> None:
+        super().__init__(f"Status transition {current} -> {requested} is not allowed")
+        self.current = current
+        self.requested = requested
+
+
+class DailyRevenueManager(models.Manager):
+    def add(self, day: date, table_number: int, amount: Decimal, orders_count: int) -> None:
+        """Атомарно прибавляет сумму и число заказов к строке (день, стол), создавая её при необходимости."""
+        self._upsert([(day, table_number, amount, orders_count)])
+
+    def apply_change(self, old_state: RevenueState, new_state: RevenueState) -> None:
+        self.apply_changes([(old_state, new_state)])
+
+    def apply_changes(self, changes: Iterable[Tuple[RevenueState, RevenueState]]) -> None:
+        """
+        Применяет изменения выручки пачкой: дельты сначала складываются по (день, стол),
+        после чего все затронутые строки DailyRevenue обновляются одним запросом.
+        """
+        deltas: Dict[Tuple[date, int], List] = defaultdict(lambda: [Decimal('0'), 0])
+        for old_state, new_state in changes:
+            if old_state == new_state:
+                continue
+            if old_state is not None:
+                day, table_number, amount = old_state
+                deltas[day, table_number][0] -= amount
+                deltas[day, table_number][1] -= 1
+            if new_state is not None:
+                day, table_number, amount = new_state
+                deltas[day, table_number][0] += amount
+                deltas[day, table_number][1] += 1
+        self._upsert([
+            (day, table_number, amount, orders_count)
+            for (day, table_number), (amount, orders_count) in deltas.items()
+            if amount or orders_count
+        ])
+
+    def _upsert(self, rows: List[Tuple[date, int, Decimal, int]]) -> None:
+        # INSERT ... ON CONFLICT DO UPDATE прибавляет дельты к существующим строкам в одном запросе,
+        # без гонки между UPDATE и INSERT при параллельной записи. bulk_create(update_conflicts=True)
+        # так не умеет: он перезаписывает значения, а не прибавляет.
+        if not rows:
+            return
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+        values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        params = [value for row in rows for value in row]
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (date, table_number, total, orders_count) VALUES {values} "
+                f"ON CONFLICT (date, table_number) DO UPDATE SET "
+                f"total = {table}.total + EXCLUDED.total, "
+                f"orders_count = {table}.orders_count + EXCLUDED.orders_count",
+                params,
+            )
+        invalidate_revenue()
+
+
+class DishManager(models.Manager):
+    def ids_for_names(self, names: Iterable[str]) -> Dict[str, int]:
+        """Возвращает id блюд по названиям, создавая недостающие блюда в каталоге."""
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        dish_ids = dict(self.filter(name__in=names).values_list('name', 'id'))
+        missing = names - dish_ids.keys()
+        if missing:
+            self.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            dish_ids.update(self.filter(name__in=missing).values_list('name', 'id'))
+        return dish_ids
+
+
+class OrderItemManager(models.Manager):
+    def replace_for(self, orders: Iterable['Order'], created: bool = False) -> None:
+        """Пересоздаёт строки OrderItem по Order.items для пачки заказов."""
+        orders = list(orders)
+        if not created:
+            self.filter(order__in=[order.pk for order in orders]).delete()
+        lines = [
+            (order.pk, parse_order_item(item))
+            for order in orders
+            for item in (order.items if isinstance(order.items, list) else [])
+            if isinstance(item, dict)
+        ]
+        dish_ids = Dish.objects.ids_for_names(name for _, (name, _, _) in lines)
+        self.bulk_create(
+            [
+                self.model(order_id=order_id, dish_id=dish_ids.get(name), price=price, quantity=quantity)
+                for order_id, (name, price, quantity) in lines
+            ],
+            batch_size=1000,
+        )
+
+
+class OrderManager(models.Manager):
+    def change_status(self, order_id: int, status: str, expected_version: Optional[int] = None) -> Optional['Order']:
+        """
+        Переводит заказ в новый статус одним условным UPDATE ... WHERE status IN (разрешённые исходные) RETURNING,
+        без предварительного SELECT и без select_for_update на время запроса. Проверка перехода и запись
+        атомарны: из двух параллельных переходов применится только тот, что разрешён для текущего статуса.
+        Прежний статус берётся из той же строки, чтобы обновить DailyRevenue, кэш и отправить событие.
+        Если передан expected_version, UPDATE выполняется только при совпадении версии.
+
+        Возвращает заказ с новым статусом или None, если заказа нет. Повторная установка текущего статуса
+        ничего не пишет. Если переход не применён: InvalidStatusTransition — переход не разрешён,
+        ConcurrentUpdateError — версия не совпала.
+        """
+        if status not in self.model.Status.values:
+            raise ValueError(f"Unknown status: {status}")
+        sources = self.model.status_sources(status)
+        with transaction.atomic(using=self.db):
+            row = self._update_status(order_id, status, sources, expected_version) if sources else None
+            if row is None:
+                return self._status_not_applied(order_id, status, expected_version)
+            old_status, table_number, total_price, created_at, updated_at, version = row
+            order = self.model(
+                id=order_id, status=old_status, table_number=table_number,
+                total_price=total_price, created_at=created_at, updated_at=updated_at, version=version,
+            )
+            old_state = order.revenue_state()
+            order._loaded_status = old_status
+            order.status = status
+            DailyRevenue.objects.apply_change(old_state, order.revenue_state())
+            invalidate_order(order_id)
+            publish_order_event(order._event_type(adding=False), order)
+        order._state.adding = False
+        order._loaded_revenue_state = order.revenue_state()
+        order._loaded_status = status
+        return order
+
+    def _update_status(self, order_id: int, status: str, sources: List[str],
+                       expected_version: Optional[int]) -> Optional[tuple]:
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            return self._update_status_portable(order_id, status, sources, expected_version)
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        condition = "id = %s AND status IN ({})".format(", ".join(["%s"] * len(sources)))
+        params = [order_id, *sources]
+        if expected_version is not None:
+            condition += " AND version = %s"
+            params.append(expected_version)
+        updated_at = now()
+        with connection.cursor() as cursor:
+            # FOR UPDATE в подзапросе: если строку параллельно меняют, после ожидания
+            # условие status IN (...) проверяется заново на новой версии строки
+            cursor.execute(
+                f"UPDATE {table} AS o SET status = %s, updated_at = %s, version = o.version + 1 "
+                f"FROM (SELECT id, status FROM {table} WHERE {condition} FOR UPDATE) AS old "
+                f"WHERE o.id = old.id "
+                f"RETURNING old.status, o.table_number, o.total_price, o.created_at, o.updated_at, o.version",
+                [status, updated_at, *params],
+            )
+            return cursor.fetchone()
+
+    def _update_status_portable(self, order_id: int, status: str, sources: List[str],
+                                expected_version: Optional[int]) -> Optional[tuple]:
+        # SQLite (бенчмарки без PostgreSQL) не умеет RETURNING из подзапроса: SELECT и UPDATE
+        # с условием на прочитанные статус и версию — строку между ними никто не изменит незаметно
+        queryset = self.filter(pk=order_id, status__in=sources)
+        if expected_version is not None:
+            queryset = queryset.filter(version=expected_version)
+        row = queryset.values_list('status', 'table_number', 'total_price', 'created_at', 'version').first()
+        if row is None:
+            return None
+        old_status, table_number, total_price, created_at, version = row
+        updated_at = now()
+        updated = self.filter(pk=order_id, status=old_status, version=version).update(
+            status=status, updated_at=updated_at, version=version + 1,
+        )
+        return (old_status, table_number, total_price, created_at, updated_at, version + 1) if updated else None
+
+    def _status_not_applied(self, order_id: int, status: str, expected_version: Optional[int]) -> Optional['Order']:
+        # Только на неуспешном пути: выясняем, почему UPDATE не затронул строку
+        order = self.filter(pk=order_id).first()
+        if order is None:
+            return None
+        if expected_version is not None and order.version != expected_version:
+            raise ConcurrentUpdateError(f"Order {order_id} version is not {expected_version}")
+        if order.status != status:
+            raise InvalidStatusTransition(order.status, status)
+        return order
+
 
 class Order(models.Model):
     class Status(models.TextChoices):
@@ -11,13 +214,318 @@ class Order(models.Model):
     status = models.CharField(
         max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Статус"
     )
-    items = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Список блюд")
+    items = models.JSONField(
+        default=list, encoder=OrderJSONEncoder, decoder=OrderJSONDecoder, verbose_name="Список блюд"
+    )
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Общая стоимость")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
+    # Номер версии для оптимистичной блокировки: каждое изменение заказа увеличивает его на 1
+    version = models.PositiveIntegerField(default=1, verbose_name="Версия")
+
+    # Разрешённые переходы статуса: pending → ready → paid, из «Оплачено» назад не возвращаемся
+    STATUS_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+        Status.PENDING: (Status.READY,),
+        Status.READY: (Status.PAID,),
+        Status.PAID: (),
+    }
+    # Заказы, которые ещё готовят или ждут оплаты, — то, что показывают кухонные экраны
+    ACTIVE_STATUSES: Tuple[str, ...] = (Status.PENDING, Status.READY)
+
+    objects = OrderManager()
+
+    class Meta:
+        indexes = [
+            # Список заказов без фильтров: ORDER BY created_at DESC, id DESC (курсорная пагинация)
+            models.Index(fields=['-created_at', '-id'], name='core_order_created_id_idx'),
+            # Список заказов с фильтром по статусу / номеру стола
+            models.Index(fields=['status', '-created_at', '-id'], name='core_order_status_created_idx'),
+            models.Index(fields=['table_number', '-created_at', '-id'], name='core_order_table_created_idx'),
+            # Выручка: только оплаченные заказы за период, total_price в индексе для index-only scan
+            models.Index(
+                fields=['created_at'],
+                name='core_order_paid_created_idx',
+                condition=Q(status='paid'),
+                include=['total_price'],
+            ),
+            # Активные заказы (core.active_orders): индекс не растёт с историей оплаченных заказов
+            models.Index(
+                fields=['created_at', 'id'],
+                name='core_order_active_idx',
+                condition=Q(status__in=['pending', 'ready']),
+            ),
+        ]
 
     def __str__(self):
         return f"Заказ {self.id} (Стол {self.table_number})"
 
-    def update_total_price(self):
-        self.total_price = sum(item.get("price", 0) * item.get("quantity", 1) for item in self.items)
-        self.save()
+    @classmethod
+    def can_change_status(cls, current: str, status: str) -> bool:
+        """Разрешён ли переход current → status; оставить статус прежним можно всегда."""
+        return current == status or status in cls.STATUS_TRANSITIONS.get(current, ())
+
+    @classmethod
+    def status_sources(cls, status: str) -> List[str]:
+        """Статусы, из которых разрешён переход в status."""
+        return [current for current, targets in cls.STATUS_TRANSITIONS.items() if status in targets]
+
+    def check_status_transition(self) -> None:
+        """
+        Проверяет переход из загруженного статуса в текущий. Сохранение идёт с compare-and-swap по версии,
+        поэтому статус в БД не может измениться между этой проверкой и UPDATE.
+        """
+        if self.status not in self.Status.values:
+            raise ValueError(f"Unknown status: {self.status}")
+        current = getattr(self, '_loaded_status', self.status)
+        if not self.can_change_status(current, self.status):
+            raise InvalidStatusTransition(current, self.status)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженное состояние, чтобы при save() обновить DailyRevenue без лишнего SELECT
+        if {'status', 'table_number', 'total_price', 'created_at'}.issubset(field_names):
+            instance._loaded_revenue_state = instance.revenue_state()
+        # и не переписывать OrderItem, если список блюд не менялся
+        if 'items' in field_names:
+            instance._loaded_items_key = _items_key(instance.items)
+        # и отправить подписчикам событие смены статуса, а не просто изменения
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    def revenue_state(self) -> RevenueState:
+        if self.status != self.Status.PAID or self.created_at is None:
+            return None
+        total_price = Decimal(str(self.total_price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return localdate(self.created_at), self.table_number, total_price
+
+    def _stored_revenue_state(self) -> RevenueState:
+        if self._state.adding or self.pk is None:
+            return None
+        if hasattr(self, '_loaded_revenue_state'):
+            return self._loaded_revenue_state
+        stored = Order.objects.filter(pk=self.pk).only('status', 'table_number', 'total_price', 'created_at').first()
+        return stored.revenue_state() if stored else None
+
+    def _items_changed(self, update_fields: Optional[Iterable[str]]) -> bool:
+        if update_fields is not None and 'items' not in update_fields:
+            return False
+        return _items_key(self.items) != getattr(self, '_loaded_items_key', None)
+
+    def _event_type(self, adding: bool) -> str:
+        if adding:
+            return EVENT_CREATED
+        if self.status != getattr(self, '_loaded_status', self.status):
+            return EVENT_STATUS
+        return EVENT_UPDATED
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Compare-and-swap: UPDATE ... SET version = <прочитанная> + 1 WHERE id = ... AND version = <прочитанная>.
+        # Если строку успели изменить или удалить, не обновляется ничего — вместо потерянного обновления ошибка
+        if self._state.adding and not forced_update and update_fields is None:
+            # Новый заказ с явным pk (Order(id=...).save(), loaddata): Django сначала пробует UPDATE и при 0 строк
+            # делает INSERT, поэтому версию здесь не сравниваем и не требуем, чтобы строка уже была
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        expected = self.version
+        values = [
+            (field, model, expected + 1 if field.attname == 'version' else value)
+            for field, model, value in values
+        ]
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update,
+        )
+        if not updated:
+            raise ConcurrentUpdateError(f"Order {pk_val} version is not {expected}")
+        self.version = expected + 1
+        return updated
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        adding = self._state.adding
+        event_type = self._event_type(adding)
+        sync_items = self._items_changed(kwargs.get('update_fields'))
+        with transaction.atomic():
+            old_state = self._stored_revenue_state()
+            super().save(*args, **kwargs)
+            if sync_items:
+                OrderItem.objects.replace_for([self], created=adding)
+            new_state = self.revenue_state()
+            DailyRevenue.objects.apply_change(old_state, new_state)
+            invalidate_order(self.pk)
+            publish_order_event(event_type, self)
+        self._loaded_revenue_state = new_state
+        self._loaded_status = self.status
+        if sync_items:
+            self._loaded_items_key = _items_key(self.items)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with transaction.atomic():
+            old_state = self._stored_revenue_state()
+            result = super().delete(*args, **kwargs)
+            DailyRevenue.objects.apply_change(old_state, None)
+            invalidate_order(pk)
+            publish_order_deleted(pk)
+        return result
+
+    def update_total_price(self, update_fields: Optional[Iterable[str]] = None):
+        """
+        Пересчитывает total_price по items и сохраняет заказ одним INSERT/UPDATE.
+        Сумма считается тем же parse_order_item, из которого строятся строки OrderItem,
+        поэтому совпадает с SUM(price * quantity) по ним без отдельного запроса к БД.
+        """
+        self.total_price = order_items_total(self.items)
+        if update_fields is not None:
+            update_fields = {*update_fields, 'total_price', 'updated_at'}
+        self.save(update_fields=update_fields)
+
+
+def _items_key(items: Any) -> str:
+    return dumps(items, sort_keys=True).decode()
+
+
+def order_items_total(items: Any) -> Decimal:
+    """
+    Сумма заказа: SUM(price * quantity) по items — то же, что агрегат по строкам OrderItem заказа.
+    Считается в Python, а не запросом к OrderItem: сумма нужна до записи заказа, чтобы сохранить его
+    одним UPDATE (Order.update_total_price, пакетные endpoint'ы), а строки OrderItem строятся тем же
+    parse_order_item, поэтому результат совпадает. Агрегаты по OrderItem в БД — для аналитики
+    (core.revenue.dish_sales), где заказы не загружаются в Python.
+    """
+    total = Decimal('0.00')
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            _, price, quantity = parse_order_item(item)
+            total += price * quantity
+    return total
+
+
+def new_order_total(items: Any, total_price: Any = 0) -> Any:
+    """
+    Сумма нового заказа: с блюдами — по items, как в Order.update_total_price(), а присланный клиентом
+    total_price не используется; без блюд — total_price как есть.
+    """
+    return order_items_total(items) if items else total_price
+
+
+def parse_order_item(item: Dict[str, Any]) -> Tuple[str, Decimal, int]:
+    """
+    Разбирает элемент Order.items в (название, цена, количество).
+    Как и раньше при подсчёте суммы: нет цены — 0, нет количества — 1.
+    Название берётся из "name", а в старых заказах — из "item".
+    """
+    name = str(item.get('name') or item.get('item') or '')[:Dish._meta.get_field('name').max_length]
+    try:
+        price = Decimal(str(item.get('price', 0))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except ArithmeticError:
+        price = Decimal('0.00')
+    try:
+        quantity = max(int(item.get('quantity', 1)), 0)
+    except (TypeError, ValueError):
+        quantity = 1
+    return name, price, quantity
+
+
+class Dish(models.Model):
+    name = models.CharField(max_length=200, unique=True, verbose_name="Название")
+
+    objects = DishManager()
+
+    def __str__(self):
+        return self.name
+
+
+class OrderItem(models.Model):
+    """
+    Строка заказа: нормализованная копия элемента Order.items.
+    Order.items остаётся форматом API, а суммы и аналитика по блюдам считаются по этой таблице.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='order_items', verbose_name="Заказ")
+    dish = models.ForeignKey(
+        Dish, on_delete=models.PROTECT, null=True, related_name='order_items', verbose_name="Блюдо"
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Количество")
+
+    objects = OrderItemManager()
+
+    def __str__(self):
+        return f"{self.dish} × {self.quantity}"
+
+
+class DailyRevenue(models.Model):
+    """
+    Выручка по оплаченным заказам, предварительно сгруппированная по дню создания заказа и столу.
+    Обновляется инкрементально из Order.save()/Order.delete(), пересобирается командой rebuild_daily_revenue.
+    """
+    date = models.DateField(verbose_name="Дата")
+    table_number = models.PositiveIntegerField(verbose_name="Номер стола")
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Выручка")
+    orders_count = models.IntegerField(default=0, verbose_name="Число оплаченных заказов")
+
+    objects = DailyRevenueManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'table_number'], name='core_dailyrevenue_date_table_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Выручка {self.date} (Стол {self.table_number}): {self.total}"
+
+
+class IdempotencyKeyManager(models.Manager):
+    def claim(self, endpoint: str, key: str, request_hash: str) -> Optional[int]:
+        """
+        Занимает ключ одним INSERT ... ON CONFLICT DO NOTHING. Возвращает id новой записи — запрос нужно
+        выполнить; None — ключ уже есть (ответ сохранён или запрос с этим ключом ещё выполняется).
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (endpoint, key, request_hash, status_code, content_type, content, created_at) "
+                f"VALUES (%s, %s, %s, NULL, '', %s, %s) ON CONFLICT (endpoint, key) DO NOTHING RETURNING id",
+                [endpoint, key, request_hash, b'', now()],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def evict_expired(self, cutoff: Any, batch_size: int = 1000) -> int:
+        """
+        Удаляет ключи, созданные раньше cutoff, пачками по batch_size по индексу created_at,
+        чтобы не держать долгую блокировку на таблице. Возвращает число удалённых ключей.
+        """
+        deleted = 0
+        while True:
+            ids = list(self.filter(created_at__lt=cutoff).order_by('created_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += self.filter(id__in=ids).delete()[0]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Ответ на запрос с заголовком Idempotency-Key (core.idempotency): повтор запроса с тем же ключом
+    получает сохранённый ответ и не выполняется ещё раз. Пока status_code пуст, запрос ещё выполняется.
+    """
+    endpoint = models.CharField(max_length=100, verbose_name="Представление")
+    key = models.CharField(max_length=255, verbose_name="Ключ")
+    # SHA-256 метода, пути и тела: тот же ключ с другим запросом — ошибка клиента, а не повтор
+    request_hash = models.CharField(max_length=64, verbose_name="Хэш запроса")
+    status_code = models.PositiveSmallIntegerField(null=True, verbose_name="Код ответа")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Тип ответа")
+    content = models.BinaryField(default=bytes, verbose_name="Тело ответа")
+    created_at = models.DateTimeField(default=now, db_index=True, verbose_name="Время создания")
+
+    objects = IdempotencyKeyManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['endpoint', 'key'], name='core_idempotencykey_endpoint_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.key}"
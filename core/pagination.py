@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Порядок выдачи: сначала новые заказы. id нужен как тай-брейкер для одинакового created_at.
+KEYSET_ORDERING = ('-created_at', '-id')
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at_raw, pk_raw = base64.urlsafe_b64decode(padded).decode().split('|')
+        created_at = datetime.fromisoformat(created_at_raw)
+        pk = int(pk_raw)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise PaginationError("Invalid cursor") from exc
+    if created_at.tzinfo is None:
+        raise PaginationError("Invalid cursor")
+    return created_at, pk
+
+
+def parse_limit(raw: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    if not raw:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError as exc:
+        raise PaginationError("Invalid limit") from exc
+    if limit < 1:
+        raise PaginationError("Invalid limit")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _row_key(row: Any) -> Tuple[datetime, int]:
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.id
+
+
+def paginate_keyset(queryset: QuerySet, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Возвращает одну страницу по ключу (created_at, id) и курсор следующей страницы.
+    Вместо OFFSET используется условие WHERE по последней строке предыдущей страницы,
+    поэтому стоимость запроса не зависит от того, насколько глубоко листает клиент.
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # Берём на одну строку больше, чтобы понять, есть ли следующая страница, без COUNT(*)
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(*_row_key(rows[-1]))
@@ -0,0 +1,295 @@
+"""
+Помесячное секционирование таблицы заказов core_order по created_at (PostgreSQL, PARTITION BY RANGE).
+
+Включается переменной ORDER_PARTITIONING=1: тогда миграция 0010 переводит таблицу на секции,
+а для уже развёрнутой базы то же делает `manage.py partition_orders --convert`. Секции называются
+core_order_pГГГГ_ММ и покрывают календарный месяц в TIME_ZONE — те же сутки, что и у DailyRevenue.
+Запросы с границами по created_at (dish_sales, выгрузка, лента заказов по created_at DESC) читают только
+секции нужных месяцев, а старые месяцы можно отсоединить от таблицы, не трогая остальные.
+
+Ограничения PostgreSQL, которые приходится учитывать:
+- первичный ключ секционированной таблицы обязан включать created_at, поэтому он (id, created_at);
+  id по-прежнему выдаётся одной последовательностью и уникален, Django о составном ключе не знает;
+- внешний ключ core_orderitem.order_id на такую таблицу невозможен и удаляется; каскадное удаление
+  OrderItem при удалении заказа и так выполняет Django (on_delete=CASCADE). Строки OrderItem отсоединённых
+  месяцев остаются в core_orderitem, но в отчёт по блюдам (core.revenue.dish_sales) не попадают: он
+  соединяет OrderItem с core_order. Выручка этих месяцев остаётся в DailyRevenue;
+- CREATE INDEX CONCURRENTLY на секционированной таблице не работает (см. AddIndexConcurrentlyOnPostgres);
+- DETACH PARTITION CONCURRENTLY невозможен при DEFAULT-секции, поэтому секции отсоединяются обычным
+  DETACH (короткая блокировка таблицы: данные не переносятся).
+
+Заказ за месяц без своей секции попадает в DEFAULT-секцию core_order_default, так что вставка не падает,
+даже если `partition_orders` давно не запускался. Команда выполняется при каждом старте контейнера и
+создаёт секции на ORDER_PARTITIONS_AHEAD месяцев вперёд; строки, успевшие попасть в DEFAULT, при этом
+переносятся в секцию своего месяца. Запускать её стоит и регулярно (например, раз в сутки из cron),
+чтобы DEFAULT-секция оставалась пустой.
+
+Строки DailyRevenue отсоединённых месяцев остаются: rebuild_daily_revenue (core.revenue) пересобирает
+выручку только с первого месяца, секция которого ещё присоединена (см. first_partition).
+"""
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils.timezone import localdate, make_aware
+
+from core.active_orders import snapshot as active_orders
+from core.cache import invalidate_orders, invalidate_revenue
+
+ORDER_TABLE = 'core_order'
+PARTITION_RE = re.compile(rf'^{ORDER_TABLE}_p(\d{{4}})_(\d{{2}})$')
+# Имя исходной таблицы на время переноса строк
+UNPARTITIONED_TABLE = f'{ORDER_TABLE}_unpartitioned'
+# Секция для строк вне диапазонов помесячных секций
+DEFAULT_PARTITION = f'{ORDER_TABLE}_default'
+# По сколько id отсоединённой секции сбрасывать версии кэша за раз
+DETACH_INVALIDATE_BATCH = 1000
+
+
+class PartitioningError(Exception):
+    """Секционирование недоступно (не PostgreSQL) или таблица не в том состоянии."""
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f'{ORDER_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _bound(month: date) -> str:
+    # Полночь первого числа в TIME_ZONE: граница секции совпадает с границей суток DailyRevenue
+    return make_aware(datetime(month.year, month.month, 1)).isoformat()
+
+
+def _check_vendor(connection: BaseDatabaseWrapper) -> None:
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Секционирование заказов поддерживается только на PostgreSQL")
+
+
+def is_partitioned(connection: BaseDatabaseWrapper) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [ORDER_TABLE],
+        )
+        return cursor.fetchone()[0]
+
+
+def partitions(connection: BaseDatabaseWrapper) -> List[date]:
+    """Месяцы, для которых у core_order есть секции, по возрастанию."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [ORDER_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def first_partition(connection: BaseDatabaseWrapper) -> Optional[date]:
+    """
+    Месяц самой старой присоединённой секции: заказы более ранних месяцев отсоединены и в core_order
+    не видны. None — таблица не секционирована (или секций нет), видны все заказы.
+    Заказы ещё более ранних месяцев, попавшие в DEFAULT-секцию, видны, и граница сдвигается на их месяц.
+    """
+    if not is_partitioned(connection):
+        return None
+    months = partitions(connection)
+    if _has_default_partition(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(created_at) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}")
+            oldest = cursor.fetchone()[0]
+        if oldest is not None:
+            months.append(_month_start(localdate(oldest)))
+    return min(months) if months else None
+
+
+def _has_default_partition(connection: BaseDatabaseWrapper) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(%s) AND partdefid = to_regclass(%s))",
+            [ORDER_TABLE, DEFAULT_PARTITION],
+        )
+        return cursor.fetchone()[0]
+
+
+def _create_default_partition(connection: BaseDatabaseWrapper) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {connection.ops.quote_name(DEFAULT_PARTITION)} PARTITION OF {ORDER_TABLE} DEFAULT"
+        )
+
+
+def _create_partition(connection: BaseDatabaseWrapper, month: date, has_default: bool) -> None:
+    name = connection.ops.quote_name(partition_name(month))
+    default = connection.ops.quote_name(DEFAULT_PARTITION)
+    low, high = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # CREATE TABLE ... PARTITION OF и так берёт эту блокировку; взятая до проверки DEFAULT,
+        # она не даёт вставить туда строку этого месяца между проверкой и созданием секции
+        cursor.execute(f"LOCK TABLE {ORDER_TABLE} IN ACCESS EXCLUSIVE MODE")
+        moved = False
+        if has_default:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)",
+                           [low, high])
+            moved = cursor.fetchone()[0]
+        if moved:
+            # Секцию нельзя создать, пока строки её месяца лежат в DEFAULT: DEFAULT на это время отсоединяется,
+            # а строки переносятся в новую секцию через родительскую таблицу
+            cursor.execute(f"ALTER TABLE {ORDER_TABLE} DETACH PARTITION {default}")
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {ORDER_TABLE} FOR VALUES FROM ('{low}') TO ('{high}')")
+        if moved:
+            cursor.execute(
+                f"INSERT INTO {ORDER_TABLE} SELECT * FROM {default} WHERE created_at >= %s AND created_at < %s",
+                [low, high],
+            )
+            cursor.execute(f"DELETE FROM {default} WHERE created_at >= %s AND created_at < %s", [low, high])
+            cursor.execute(f"ALTER TABLE {ORDER_TABLE} ATTACH PARTITION {default} DEFAULT")
+
+
+def create_partitions(connection: BaseDatabaseWrapper, first: date, last: date) -> List[str]:
+    """
+    Создаёт недостающие секции с месяца first по месяц last включительно, перенося в них строки
+    этих месяцев из DEFAULT-секции. Возвращает имена созданных.
+    """
+    existing = set(partitions(connection))
+    has_default = _has_default_partition(connection)
+    created = []
+    month = _month_start(first)
+    while month <= last:
+        if month not in existing:
+            _create_partition(connection, month, has_default)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def ensure_partitions(connection: BaseDatabaseWrapper, ahead: Optional[int] = None,
+                      today: Optional[date] = None) -> List[str]:
+    """
+    Создаёт секции текущего месяца и ahead (по умолчанию ORDER_PARTITIONS_AHEAD) следующих,
+    а также DEFAULT-секцию, если её нет (таблицы, секционированные до её появления).
+    """
+    if ahead is None:
+        ahead = settings.ORDER_PARTITIONS_AHEAD
+    if not _has_default_partition(connection):
+        _create_default_partition(connection)
+    current = _month_start(today or localdate())
+    return create_partitions(connection, current, add_months(current, ahead))
+
+
+def detach_partitions(connection: BaseDatabaseWrapper, before: date) -> List[str]:
+    """
+    Отсоединяет секции месяцев раньше before. Таблицы остаются в базе под теми же именами
+    (их можно выгрузить в архив и удалить), а заказы из них пропадают из core_order —
+    поэтому их ответы в кэше, список заказов, выручка и снимок активных заказов сбрасываются.
+    """
+    # Без CONCURRENTLY: с DEFAULT-секцией PostgreSQL его не разрешает
+    detached = []
+    with connection.cursor() as cursor:
+        for month in partitions(connection):
+            if month >= _month_start(before):
+                break
+            name = connection.ops.quote_name(partition_name(month))
+            cursor.execute(f"ALTER TABLE {ORDER_TABLE} DETACH PARTITION {name}")
+            # Как archive_orders: версии в кэше сбрасываются по id заказов, пропавших из таблицы
+            cursor.execute(f"SELECT id FROM {name}")
+            while ids := [row[0] for row in cursor.fetchmany(DETACH_INVALIDATE_BATCH)]:
+                invalidate_orders(ids)
+            detached.append(partition_name(month))
+    if detached:
+        invalidate_revenue()
+        active_orders.clear()
+    return detached
+
+
+def convert_orders_table(connection: BaseDatabaseWrapper, ahead: Optional[int] = None) -> List[str]:
+    """
+    Переводит обычную таблицу core_order на помесячные секции. Выполняется в одной транзакции
+    под ACCESS EXCLUSIVE блокировкой: запись в заказы на это время останавливается, а строки копируются
+    в секции целиком, поэтому на большой таблице переход стоит делать в окно обслуживания.
+    Возвращает имена созданных секций.
+    """
+    _check_vendor(connection)
+    if is_partitioned(connection):
+        raise PartitioningError(f"Таблица {ORDER_TABLE} уже секционирована")
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {ORDER_TABLE} IN ACCESS EXCLUSIVE MODE")
+        # Отложенные проверки внешних ключей (DEFERRABLE INITIALLY DEFERRED) выполняются сейчас:
+        # с ожидающими проверками PostgreSQL не даст удалить ограничение core_orderitem
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        # Индексы создаются заново на новой таблице теми же определениями (ON ... core_order),
+        # поэтому их определения читаются до переименования
+        cursor.execute(
+            "SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid), pg_index.indisprimary "
+            "FROM pg_index JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+            "WHERE pg_index.indrelid = to_regclass(%s)",
+            [ORDER_TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [ORDER_TABLE],
+        )
+        for table, constraint in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {quote(constraint)}")
+        cursor.execute(
+            f"SELECT pg_get_serial_sequence(%s, 'id'), MIN(created_at), MAX(created_at) FROM {ORDER_TABLE}",
+            [ORDER_TABLE],
+        )
+        sequence, first_created, last_created = cursor.fetchone()
+
+        # Имена индексов и последовательности освобождаются для новой таблицы
+        cursor.execute(f"ALTER TABLE {ORDER_TABLE} RENAME TO {UNPARTITIONED_TABLE}")
+        for name, _, _ in indexes:
+            cursor.execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(name + '_old')}")
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} RENAME TO {UNPARTITIONED_TABLE}_id_seq")
+
+        cursor.execute(
+            f"CREATE TABLE {ORDER_TABLE} (LIKE {UNPARTITIONED_TABLE} INCLUDING ALL EXCLUDING INDEXES, "
+            f"PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+        )
+        # Секции на всю историю заказов и на ahead месяцев вперёд от текущего
+        current = _month_start(localdate())
+        first = _month_start(localdate(first_created)) if first_created else current
+        last = add_months(current, settings.ORDER_PARTITIONS_AHEAD if ahead is None else ahead)
+        if last_created:
+            last = max(last, _month_start(localdate(last_created)))
+        _create_default_partition(connection)
+        created = create_partitions(connection, first, last)
+
+        cursor.execute(f"INSERT INTO {ORDER_TABLE} SELECT * FROM {UNPARTITIONED_TABLE}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {ORDER_TABLE}",
+            [ORDER_TABLE],
+        )
+        # Индексы строятся после загрузки строк — так быстрее, чем поддерживать их при вставке
+        for _, definition, primary in indexes:
+            if not primary:
+                cursor.execute(definition)
+        cursor.execute(f"DROP TABLE {UNPARTITIONED_TABLE}")
+        cursor.execute(f"ANALYZE {ORDER_TABLE}")
+    return created
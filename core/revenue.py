@@ -0,0 +1,200 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils.timezone import get_current_timezone, localdate
+
+from core.archive import archived_revenue, has_archived_orders, iter_archived_orders
+from core.cache import acached_value, arevenue_key, cached_value, invalidate_revenue, revenue_key
+from core.models import DailyRevenue, Dish, Order, OrderItem, parse_order_item
+from core.partitioning import first_partition
+
+REBUILD_BATCH_SIZE = 1000
+
+# Сортировка отчёта по блюдам
+DISH_ORDERINGS = {
+    'revenue': ('-revenue', '-quantity_sold'),
+    'quantity': ('-quantity_sold', '-revenue'),
+}
+
+# Функции группировки DailyRevenue.date для временных рядов выручки (день — без группировки)
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _revenue_summary_query(today: date) -> Tuple[QuerySet, Dict[str, Sum]]:
+    week_start = today - timedelta(days=7)
+    month_start = today.replace(day=1) - timedelta(days=today.day)
+
+    queryset = DailyRevenue.objects.filter(date__gte=min(week_start, month_start), date__lte=today)
+    aggregates = {
+        'today_revenue': Sum('total', filter=Q(date=today)),
+        'last_week_revenue': Sum('total', filter=Q(date__gte=week_start, date__lt=today)),
+        'last_month_revenue': Sum('total', filter=Q(date__gte=month_start, date__lt=today)),
+    }
+    return queryset, aggregates
+
+
+def revenue_summary(today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Выручка за сегодня, за последнюю неделю и за последний месяц одним запросом:
+    три условных SUM(...) FILTER (WHERE ...) по строкам DailyRevenue.
+    Неделя и месяц считаются до сегодняшнего дня, не включая его.
+    """
+    queryset, aggregates = _revenue_summary_query(today or localdate())
+    totals = queryset.aggregate(**aggregates)
+    return {key: value or 0 for key, value in totals.items()}
+
+
+async def arevenue_summary(today: Optional[date] = None) -> Dict[str, Any]:
+    """Асинхронный вариант revenue_summary() (aaggregate)."""
+    queryset, aggregates = _revenue_summary_query(today or localdate())
+    totals = await queryset.aaggregate(**aggregates)
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def cached_revenue_summary() -> Dict[str, Any]:
+    """revenue_summary() за сегодня из кэша; сбрасывается при каждом изменении DailyRevenue."""
+    today = localdate()
+    return cached_value('revenue', revenue_key(today.isoformat()), lambda: revenue_summary(today))
+
+
+async def acached_revenue_summary() -> Dict[str, Any]:
+    """Асинхронный вариант cached_revenue_summary()."""
+    today = localdate()
+    return await acached_value('revenue', await arevenue_key(today.isoformat()), lambda: arevenue_summary(today))
+
+
+def revenue_series(date_from: date, date_to: date, granularity: str = 'day') -> List[Dict[str, Any]]:
+    """
+    Выручка и число оплаченных заказов по периодам (день/неделя/месяц) в диапазоне [date_from, date_to].
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    trunc = GRANULARITIES[granularity]
+    period = trunc('date') if trunc else F('date')
+    rows = (
+        DailyRevenue.objects.filter(date__gte=date_from, date__lte=date_to)
+        .annotate(period=period)
+        .values('period')
+        .annotate(revenue=Sum('total'), orders_count=Sum('orders_count'))
+        .order_by('period')
+    )
+    return [
+        {'period': row['period'], 'revenue': row['revenue'] or Decimal('0'), 'orders_count': row['orders_count']}
+        for row in rows
+    ]
+
+
+def dish_sales(date_from: date, date_to: date, limit: int = 10, order_by: str = 'revenue') -> List[Dict[str, Any]]:
+    """
+    Топ блюд по оплаченным заказам, созданным в диапазоне [date_from, date_to]:
+    проданное количество и выручка по каждому блюду.
+    Группировка и сортировка выполняются в БД по OrderItem, в Python приходит только limit строк.
+    """
+    if order_by not in DISH_ORDERINGS:
+        raise ValueError(f"Unknown ordering: {order_by}")
+
+    tz = get_current_timezone()
+    rows = (
+        OrderItem.objects.filter(
+            order__status=Order.Status.PAID,
+            order__created_at__gte=datetime.combine(date_from, time.min, tzinfo=tz),
+            order__created_at__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz),
+        )
+        .values('dish_id', 'dish__name')
+        .annotate(
+            quantity_sold=Sum('quantity'),
+            revenue=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+    )
+    if has_archived_orders(date_from, date_to):
+        return _dish_sales_with_archive(rows, date_from, date_to, limit, order_by)
+    return [
+        {'dish_id': row['dish_id'], 'name': row['dish__name'] or '', 'quantity': row['quantity_sold'], 'revenue': row['revenue']}
+        for row in rows.order_by(*DISH_ORDERINGS[order_by], 'dish_id')[:limit]
+    ]
+
+
+def _dish_sales_with_archive(rows: QuerySet, date_from: date, date_to: date, limit: int,
+                             order_by: str) -> List[Dict[str, Any]]:
+    # Диапазон задевает архивные месяцы: у архивных заказов нет строк OrderItem, их блюда разбираются
+    # из items так же, как OrderItem.objects.replace_for(), и складываются с группировкой из БД.
+    # Блюд в меню немного, поэтому сортировка и limit — в Python
+    sales = {
+        row['dish_id']: {'dish_id': row['dish_id'], 'name': row['dish__name'] or '',
+                         'quantity': row['quantity_sold'], 'revenue': row['revenue']}
+        for row in rows.order_by()
+    }
+    archived_items = [
+        parse_order_item(item)
+        for order in iter_archived_orders(date_from, date_to)
+        for item in (order['items'] if isinstance(order['items'], list) else [])
+        if isinstance(item, dict)
+    ]
+    dish_ids = dict(Dish.objects.filter(name__in={name for name, _, _ in archived_items}).values_list('name', 'id'))
+    for name, price, quantity in archived_items:
+        dish_id = dish_ids.get(name)
+        row = sales.setdefault(
+            dish_id, {'dish_id': dish_id, 'name': name if dish_id else '', 'quantity': 0, 'revenue': Decimal('0.00')},
+        )
+        row['quantity'] += quantity
+        row['revenue'] += price * quantity
+    first, second = ('revenue', 'quantity') if order_by == 'revenue' else ('quantity', 'revenue')
+    # Как ORDER BY в PostgreSQL: по убыванию, при равенстве — по dish_id, позиции без блюда последними
+    return sorted(
+        sales.values(),
+        key=lambda row: (-row[first], -row[second], row['dish_id'] is None, row['dish_id'] or 0),
+    )[:limit]
+
+
+def rebuild_daily_revenue() -> int:
+    """
+    Пересобирает DailyRevenue с нуля одним GROUP BY по оплаченным заказам.
+    Месяцы, секции которых отсоединены (core.partitioning), не пересобираются: их заказов в core_order
+    уже нет, и строки DailyRevenue за них остаются как есть. Возвращает число созданных строк.
+    """
+    rows = (
+        Order.objects.filter(status=Order.Status.PAID)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'table_number')
+        .annotate(total=Sum('total_price'), orders_count=Count('id'))
+        .order_by()
+    )
+    stale = DailyRevenue.objects.all()
+    retained_from = first_partition(connection)
+    if retained_from is not None:
+        rows = rows.filter(day__gte=retained_from)
+        stale = stale.filter(date__gte=retained_from)
+    # Оплаченные заказы, перенесённые в архив (core.archive), тоже входят в выручку
+    archived = archived_revenue(iter_archived_orders(date_from=retained_from))
+    created = 0
+    with transaction.atomic():
+        stale.delete()
+        batch = []
+        for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            archived_total, archived_count = archived.pop((row['day'], row['table_number']), (0, 0))
+            batch.append(DailyRevenue(
+                date=row['day'],
+                table_number=row['table_number'],
+                total=row['total'] + archived_total,
+                orders_count=row['orders_count'] + archived_count,
+            ))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                created += len(DailyRevenue.objects.bulk_create(batch))
+                batch = []
+        for (day, table_number), (total, orders_count) in archived.items():
+            batch.append(DailyRevenue(date=day, table_number=table_number, total=total, orders_count=orders_count))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                created += len(DailyRevenue.objects.bulk_create(batch))
+                batch = []
+        created += len(DailyRevenue.objects.bulk_create(batch))
+        invalidate_revenue()
+    return created
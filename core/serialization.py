@@ -0,0 +1,100 @@
+"""
+Сериализация JSON для ответов API и Order.items: orjson, если установлен, иначе стандартный json.
+Бэкенд выбирается настройкой JSON_SERIALIZER: 'auto' (по умолчанию), 'orjson' или 'json'.
+
+Значения кодируются так же, как DjangoJSONEncoder: Decimal — строкой, datetime — ISO 8601
+с миллисекундами и 'Z' для UTC. Отличается только форма: orjson пишет без пробелов и не экранирует
+не-ASCII символы — для клиентов это тот же JSON.
+"""
+import json
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+# datetime/date/time передаются в default, чтобы формат совпадал с DjangoJSONEncoder
+# (orjson пишет микросекунды, Django — миллисекунды)
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+_django_default = DjangoJSONEncoder().default
+
+
+@lru_cache(maxsize=None)
+def use_orjson() -> bool:
+    # Кэшируется: настройки читаются на каждом вызове dumps/loads, а это заметно на мелких значениях items
+    backend = getattr(settings, 'JSON_SERIALIZER', 'auto')
+    if backend == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_SERIALIZER = 'orjson', но пакет orjson не установлен")
+    return orjson is not None and backend != 'json'
+
+
+@receiver(setting_changed)
+def _reset_backend(setting: str, **kwargs: Any) -> None:
+    if setting == 'JSON_SERIALIZER':
+        use_orjson.cache_clear()
+
+
+def dumps(value: Any, sort_keys: bool = False, ensure_ascii: bool = True) -> bytes:
+    """JSON в UTF-8. ensure_ascii влияет только на запасной вариант через json (orjson всегда пишет UTF-8)."""
+    if use_orjson():
+        try:
+            return orjson.dumps(
+                value, default=_django_default,
+                option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            # Числа за пределами 64 бит, ключи словаря не-строки и т.п. — как раньше, через json
+            pass
+    return json.dumps(value, cls=DjangoJSONEncoder, sort_keys=sort_keys, ensure_ascii=ensure_ascii).encode()
+
+
+def loads(data: str | bytes) -> Any:
+    if use_orjson():
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OrderJSONEncoder(DjangoJSONEncoder):
+    """
+    Кодировщик для JSONField: Django вызывает json.dumps(value, cls=encoder),
+    а json.dumps — encoder(...).encode(value), поэтому orjson подключается через encode().
+    """
+
+    def encode(self, o: Any) -> str:
+        if use_orjson() and not self.indent:
+            return dumps(o, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii).decode()
+        return super().encode(o)
+
+
+class OrderJSONDecoder(json.JSONDecoder):
+    """Декодировщик для JSONField: json.loads(value, cls=decoder) вызывает decoder(...).decode(value)."""
+
+    def decode(self, s: str, *args: Any) -> Any:
+        if use_orjson():
+            return orjson.loads(s)
+        return super().decode(s, *args)
+
+
+class JsonResponse(DjangoJsonResponse):
+    """
+    django.http.JsonResponse с сериализацией через dumps(). С нестандартным encoder
+    или json_dumps_params работает как исходный класс.
+    """
+
+    def __init__(self, data: Any, encoder: type = DjangoJSONEncoder, safe: bool = True,
+                 json_dumps_params: dict | None = None, **kwargs: Any) -> None:
+        if encoder is not DjangoJSONEncoder or json_dumps_params:
+            super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        HttpResponse.__init__(self, content=dumps(data), **kwargs)
@@ -0,0 +1,96 @@
+// Доска активных заказов: раз в poll-interval секунд перечитывает order_active_api и перерисовывает колонки.
+// Браузер сам отправляет If-None-Match, и пока заказы не менялись, сервер отвечает 304 без тела.
+const board = document.getElementById('order-board');
+const pollInterval = Number(board.dataset.pollInterval) * 1000;
+const ordersPerColumn = Number(board.dataset.ordersPerColumn);
+let lastEtag = null;
+
+function statusUrl(orderId) {
+    // В шаблоне адрес построен для заказа 0
+    return board.dataset.statusUrl.replace(/\/0\/$/, `/${orderId}/`);
+}
+
+function formatTime(value) {
+    return new Date(value).toLocaleTimeString('ru-RU', {hour: '2-digit', minute: '2-digit'});
+}
+
+function renderOrder(order, column) {
+    const card = document.createElement('div');
+    card.className = 'card mb-3';
+    const body = document.createElement('div');
+    body.className = 'card-body';
+
+    const title = document.createElement('h5');
+    title.className = 'card-title';
+    title.textContent = `Стол ${order.table_number} `;
+    const details = document.createElement('small');
+    details.className = 'text-muted';
+    details.textContent = `№${order.id}, ${formatTime(order.created_at)}`;
+    title.appendChild(details);
+
+    const items = document.createElement('ul');
+    items.className = 'mb-2';
+    (Array.isArray(order.items) ? order.items : []).forEach(item => {
+        const line = document.createElement('li');
+        line.textContent = `${item.name || item.item || ''} × ${item.quantity || 1}`;
+        items.appendChild(line);
+    });
+
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'btn btn-sm btn-success';
+    button.dataset.orderId = order.id;
+    button.dataset.version = order.version;
+    button.textContent = column.dataset.nextLabel;
+
+    body.append(title, items, button);
+    card.appendChild(body);
+    return card;
+}
+
+function render(orders) {
+    board.querySelectorAll('[data-status]').forEach(column => {
+        const columnOrders = orders.filter(order => order.status === column.dataset.status);
+        // Как и на сервере: в колонке самые старые заказы, в счётчике — все
+        column.replaceChildren(...columnOrders.slice(0, ordersPerColumn).map(order => renderOrder(order, column)));
+        if (!columnOrders.length) {
+            const empty = document.createElement('p');
+            empty.className = 'text-muted';
+            empty.textContent = 'Нет заказов';
+            column.appendChild(empty);
+        }
+        column.parentElement.querySelector('[data-count]').textContent = columnOrders.length;
+    });
+}
+
+async function refresh() {
+    try {
+        const response = await fetch(board.dataset.activeUrl, {cache: 'no-cache'});
+        const etag = response.headers.get('ETag');
+        if (response.ok && etag !== lastEtag) {
+            lastEtag = etag;
+            render((await response.json()).orders);
+        }
+    } catch (error) {
+        // Сеть недоступна — попробуем на следующем опросе
+    }
+}
+
+board.addEventListener('click', async event => {
+    const button = event.target.closest('[data-order-id]');
+    if (!button) {
+        return;
+    }
+    button.disabled = true;
+    const column = button.closest('[data-status]');
+    // С версией: если заказ уже изменили с другого экрана, сервер ответит 409, и доска просто обновится
+    await fetch(statusUrl(button.dataset.orderId), {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({status: column.dataset.nextStatus, version: Number(button.dataset.version)}),
+    });
+    await refresh();
+});
+
+refresh();
+setInterval(refresh, pollInterval);
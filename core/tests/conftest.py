@@ -0,0 +1,33 @@
+import pytest
+from django.core.cache import cache
+from core.active_orders import snapshot as active_orders
+from core.cache import stats
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """
+    Фикстура очищает кэш ответов и снимок активных заказов перед каждым тестом,
+    чтобы закэшированные ответы одного теста не попадали в другой.
+    """
+    cache.clear()
+    stats.reset()
+    active_orders.clear()
+
+
+@pytest.fixture(autouse=True)
+def static_storage(settings) -> None:
+    """
+    Фикстура отключает манифест статических файлов: в тестах collectstatic не запускается,
+    а {% static %} с CompressedManifestStaticFilesStorage требует собранный манифест.
+    """
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
+
+@pytest.fixture(autouse=True)
+def order_archive(settings, tmp_path) -> None:
+    """Фикстура направляет архив заказов (core.archive) во временный каталог теста."""
+    settings.ORDER_ARCHIVE_DIR = tmp_path / 'archive'
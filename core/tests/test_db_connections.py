@@ -0,0 +1,32 @@
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from core.models import Order
+
+
+def simulate_request() -> None:
+    """Сигналы начала и конца запроса: на них Django закрывает устаревшие и неисправные подключения."""
+    request_started.send(sender=None)
+    Order.objects.exists()
+    request_finished.send(sender=None)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_persistent_connection_is_reused() -> None:
+    """
+    Тест постоянных подключений:
+    1. Между запросами используется одно и то же подключение к PostgreSQL (CONN_MAX_AGE > 0).
+    2. Если подключение оборвалось, проверка (CONN_HEALTH_CHECKS) заменяет его, и запрос не падает.
+    """
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        pytest.skip("с DB_POOL=1 подключения держит пул psycopg, а не Django")
+    assert connection.settings_dict['CONN_MAX_AGE'] > 0
+    simulate_request()
+    raw = connection.connection
+
+    simulate_request()
+    assert connection.connection is raw
+
+    raw.close()
+    simulate_request()
+    assert connection.connection is not raw
@@ -0,0 +1,74 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Tuple, List, Dict, Any
+
+import pytest
+from django.urls import reverse
+from django.test import Client
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """Фикстура, предоставляющая клиент и очищенную БД."""
+    return client, db
+
+
+def create_order(day: date, status: str, items: List[Dict[str, Any]]) -> Order:
+    """Создаёт заказ с заданной датой создания."""
+    order = Order.objects.create(table_number=1, status=status, items=items)
+    order.created_at = datetime.combine(day, time(12), tzinfo=timezone.utc)
+    order.save()
+    return order
+
+
+@pytest.fixture
+def create_orders(db) -> None:
+    """Фикстура с оплаченными и неоплаченными заказами за март и апрель."""
+    create_order(date(2025, 3, 1), Order.Status.PAID, [
+        {"name": "Пицца", "price": 10, "quantity": 2},
+        {"name": "Чай", "price": 2, "quantity": 5},
+    ])
+    create_order(date(2025, 3, 10), Order.Status.PAID, [
+        {"name": "Пицца", "price": 12, "quantity": 1},
+        {"name": "Салат", "price": 7, "quantity": 1},
+    ])
+    create_order(date(2025, 3, 10), Order.Status.READY, [{"name": "Салат", "price": 7, "quantity": 10}])
+    create_order(date(2025, 4, 1), Order.Status.PAID, [{"name": "Чай", "price": 2, "quantity": 100}])
+
+
+@pytest.mark.django_db
+def test_dish_analytics_api_by_revenue(client_and_db: Tuple[Client, None], create_orders: None) -> None:
+    """
+    Тест проверяет отчёт по блюдам:
+    1. Учитываются только оплаченные заказы в диапазоне дат (to включительно).
+    2. Количество и выручка суммируются по блюду, сортировка по выручке.
+    """
+    client, db = client_and_db
+    response = client.get(reverse('core:dish_analytics_api'), {"from": "2025-03-01", "to": "2025-03-31"})
+
+    assert response.status_code == 200
+    dishes = [(row["name"], row["quantity"], Decimal(row["revenue"])) for row in response.json()["dishes"]]
+    assert dishes == [("Пицца", 3, Decimal("32")), ("Чай", 5, Decimal("10")), ("Салат", 1, Decimal("7"))]
+
+
+@pytest.mark.django_db
+def test_dish_analytics_api_top_by_quantity(client_and_db: Tuple[Client, None], create_orders: None) -> None:
+    """Тест сортировки по количеству и ограничения limit."""
+    client, db = client_and_db
+    response = client.get(reverse('core:dish_analytics_api'), {
+        "from": "2025-03-01", "to": "2025-04-01", "order_by": "quantity", "limit": 1,
+    })
+
+    assert [(row["name"], row["quantity"]) for row in response.json()["dishes"]] == [("Чай", 105)]
+
+
+@pytest.mark.django_db
+def test_dish_analytics_api_invalid_params(client_and_db: Tuple[Client, None]) -> None:
+    """Тест некорректных параметров отчёта."""
+    client, db = client_and_db
+    url: str = reverse('core:dish_analytics_api')
+
+    assert client.get(url, {"order_by": "name"}).status_code == 400
+    assert client.get(url, {"limit": "0"}).status_code == 400
+    assert client.get(url, {"from": "2025-04-01", "to": "2025-03-01"}).status_code == 400
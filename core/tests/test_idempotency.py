@@ -0,0 +1,136 @@
+import json
+from datetime import timedelta
+from typing import Tuple
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from core.idempotency import _request_hash
+from core.models import IdempotencyKey, Order
+
+ORDER = {"table_number": 5, "items": [{"name": "Пицца", "price": 10, "quantity": 1}], "total_price": 10}
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+def create_order(client: Client, key: str, data: dict = ORDER):
+    return client.post(reverse('core:order_create_api'), data=json.dumps(data),
+                       content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+@pytest.mark.django_db
+def test_idempotent_create_replay(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест повторной отправки заказа с тем же Idempotency-Key:
+    1. Заказ создаётся один раз, повтор получает тот же ответ с заголовком Idempotent-Replayed.
+    2. Повтор не обращается к таблице заказов.
+    3. Другой ключ создаёт новый заказ.
+    """
+    client, db = client_and_db
+    first = create_order(client, 'pos-1-0001')
+    assert first.status_code == 201
+
+    with CaptureQueriesContext(connection) as queries:
+        replay = create_order(client, 'pos-1-0001')
+    assert replay.status_code == 201
+    assert replay.content == first.content
+    assert replay['Idempotent-Replayed'] == 'true'
+    assert not any('core_order' in query['sql'] for query in queries.captured_queries)
+    assert Order.objects.count() == 1
+
+    assert create_order(client, 'pos-1-0002').status_code == 201
+    assert Order.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_idempotent_status_update(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что повтор смены статуса с версией возвращает исходный успех, а не конфликт версий."""
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1, items=ORDER["items"], total_price=10)
+    url = reverse('core:update_order_status_api', args=[order.id])
+    body = json.dumps({"status": "ready", "version": order.version})
+
+    first = client.post(url, data=body, content_type='application/json', HTTP_IDEMPOTENCY_KEY='status-1')
+    replay = client.post(url, data=body, content_type='application/json', HTTP_IDEMPOTENCY_KEY='status-1')
+
+    assert first.status_code == replay.status_code == 200
+    assert replay['Idempotent-Replayed'] == 'true'
+    order.refresh_from_db()
+    assert order.version == 2
+
+
+@pytest.mark.django_db
+def test_idempotency_key_errors(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест ошибок Idempotency-Key:
+    1. Тот же ключ с другим телом — 422, заказ не создаётся.
+    2. Запрос с ключом, который ещё выполняется, — 409 с Retry-After.
+    3. Слишком длинный ключ — 400.
+    """
+    client, db = client_and_db
+    create_order(client, 'pos-1-0001')
+    assert create_order(client, 'pos-1-0001', {**ORDER, "table_number": 6}).status_code == 422
+    assert Order.objects.count() == 1
+
+    request = RequestFactory().post(reverse('core:order_create_api'), data=json.dumps(ORDER),
+                                    content_type='application/json')
+    IdempotencyKey.objects.claim('order_create_api', 'in-flight', _request_hash(request))
+    response = create_order(client, 'in-flight')
+    assert response.status_code == 409
+    assert response['Retry-After'] == '1'
+
+    assert create_order(client, 'x' * 256).status_code == 400
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_idempotency_abandoned_claim(client_and_db: Tuple[Client, None], settings) -> None:
+    """
+    Тест брошенного ключа (воркер погиб между занятием ключа и сохранением ответа):
+    1. Повтор после IDEMPOTENCY_LEASE забирает ключ и выполняет запрос.
+    2. Следующий повтор получает сохранённый ответ.
+    """
+    settings.IDEMPOTENCY_LEASE = 30
+    client, db = client_and_db
+    request = RequestFactory().post(reverse('core:order_create_api'), data=json.dumps(ORDER),
+                                    content_type='application/json')
+    IdempotencyKey.objects.claim('order_create_api', 'crashed', _request_hash(request))
+    IdempotencyKey.objects.update(created_at=now() - timedelta(minutes=1))
+
+    response = create_order(client, 'crashed')
+    assert response.status_code == 201
+    assert create_order(client, 'crashed')['Idempotent-Replayed'] == 'true'
+    assert Order.objects.count() == 1
+    assert IdempotencyKey.objects.get(key='crashed').status_code == 201
+
+
+@pytest.mark.django_db
+def test_idempotency_key_eviction(client_and_db: Tuple[Client, None], settings) -> None:
+    """
+    Тест удаления просроченных ключей:
+    1. Просроченный ключ считается свободным: запрос с ним выполняется заново.
+    2. Команда evict_idempotency_keys удаляет просроченные ключи и оставляет свежие.
+    """
+    settings.IDEMPOTENCY_KEY_TTL = 60
+    client, db = client_and_db
+    create_order(client, 'old')
+    IdempotencyKey.objects.update(created_at=now() - timedelta(minutes=5))
+    response = create_order(client, 'old')
+    assert 'Idempotent-Replayed' not in response
+    assert Order.objects.count() == 2
+
+    create_order(client, 'stale')
+    IdempotencyKey.objects.filter(key='stale').update(created_at=now() - timedelta(minutes=5))
+    call_command('evict_idempotency_keys', verbosity=0)
+    assert list(IdempotencyKey.objects.values_list('key', flat=True)) == ['old']
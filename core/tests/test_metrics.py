@@ -0,0 +1,103 @@
+import logging
+import time
+from typing import Tuple
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import resolve, reverse
+from django.test import AsyncClient, Client, RequestFactory
+from core.metrics import metrics
+from core.middleware import RequestMetricsMiddleware
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    metrics.reset()
+    return client, db
+
+
+def metric_lines(client: Client, prefix: str) -> list:
+    response = client.get(reverse('core:metrics'))
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    return [line for line in response.content.decode().splitlines() if line.startswith(prefix)]
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест /metrics:
+    1. Запросы считаются по имени маршрута, методу и статусу, а не по пути с id.
+    2. В гистограмме числа SQL-запросов учтены оба запроса детального просмотра заказа.
+    3. Размер ответа попадает в гистограмму размеров.
+    """
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1)
+    client.get(reverse('core:order_detail_api', args=[order.id]))
+    client.get(reverse('core:order_detail_api', args=[order.id + 1]))
+
+    assert metric_lines(client, 'http_requests_total{view="core:order_detail_api"') == [
+        'http_requests_total{view="core:order_detail_api",method="GET",status="200"} 1',
+        'http_requests_total{view="core:order_detail_api",method="GET",status="404"} 1',
+    ]
+    assert 'http_request_db_queries_bucket{view="core:order_detail_api",method="GET",le="1"} 0' in \
+        metric_lines(client, 'http_request_db_queries_bucket')
+    assert 'http_request_db_queries_sum{view="core:order_detail_api",method="GET"} 4.0' in \
+        metric_lines(client, 'http_request_db_queries_sum')
+    assert metric_lines(client, 'http_response_size_bytes_count{view="core:order_detail_api"') == [
+        'http_response_size_bytes_count{view="core:order_detail_api",method="GET"} 2',
+    ]
+
+
+@pytest.mark.django_db
+def test_metrics_count_queries_of_async_views(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что учитываются SQL-запросы асинхронных представлений (ORM в потоках sync_to_async)."""
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1)
+
+    async_to_sync(AsyncClient().delete)(reverse('core:order_delete_api', args=[order.id]))
+
+    [line] = metric_lines(client, 'http_request_db_queries_sum{view="core:order_delete_api"')
+    assert int(float(line.rsplit(' ', 1)[1])) > 0
+
+
+@pytest.mark.django_db
+def test_request_over_budget_logs_sql(client_and_db: Tuple[Client, None], settings, caplog) -> None:
+    """Тест проверяет, что запрос сверх бюджета SQL-запросов пишет предупреждение с текстом SQL."""
+    settings.METRICS_QUERY_BUDGET = 1
+    order = Order.objects.create(table_number=1)
+
+    with caplog.at_level(logging.WARNING, logger='core.metrics'):
+        Client().get(reverse('core:order_detail_api', args=[order.id]))
+
+    [record] = caplog.records
+    assert "core:order_detail_api" in record.getMessage()
+    assert "SELECT" in record.getMessage()
+
+
+def test_metrics_middleware_overhead() -> None:
+    """
+    Тест бюджета накладных расходов: middleware вокруг представления, которое сразу возвращает ответ,
+    добавляет не больше METRICS_OVERHEAD_BUDGET_US микросекунд на запрос.
+    """
+    request = RequestFactory().get('/api-v1/orders/1/')
+    request.resolver_match = resolve('/api-v1/orders/1/')
+    response = HttpResponse(b"{}")
+    middleware = RequestMetricsMiddleware(lambda request: response)
+    repeat = 5000
+
+    for _ in range(100):
+        middleware(request)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        middleware(request)
+    overhead_us = (time.perf_counter() - started) / repeat * 1_000_000
+
+    metrics.reset()
+    assert overhead_us < settings.METRICS_OVERHEAD_BUDGET_US
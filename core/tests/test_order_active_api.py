@@ -0,0 +1,86 @@
+import json
+from typing import Tuple
+
+import pytest
+from django.urls import reverse
+from django.test import Client
+from core.models import Order
+
+ITEMS = [{"name": "Борщ", "price": 5, "quantity": 2}]
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+def active_ids(client: Client) -> list:
+    response = client.get(reverse('core:order_active_api'))
+    assert response.status_code == 200
+    return [order["id"] for order in json.loads(response.content)["orders"]]
+
+
+@pytest.mark.django_db
+def test_order_active_api(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест списка активных заказов:
+    1. Возвращаются только заказы в ожидании и готовые, старые первыми, оплаченные — нет.
+    2. У заказа есть блюда, сумма и версия для смены статуса.
+    """
+    client, db = client_and_db
+    pending = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    ready = Order.objects.create(table_number=2, status=Order.Status.READY, items=ITEMS, total_price=10)
+    Order.objects.create(table_number=3, status=Order.Status.PAID, items=ITEMS, total_price=10)
+
+    response = client.get(reverse('core:order_active_api'))
+
+    orders = json.loads(response.content)["orders"]
+    assert [order["id"] for order in orders] == [pending.id, ready.id]
+    assert orders[0]["items"] == ITEMS
+    assert orders[0]["total_price"] == "10.00"
+    assert orders[0]["version"] == 1
+
+
+@pytest.mark.django_db
+def test_order_active_api_snapshot(client_and_db: Tuple[Client, None], django_assert_num_queries) -> None:
+    """
+    Тест снимка активных заказов в памяти процесса:
+    1. Повторный запрос без изменений в заказах не обращается к БД.
+    2. После смены статуса через API снимок перестраивается: оплаченный заказ пропадает с доски.
+    3. Новый заказ сразу виден и на web-доске.
+    """
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1, status=Order.Status.READY, items=ITEMS, total_price=10)
+    assert active_ids(client) == [order.id]
+
+    with django_assert_num_queries(0):
+        assert active_ids(client) == [order.id]
+
+    client.post(reverse('core:update_order_status_api', args=[order.id]),
+                data=json.dumps({"status": "paid"}), content_type='application/json')
+    assert active_ids(client) == []
+
+    new_order = Order.objects.create(table_number=7, items=ITEMS, total_price=10)
+    response = client.get(reverse('core:order_board'))
+    assert [order["id"] for order in response.context['columns'][0]['orders']] == [new_order.id]
+
+
+@pytest.mark.django_db
+def test_order_active_api_not_modified(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что при совпадении ETag возвращается 304 без тела, а после изменения — новый ответ."""
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    etag = client.get(reverse('core:order_active_api'))['ETag']
+
+    response = client.get(reverse('core:order_active_api'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b""
+
+    Order.objects.change_status(order.id, Order.Status.READY)
+    response = client.get(reverse('core:order_active_api'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
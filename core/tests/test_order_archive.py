@@ -0,0 +1,124 @@
+import gzip
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from io import StringIO
+from typing import Tuple
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import localdate
+from core.archive import ARCHIVE_FIELDS, _append_block, get_archived_order, indexes
+from core.models import DailyRevenue, Order
+from core.partitioning import add_months
+from core.revenue import dish_sales, rebuild_daily_revenue
+
+ITEMS = [{"name": "Пицца", "price": 10, "quantity": 2}]
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+def create_order(day: date, status: str = Order.Status.PAID, table_number: int = 1) -> Order:
+    """Создаёт заказ с заданной датой создания."""
+    order = Order.objects.create(table_number=table_number, status=status, items=ITEMS, total_price=20)
+    order.created_at = datetime.combine(day, time(12), tzinfo=timezone.utc)
+    order.save()
+    return order
+
+
+def revenue(day: date) -> Decimal:
+    return sum(row.total for row in DailyRevenue.objects.filter(date=day))
+
+
+@pytest.mark.django_db
+def test_archive_orders(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест архивации оплаченных заказов командой archive_orders:
+    1. Старые оплаченные заказы удаляются из таблицы, неоплаченные и свежие остаются.
+    2. В архиве по файлу на месяц, каждый блок — отдельный gzip, индекс знает диапазоны id блоков.
+    3. order_detail_api находит архивный заказ, выручка за его день не меняется.
+    """
+    client, db = client_and_db
+    old_month = add_months(localdate().replace(day=1), -14)
+    old_day = old_month.replace(day=10)
+    archived = [create_order(old_day, table_number=number) for number in range(1, 6)]
+    pending = create_order(old_day, status=Order.Status.PENDING)
+    recent = create_order(localdate())
+    revenue_before = revenue(old_day)
+
+    out = StringIO()
+    call_command('archive_orders', '--batch-size', '2', stdout=out)
+
+    assert "перенесено заказов: 5" in out.getvalue()
+    assert set(Order.objects.values_list('id', flat=True)) == {pending.id, recent.id}
+    assert revenue(old_day) == revenue_before == Decimal("100.00")
+
+    data_path = settings.ORDER_ARCHIVE_DIR / f'orders-{old_month:%Y-%m}.ndjson.gz'
+    blocks = indexes.get(old_month)
+    assert [(block.first_id, block.last_id) for block in blocks] == [
+        (archived[0].id, archived[1].id), (archived[2].id, archived[3].id), (archived[4].id, archived[4].id),
+    ]
+    with gzip.open(data_path) as data_file:
+        assert [json.loads(line)["id"] for line in data_file] == [order.id for order in archived]
+
+    response = client.get(reverse('core:order_detail_api', args=[archived[3].id]))
+    assert response.status_code == 200
+    assert response.json()["archived"] is True
+    assert response.json()["table_number"] == 4
+    assert response.json()["items"] == ITEMS
+    assert client.get(reverse('core:order_detail_api', args=[recent.id + 100])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_archive_revenue_fallback(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест чтения выручки из архива:
+    1. Отчёт по блюдам за архивный месяц считает архивные заказы вместе с заказами из таблицы.
+    2. rebuild_daily_revenue не теряет выручку архивных заказов.
+    """
+    client, db = client_and_db
+    old_day = add_months(localdate().replace(day=1), -14).replace(day=10)
+    create_order(old_day)
+    call_command('archive_orders', stdout=StringIO())
+    create_order(old_day)
+
+    sales = dish_sales(old_day, old_day)
+    assert [(row["name"], row["quantity"], row["revenue"]) for row in sales] == [("Пицца", 4, Decimal("40.00"))]
+
+    rebuild_daily_revenue()
+    assert revenue(old_day) == Decimal("40.00")
+    assert get_archived_order(Order.objects.get().id) is None
+
+
+@pytest.mark.django_db
+def test_archive_interrupted_batch(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест сбоя между записью блока и удалением строк: заказ остался и в таблице, и в архиве.
+    1. Отчёт по блюдам и rebuild_daily_revenue считают его один раз.
+    2. После повторной архивации (вторая копия в архиве) — тоже один раз.
+    """
+    client, db = client_and_db
+    old_month = add_months(localdate().replace(day=1), -14)
+    old_day = old_month.replace(day=10)
+    order = create_order(old_day)
+    _append_block(old_month, list(Order.objects.filter(pk=order.pk).values(*ARCHIVE_FIELDS)))
+
+    assert [row["quantity"] for row in dish_sales(old_day, old_day)] == [2]
+    rebuild_daily_revenue()
+    assert revenue(old_day) == Decimal("20.00")
+
+    call_command('archive_orders', stdout=StringIO())
+    assert len(indexes.get(old_month)) == 2
+    assert [row["quantity"] for row in dish_sales(old_day, old_day)] == [2]
+    rebuild_daily_revenue()
+    assert revenue(old_day) == Decimal("20.00")
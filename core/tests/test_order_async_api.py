@@ -0,0 +1,50 @@
+import json
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.test import AsyncClient, Client
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.mark.django_db
+def test_order_api_async_client(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест асинхронных эндпоинтов через AsyncClient (как под ASGI):
+    создание, получение, смена статуса, выручка и удаление заказа.
+    """
+    async def scenario():
+        client = AsyncClient()
+        created = await client.post(reverse('core:order_create_api'), content_type='application/json',
+                                    data=json.dumps({"table_number": 2, "status": "ready", "total_price": "7.50"}))
+        order_id = created.json()["id"]
+
+        detail = await client.get(reverse('core:order_detail_api', args=[order_id]))
+        status = await client.post(reverse('core:update_order_status_api', args=[order_id]),
+                                   content_type='application/json', data=json.dumps({"status": "paid"}))
+        revenue = await client.get(reverse('core:revenue_api'))
+        missing = await client.put(reverse('core:order_update_api', args=[order_id + 1]),
+                                   content_type='application/json', data=json.dumps({}))
+        deleted = await client.delete(reverse('core:order_delete_api', args=[order_id]))
+        return created, detail, status, revenue, missing, deleted
+
+    created, detail, status, revenue, missing, deleted = async_to_sync(scenario)()
+
+    assert created.status_code == 201
+    assert detail.json()["table_number"] == 2
+    assert status.status_code == 200
+    assert Decimal(revenue.json()["today_revenue"]) == Decimal("7.50")
+    assert missing.status_code == 404
+    assert deleted.status_code == 200
+    assert not Order.objects.exists()
@@ -0,0 +1,140 @@
+import json
+from decimal import Decimal
+from typing import Tuple, List, Dict, Any
+
+import pytest
+from django.urls import reverse
+from django.test import Client
+from core.models import DailyRevenue, Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def create_orders(db) -> List[Order]:
+    """Фикстура для создания нескольких заказов в базе данных."""
+    return [
+        Order.objects.create(table_number=1, status=Order.Status.PENDING, items=[{"name": "Суп", "price": 5, "quantity": 1}], total_price=5),
+        Order.objects.create(table_number=2, status=Order.Status.READY, total_price=Decimal("20.50")),
+        Order.objects.create(table_number=3, status=Order.Status.PAID, total_price=Decimal("8.99")),
+    ]
+
+
+def post_json(client: Client, url_name: str, data: Any, method: str = 'post'):
+    return getattr(client, method)(reverse(url_name), data=json.dumps(data), content_type='application/json')
+
+
+def paid_revenue() -> Decimal:
+    return sum((row.total for row in DailyRevenue.objects.all()), Decimal('0'))
+
+
+def test_order_bulk_create_api(client_and_db: Tuple[Client, None], django_assert_max_num_queries) -> None:
+    """
+    Тест пакетного создания заказов:
+    1. Корректные заказы создаются, по некорректным возвращается ошибка с индексом.
+    2. Пачка из 100 заказов пишется за несколько запросов, а не за 100.
+    3. Оплаченные заказы попадают в DailyRevenue.
+    4. Сумма заказа с блюдами считается по items, а не берётся у клиента.
+    """
+    client, db = client_and_db
+    orders: List[Dict[str, Any]] = [
+        {"table_number": index % 10 + 1, "items": [{"name": "Чай", "price": 2, "quantity": 1}], "total_price": 2}
+        for index in range(100)
+    ]
+    orders[10] = {"table_number": -1}
+    orders[20] = {"table_number": 5, "status": "cooking"}
+    orders[30] = {"table_number": 5, "status": "paid", "total_price": "12.50"}
+    orders[40] = {"table_number": 5, "items": [{"name": "Чай", "price": 2, "quantity": 3}], "total_price": 1}
+
+    with django_assert_max_num_queries(10):
+        response = post_json(client, 'core:order_bulk_create_api', {"orders": orders})
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 98
+    assert Order.objects.count() == 98
+    assert "table_number" in data["results"][10]["error"]
+    assert "status" in data["results"][20]["error"]
+    assert Order.objects.get(pk=data["results"][30]["id"]).status == Order.Status.PAID
+    assert paid_revenue() == Decimal("12.50")
+    assert Order.objects.get(pk=data["results"][40]["id"]).total_price == Decimal("6")
+
+
+def test_order_bulk_create_api_invalid_body(client_and_db: Tuple[Client, None]) -> None:
+    """Тест некорректного тела запроса и неподдерживаемого метода."""
+    client, db = client_and_db
+
+    assert post_json(client, 'core:order_bulk_create_api', {"orders": {}}).status_code == 400
+    assert client.get(reverse('core:order_bulk_create_api')).status_code == 405
+
+
+def test_order_bulk_update_api(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """
+    Тест пакетного обновления заказов:
+    1. total_price пересчитывается по items, как в order_update_api.
+    2. Несуществующий, повторяющийся и нецелый id (в том числе список или объект) возвращают ошибку,
+       остальные заказы обновляются.
+    3. Смена статуса на «Оплачено» отражается в DailyRevenue.
+    """
+    client, db = client_and_db
+    changes = [
+        {"id": create_orders[0].id, "table_number": 7, "items": [{"name": "Суп", "price": 5, "quantity": 3}]},
+        {"id": create_orders[1].id, "status": "paid", "items": [{"name": "Стейк", "price": 30, "quantity": 1}]},
+        {"id": 999999},
+        {"id": create_orders[0].id, "table_number": 8},
+        {"id": [create_orders[1].id]},
+        {"id": {"pk": create_orders[1].id}},
+    ]
+
+    response = post_json(client, 'core:order_bulk_update_api', {"orders": changes}, method='put')
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["results"][2]["error"] == "Order not found"
+    assert data["results"][3]["error"] == "Duplicate order id in batch"
+    assert data["results"][4]["error"] == data["results"][5]["error"] == "id должен быть целым числом"
+
+    create_orders[0].refresh_from_db()
+    assert create_orders[0].table_number == 7
+    assert create_orders[0].total_price == Decimal("15")
+    create_orders[1].refresh_from_db()
+    assert create_orders[1].status == Order.Status.PAID
+    assert paid_revenue() == Decimal("8.99") + Decimal("30")
+
+
+def test_order_bulk_update_status_api(client_and_db: Tuple[Client, None], create_orders: List[Order],
+                                      django_assert_max_num_queries) -> None:
+    """
+    Тест пакетной смены статусов:
+    1. Статусы меняются, некорректный статус и недопустимый переход (из «Оплачено» назад) возвращают ошибку.
+    2. Оплата заказа отражается в DailyRevenue.
+    """
+    client, db = client_and_db
+    changes = [
+        {"id": create_orders[0].id, "status": "ready"},
+        {"id": create_orders[1].id, "status": "paid"},
+        {"id": create_orders[2].id, "status": "pending"},
+        {"id": create_orders[0].id, "status": "paid"},
+        {"id": create_orders[1].id, "status": "cooking"},
+    ]
+
+    with django_assert_max_num_queries(10):
+        response = post_json(client, 'core:order_bulk_update_status_api', {"changes": changes})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["results"][2] == {"index": 2, "error": "Invalid status transition", "status": "paid"}
+    assert data["results"][3]["error"] == "Duplicate order id in batch"
+    assert data["results"][4]["error"] == "Duplicate order id in batch"
+
+    assert [Order.objects.get(pk=order.pk).status for order in create_orders] == ["ready", "paid", "paid"]
+    assert paid_revenue() == Decimal("8.99") + Decimal("20.50")
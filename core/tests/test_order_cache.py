@@ -0,0 +1,111 @@
+import json
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from django.urls import reverse
+from django.test import Client
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def test_order(db) -> Order:
+    """
+    Фикстура для создания тестового заказа.
+    """
+    return Order.objects.create(table_number=1, items=[{"name": "Pizza", "price": 10, "quantity": 1}], total_price=10)
+
+
+@pytest.mark.django_db
+def test_order_detail_api_cached_until_update(client_and_db: Tuple[Client, None], test_order: Order,
+                                              django_assert_num_queries) -> None:
+    """
+    Тест кэша деталей заказа:
+    1. Повторный GET отдаётся из кэша без запросов к БД.
+    2. После обновления заказа через API GET возвращает новые данные.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_detail_api', args=[test_order.id])
+
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.json() == first.json()
+
+    client.put(
+        reverse('core:order_update_api', args=[test_order.id]),
+        content_type='application/json',
+        data=json.dumps({"table_number": 9}),
+    )
+    assert client.get(url).json()["table_number"] == 9
+
+
+@pytest.mark.django_db
+def test_order_detail_api_not_found_not_cached(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что ответ 404 не кэшируется и созданный позже заказ виден сразу."""
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1)
+    url: str = reverse('core:order_detail_api', args=[order.id + 1])
+
+    assert client.get(url).status_code == 404
+    Order.objects.create(table_number=2)
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_order_list_api_cache_invalidated_by_writes(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест кэша списка заказов: создание, смена статуса (в том числе пакетная) и удаление
+    сбрасывают закэшированный список для всех фильтров.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    assert len(client.get(url).json()["orders"]) == 1
+    assert len(client.get(url, {"status": "ready"}).json()["orders"]) == 0
+
+    client.post(reverse('core:order_create_api'), content_type='application/json',
+                data=json.dumps({"table_number": 2}))
+    assert len(client.get(url).json()["orders"]) == 2
+
+    client.post(reverse('core:order_bulk_update_status_api'), content_type='application/json',
+                data=json.dumps({"changes": [{"id": test_order.id, "status": "ready"}]}))
+    assert len(client.get(url, {"status": "ready"}).json()["orders"]) == 1
+
+    client.delete(reverse('core:order_delete_api', args=[test_order.id]))
+    assert len(client.get(url).json()["orders"]) == 1
+
+
+@pytest.mark.django_db
+def test_revenue_cache_invalidated_by_payment(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """Тест проверяет, что закэшированная выручка сбрасывается при оплате заказа."""
+    client, db = client_and_db
+    url: str = reverse('core:revenue_api')
+
+    assert client.get(url).json()["today_revenue"] == 0
+
+    for status in ("ready", "paid"):
+        client.post(reverse('core:update_order_status_api', args=[test_order.id]),
+                    content_type='application/json', data=json.dumps({"status": status}))
+    assert Decimal(client.get(url).json()["today_revenue"]) == Decimal("10")
+
+
+@pytest.mark.django_db
+def test_cache_stats_api(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """Тест счётчиков попаданий и промахов кэша."""
+    client, db = client_and_db
+    url: str = reverse('core:order_detail_api', args=[test_order.id])
+    for _ in range(4):
+        client.get(url)
+
+    stats = client.get(reverse('core:cache_stats_api')).json()["endpoints"]
+    assert stats["order_detail"] == {"hits": 3, "misses": 1, "hit_ratio": 0.75}
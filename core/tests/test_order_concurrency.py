@@ -0,0 +1,176 @@
+import json
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.test import Client
+from core.models import ConcurrentUpdateError, Order
+
+ITEMS = [{"name": "Суп", "price": 5, "quantity": 2}]
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def test_order(db) -> Order:
+    """
+    Фикстура для создания тестового заказа.
+    """
+    return Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+
+
+def put_json(client: Client, url_name: str, pk: int, data: dict):
+    return client.put(reverse(url_name, args=[pk]), content_type='application/json', data=json.dumps(data))
+
+
+@pytest.mark.django_db
+def test_concurrent_save_raises_conflict(test_order: Order) -> None:
+    """
+    Тест compare-and-swap: из двух копий заказа, прочитанных одновременно,
+    сохраняется только первая, вторая получает ConcurrentUpdateError и не перезаписывает данные.
+    """
+    waiter = Order.objects.get(pk=test_order.pk)
+    kitchen = Order.objects.get(pk=test_order.pk)
+
+    waiter.table_number = 7
+    waiter.save()
+    assert waiter.version == 2
+
+    kitchen.status = Order.Status.READY
+    with pytest.raises(ConcurrentUpdateError):
+        kitchen.save()
+
+    test_order.refresh_from_db()
+    assert (test_order.table_number, test_order.status, test_order.version) == (7, Order.Status.PENDING, 2)
+
+
+@pytest.mark.django_db
+def test_order_update_api_version_conflict(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест order_update_api:
+    1. Устаревшая версия в теле запроса — 409 с текущей версией, заказ не меняется.
+    2. Актуальная версия — 200 и новая версия в ответе.
+    """
+    client, db = client_and_db
+
+    response = put_json(client, 'core:order_update_api', test_order.pk, {"table_number": 2, "version": 5})
+    assert response.status_code == 409
+    assert response.json()["version"] == 1
+
+    response = put_json(client, 'core:order_update_api', test_order.pk, {"table_number": 2, "version": 1})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    test_order.refresh_from_db()
+    assert test_order.table_number == 2
+
+
+@pytest.mark.django_db
+def test_order_detail_api_put_checks_total(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест PUT order_detail_api: total_price заказа с блюдами должен совпадать с суммой items,
+    а версия в ответе увеличивается после каждого изменения.
+    """
+    client, db = client_and_db
+
+    response = put_json(client, 'core:order_detail_api', test_order.pk, {"total_price": "99.00"})
+    assert response.status_code == 400
+    assert Decimal(response.json()["total_price"]) == Decimal("10")
+
+    response = put_json(client, 'core:order_detail_api', test_order.pk, {"total_price": "10.00", "table_number": 3})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    response = put_json(client, 'core:order_detail_api', test_order.pk, {"table_number": 4, "version": 1})
+    assert response.status_code == 409
+
+
+@pytest.mark.django_db
+def test_update_order_status_api_version(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест смены статуса: без версии статус меняется сразу (быстрый путь),
+    с устаревшей версией — 409, каждая смена увеличивает версию.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:update_order_status_api', args=[test_order.pk])
+
+    assert client.post(url, json.dumps({"status": "ready"}), content_type='application/json').status_code == 200
+    response = client.post(url, json.dumps({"status": "paid", "version": 1}), content_type='application/json')
+    assert response.status_code == 409
+    assert response.json()["version"] == 2
+    assert client.post(url, json.dumps({"status": "paid", "version": 2}), content_type='application/json').status_code == 200
+
+    test_order.refresh_from_db()
+    assert (test_order.status, test_order.version) == (Order.Status.PAID, 3)
+
+
+@pytest.mark.django_db
+def test_order_edit_view_version_conflict(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест формы редактирования: если заказ изменили после открытия формы,
+    изменения не сохраняются, а форма показывается заново с предупреждением и статусом 409.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_edit', args=[test_order.pk])
+    assert 'name="version" value="1"' in client.get(url).content.decode()
+
+    Order.objects.change_status(test_order.pk, Order.Status.READY)
+    response = client.post(url, {"table_number": 9, "status": "pending", "version": 1})
+
+    assert response.status_code == 409
+    assert 'name="version" value="2"' in response.content.decode()
+    test_order.refresh_from_db()
+    assert (test_order.table_number, test_order.status) == (1, Order.Status.READY)
+
+
+@pytest.mark.django_db
+def test_order_bulk_update_api_version_conflict(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """Тест пакетного обновления: элемент с устаревшей версией возвращает ошибку и не применяется."""
+    client, db = client_and_db
+
+    response = client.put(reverse('core:order_bulk_update_api'), content_type='application/json',
+                          data=json.dumps({"orders": [{"id": test_order.pk, "table_number": 5, "version": 3}]}))
+
+    assert response.json()["results"][0] == {"index": 0, "error": "Version conflict", "version": 1}
+    test_order.refresh_from_db()
+    assert test_order.table_number == 1
+
+
+@pytest.mark.django_db
+def test_create_with_explicit_pk(db) -> None:
+    """
+    Тест проверяет, что новый заказ с явным id сохраняется (UPDATE без строк, затем INSERT),
+    а не получает конфликт версий.
+    """
+    order = Order(id=12345, table_number=1, items=ITEMS, total_price=10)
+    order.save()
+
+    stored = Order.objects.get(pk=12345)
+    assert (stored.table_number, stored.version) == (1, 1)
+    assert stored.order_items.count() == 1
+
+
+@pytest.mark.django_db
+def test_loaddata_orders(db, tmp_path) -> None:
+    """Тест проверяет, что loaddata создаёт заказы из фикстуры и повторная загрузка перезаписывает их."""
+    fixture = tmp_path / 'orders.json'
+    fixture.write_text(json.dumps([{
+        "model": "core.order", "pk": 777,
+        "fields": {"table_number": 4, "status": "pending", "items": ITEMS, "total_price": "10.00",
+                   "created_at": "2025-03-01T12:00:00Z", "updated_at": "2025-03-01T12:00:00Z", "version": 3},
+    }]))
+
+    call_command('loaddata', str(fixture), verbosity=0)
+    Order.objects.filter(pk=777).update(table_number=5)
+    call_command('loaddata', str(fixture), verbosity=0)
+
+    order = Order.objects.get(pk=777)
+    assert (order.table_number, order.version) == (4, 3)
@@ -0,0 +1,102 @@
+import json
+from typing import Tuple
+
+import pytest
+from django.urls import reverse
+from django.test import Client
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def test_order(db) -> Order:
+    """
+    Фикстура для создания тестового заказа.
+    """
+    return Order.objects.create(table_number=1, items=[{"name": "Pizza", "price": 10, "quantity": 1}], total_price=10)
+
+
+@pytest.mark.django_db
+def test_order_detail_api_not_modified(client_and_db: Tuple[Client, None], test_order: Order,
+                                       django_assert_num_queries) -> None:
+    """
+    Тест условного GET деталей заказа:
+    1. Ответ содержит ETag и Last-Modified.
+    2. Повторный запрос с If-None-Match получает 304 без запросов к БД.
+    3. После обновления заказа ETag меняется и старый ETag получает 200.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_detail_api', args=[test_order.id])
+
+    response = client.get(url)
+    etag = response['ETag']
+    assert response.status_code == 200
+    assert 'Last-Modified' in response
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+
+    client.put(
+        reverse('core:order_update_api', args=[test_order.id]),
+        content_type='application/json',
+        data=json.dumps({"table_number": 9}),
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert response.json()["table_number"] == 9
+
+
+@pytest.mark.django_db
+def test_order_detail_api_if_modified_since(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """Тест проверяет, что If-Modified-Since с текущим Last-Modified получает 304."""
+    client, db = client_and_db
+    url: str = reverse('core:order_detail_api', args=[test_order.id])
+
+    last_modified = client.get(url)['Last-Modified']
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+@pytest.mark.django_db
+def test_order_list_api_etag_changes_on_writes(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест условного GET списка заказов: пока заказы не менялись, список отвечает 304,
+    а пакетная смена статуса и удаление меняют ETag.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    client.post(reverse('core:order_bulk_update_status_api'), content_type='application/json',
+                data=json.dumps({"changes": [{"id": test_order.id, "status": "ready"}]}))
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["orders"][0]["status"] == "ready"
+
+    etag = response['ETag']
+    client.delete(reverse('core:order_delete_api', args=[test_order.id]))
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["orders"] == []
+
+
+@pytest.mark.django_db
+def test_order_list_api_etag_depends_on_filters(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """Тест проверяет, что ETag одного фильтра не подходит к другому."""
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    etag = client.get(url, {"table_number": 1})['ETag']
+    assert client.get(url, {"table_number": 2}, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -15,6 +15,7 @@ def client_and_db(client: Client, db) -> Tuple[Client, None]:
     return client, db
 
 
+@pytest.mark.django_db
 def test_order_create_api(client_and_db: Tuple[Client, None]) -> None:
     """
     Тест проверяет создание заказа через API:
@@ -46,3 +47,25 @@ def test_order_create_api(client_and_db: Tuple[Client, None]) -> None:
     assert order.status == Order.Status.PENDING
     assert order.items == data["items"]
     assert order.total_price == Decimal(str(data["total_price"]))
+
+
+@pytest.mark.django_db
+def test_order_create_api_total_from_items(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест проверяет, что сумма заказа с блюдами считается по items, а не берётся у клиента,
+    и что такой заказ можно изменить через PUT без total_price.
+    """
+    client, db = client_and_db
+    items = [{"name": "Суп", "price": "4.50", "quantity": 2}, {"name": "Хлеб", "price": 1}]
+    response = client.post(reverse('core:order_create_api'), content_type='application/json',
+                           data=json.dumps({"table_number": 3, "items": items}))
+
+    assert response.status_code == 201
+    order: Order = Order.objects.get(pk=response.json()["id"])
+    assert order.total_price == Decimal("10.00")
+
+    url: str = reverse('core:order_detail_api', args=[order.id])
+    assert client.put(url, content_type='application/json', data=json.dumps({"status": "ready"})).status_code == 200
+    assert client.put(url, content_type='application/json', data=json.dumps({"table_number": 7})).status_code == 200
+    order.refresh_from_db()
+    assert (order.status, order.table_number, order.total_price) == (Order.Status.READY, 7, Decimal("10.00"))
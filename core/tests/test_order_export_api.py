@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Tuple, List, Dict, Any
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.test import AsyncClient, Client
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """Фикстура, предоставляющая клиент и очищенную БД."""
+    return client, db
+
+
+@pytest.fixture
+def create_orders(db) -> List[Order]:
+    """Фикстура для создания заказов с разными датами создания."""
+    orders = [
+        Order.objects.create(table_number=1, status="pending", items=[{"name": "Суп", "price": 5, "quantity": 2}], total_price=10),
+        Order.objects.create(table_number=2, status="paid", items=[], total_price=Decimal("20.50")),
+        Order.objects.create(table_number=1, status="paid", items=[], total_price=Decimal("8.99")),
+    ]
+    for day, order in zip([1, 2, 3], orders):
+        order.created_at = datetime(2025, 3, day, 12, 0, tzinfo=timezone.utc)
+        order.save()
+    return orders
+
+
+def read_ndjson(response) -> List[Dict[str, Any]]:
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.django_db
+def test_order_export_api_ndjson(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """
+    Тест выгрузки заказов в NDJSON:
+    1. Ответ потоковый, с нужным Content-Type.
+    2. Каждая строка — один заказ, в порядке создания.
+    3. Поля items и total_price сериализованы корректно.
+    """
+    client, db = client_and_db
+    response = client.get(reverse('core:order_export_api'))
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    rows = read_ndjson(response)
+    assert [row["id"] for row in rows] == [order.id for order in create_orders]
+    assert rows[0]["items"] == [{"name": "Суп", "price": 5, "quantity": 2}]
+    assert rows[1]["total_price"] == "20.50"
+
+
+@pytest.mark.django_db
+def test_order_export_api_csv(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """Тест выгрузки заказов в CSV: заголовок и по строке на заказ."""
+    client, db = client_and_db
+    response = client.get(reverse('core:order_export_api'), {"format": "csv"})
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert len(rows) == 3
+    assert rows[0]["id"] == str(create_orders[0].id)
+    assert json.loads(rows[0]["items"]) == create_orders[0].items
+    assert rows[2]["total_price"] == "8.99"
+
+
+@pytest.mark.django_db
+def test_order_export_api_filters(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """Тест фильтров выгрузки: номер стола, статус и диапазон дат создания (to включительно)."""
+    client, db = client_and_db
+    url: str = reverse('core:order_export_api')
+
+    rows = read_ndjson(client.get(url, {"table_number": 1, "status": "paid"}))
+    assert [row["id"] for row in rows] == [create_orders[2].id]
+
+    rows = read_ndjson(client.get(url, {"created_from": "2025-03-02", "created_to": "2025-03-02"}))
+    assert [row["id"] for row in rows] == [create_orders[1].id]
+
+    rows = read_ndjson(client.get(url, {"created_from": "2025-03-01T13:00:00"}))
+    assert [row["id"] for row in rows] == [create_orders[1].id, create_orders[2].id]
+
+
+@pytest.mark.django_db
+def test_order_export_api_invalid_params(client_and_db: Tuple[Client, None]) -> None:
+    """Тест некорректных параметров выгрузки."""
+    client, db = client_and_db
+    url: str = reverse('core:order_export_api')
+
+    assert client.get(url, {"format": "xml"}).status_code == 400
+    assert client.get(url, {"created_from": "вчера"}).status_code == 400
+    assert client.post(url).status_code == 405
+
+
+@pytest.mark.django_db(transaction=True)
+def test_order_export_api_asgi(create_orders: List[Order]) -> None:
+    """Тест проверяет, что под ASGI тело выгрузки асинхронное (читается по частям, а не целиком в память)."""
+    async def run():
+        response = await AsyncClient().get(reverse('core:order_export_api'), {"format": "csv"})
+        assert response.is_async
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    rows = list(csv.DictReader(io.StringIO(async_to_sync(run)().decode())))
+    assert [row["id"] for row in rows] == [str(order.id) for order in create_orders]
@@ -0,0 +1,81 @@
+import json
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from django.db.models import DecimalField, F, Sum
+from django.urls import reverse
+from django.test import Client
+from core.models import Dish, Order, OrderItem
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.mark.django_db
+def test_order_items_created_with_order(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест проверяет, что при создании заказа через API:
+    1. Для каждого блюда из items создаётся строка OrderItem.
+    2. Блюда попадают в каталог Dish (в том числе старый формат с ключом "item").
+    3. Сам items в ответе API не меняется.
+    """
+    client, db = client_and_db
+    items = [{"name": "Борщ", "price": 5.5, "quantity": 2}, {"item": "Хлеб", "price": 1}]
+
+    response = client.post(
+        reverse('core:order_create_api'),
+        content_type='application/json',
+        data=json.dumps({"table_number": 3, "items": items, "total_price": 12}),
+    )
+
+    order = Order.objects.get(pk=response.json()["id"])
+    assert order.items == items
+    lines = {(line.dish.name, line.price, line.quantity) for line in order.order_items.select_related('dish')}
+    assert lines == {("Борщ", Decimal("5.50"), 2), ("Хлеб", Decimal("1.00"), 1)}
+    assert set(Dish.objects.values_list('name', flat=True)) == {"Борщ", "Хлеб"}
+
+
+@pytest.mark.django_db
+def test_order_items_replaced_on_update(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест проверяет, что order_update_api пересоздаёт строки заказа
+    и что total_price совпадает с суммой по строкам OrderItem.
+    """
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1, items=[{"name": "Чай", "price": 2, "quantity": 1}])
+
+    client.put(
+        reverse('core:order_update_api', args=[order.id]),
+        content_type='application/json',
+        data=json.dumps({"items": [{"name": "Кофе", "price": "3.10", "quantity": 3}]}),
+    )
+
+    order.refresh_from_db()
+    assert order.total_price == Decimal("9.30")
+    assert list(order.order_items.values_list('dish__name', 'price', 'quantity')) == [("Кофе", Decimal("3.10"), 3)]
+    assert order.order_items.aggregate(
+        total=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+    )['total'] == order.total_price
+
+
+@pytest.mark.django_db
+def test_order_items_not_rewritten_without_items_change(django_assert_num_queries) -> None:
+    """
+    Тест проверяет, что смена статуса без изменения items не трогает таблицу OrderItem.
+    """
+    Order.objects.create(table_number=1, items=[{"name": "Чай", "price": 2, "quantity": 1}])
+    order = Order.objects.get()
+    line_ids = list(OrderItem.objects.values_list('id', flat=True))
+
+    order.status = Order.Status.READY
+    with django_assert_num_queries(3):  # SAVEPOINT, UPDATE core_order, RELEASE SAVEPOINT
+        order.save()
+
+    assert list(OrderItem.objects.values_list('id', flat=True)) == line_ids
@@ -78,3 +78,47 @@ def test_order_list_api_no_orders(client_and_db: Tuple[Client, None]) -> None:
     data = response.json()
 
     assert data["orders"] == []  # Должен вернуться пустой список
+
+
+@pytest.mark.django_db
+def test_order_list_api_cursor_pagination(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """
+    Тест постраничной выдачи по курсору:
+    1. Первая страница содержит limit заказов (сначала новые) и курсор следующей страницы.
+    2. Вторая страница содержит оставшиеся заказы и пустой курсор.
+    3. Заказы на страницах не повторяются.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    first_page = client.get(url, {"limit": 2}).json()
+    assert [order["id"] for order in first_page["orders"]] == [create_orders[2].id, create_orders[1].id]
+    assert first_page["next_cursor"]
+
+    second_page = client.get(url, {"limit": 2, "cursor": first_page["next_cursor"]}).json()
+    assert [order["id"] for order in second_page["orders"]] == [create_orders[0].id]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_order_list_api_cursor_pagination_with_filter(client_and_db: Tuple[Client, None], create_orders: List[Order]) -> None:
+    """Тест, что курсор работает вместе с фильтрами."""
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    first_page = client.get(url, {"table_number": 1, "limit": 1}).json()
+    second_page = client.get(url, {"table_number": 1, "limit": 1, "cursor": first_page["next_cursor"]}).json()
+
+    assert [order["id"] for order in first_page["orders"] + second_page["orders"]] == [create_orders[2].id, create_orders[0].id]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_order_list_api_invalid_pagination_params(client_and_db: Tuple[Client, None]) -> None:
+    """Тест некорректного курсора и лимита."""
+    client, db = client_and_db
+    url: str = reverse('core:order_list_api')
+
+    assert client.get(url, {"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get(url, {"limit": "0"}).status_code == 400
+    assert client.get(url, {"limit": "abc"}).status_code == 400
@@ -0,0 +1,104 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from typing import List
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from core.models import Order, OrderItem
+from core.revenue import rebuild_daily_revenue
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason="План запроса проверяется только на PostgreSQL"
+)
+
+SEED_ORDERS = 3000
+
+
+@pytest.fixture
+def seeded_orders(db) -> None:
+    """
+    Фикстура, которая наполняет таблицу заказами за последние 90 дней
+    (разные столы, статусы и блюда), пересобирает DailyRevenue и обновляет статистику планировщика.
+    """
+    rng = random.Random(42)
+    statuses = [Order.Status.PENDING, Order.Status.READY, Order.Status.PAID]
+    orders = Order.objects.bulk_create(
+        Order(
+            table_number=rng.randint(1, 40),
+            status=rng.choice(statuses),
+            items=[{"name": rng.choice(["Pizza", "Soup", "Tea"]), "price": 10, "quantity": 1}],
+            total_price=Decimal("10.00"),
+        )
+        for _ in range(SEED_ORDERS)
+    )
+    # created_at проставляется auto_now_add, поэтому разносим заказы по датам отдельным запросом
+    current = now()
+    for order in orders:
+        order.created_at = current - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+    Order.objects.bulk_update(orders, ['created_at'], batch_size=1000)
+    OrderItem.objects.replace_for(orders, created=True)
+    rebuild_daily_revenue()
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_order")
+        cursor.execute("ANALYZE core_dailyrevenue")
+        cursor.execute("ANALYZE core_orderitem")
+
+
+def explain_queries(client: Client, url: str, table: str) -> List[str]:
+    """
+    Выполняет запрос к view, перехватывает все SELECT по таблице table и возвращает их планы.
+    enable_seqscan выключен, чтобы на небольшой тестовой таблице планировщик выбирал
+    seq scan только тогда, когда подходящего индекса нет.
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+
+    plans = []
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and f'"{table}"' in sql:
+                    cursor.execute(f"EXPLAIN {sql}")
+                    plans.append("\n".join(row[0] for row in cursor.fetchall()))
+        finally:
+            cursor.execute("RESET enable_seqscan")
+    return plans
+
+
+@pytest.mark.parametrize("url_name, query, table", [
+    ('core:order_list_api', '', 'core_order'),
+    ('core:order_list_api', '?status=pending', 'core_order'),
+    ('core:order_list_api', '?table_number=7', 'core_order'),
+    ('core:order_list_api', '?table_number=7&status=paid', 'core_order'),
+    ('core:order_list', '', 'core_order'),
+    ('core:order_list', '?status=ready', 'core_order'),
+    ('core:order_list', '?table_number=3', 'core_order'),
+    ('core:order_active_api', '', 'core_order'),
+    ('core:order_board', '', 'core_order'),
+    ('core:revenue_api', '', 'core_dailyrevenue'),
+    ('core:revenue', '', 'core_dailyrevenue'),
+    ('core:dish_analytics_api', '', 'core_order'),
+    ('core:dish_analytics_api', '', 'core_orderitem'),
+])
+@pytest.mark.django_db
+def test_queries_use_indexes(client: Client, seeded_orders: None, url_name: str, query: str, table: str) -> None:
+    """
+    Тест проверяет, что запросы в горячих view идут по индексам:
+    1. Каждый view делает хотя бы один SELECT по своей таблице.
+    2. Ни в одном плане нет Seq Scan по этой таблице.
+    """
+    plans = explain_queries(client, reverse(url_name) + query, table)
+
+    assert plans
+    for plan in plans:
+        assert f"Seq Scan on {table}" not in plan, plan
+
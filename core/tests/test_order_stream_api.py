@@ -0,0 +1,114 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import reverse
+from django.test import AsyncClient, Client
+from core.events import EventBroker, get_broker
+from core.models import Order
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+def read_events(write, count: int) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+    """
+    Подключается к потоку событий, выполняет write (синхронно, в потоке теста)
+    и возвращает заголовки ответа и первые count событий.
+    """
+    async def run():
+        response = await AsyncClient().get(reverse('core:order_stream_api'))
+        stream = response.streaming_content
+        try:
+            assert (await anext(stream)).startswith(b"retry:")
+            await sync_to_async(write)()
+            events = []
+            while len(events) < count:
+                chunk = (await asyncio.wait_for(anext(stream), 2)).decode()
+                if chunk.startswith("data: "):
+                    events.append(json.loads(chunk[len("data: "):]))
+            return dict(response.items()), events
+        finally:
+            await stream.aclose()
+
+    return async_to_sync(run)()
+
+
+@pytest.mark.django_db
+def test_order_stream_api_events(client_and_db: Tuple[Client, None], django_capture_on_commit_callbacks) -> None:
+    """
+    Тест потока событий:
+    1. Ответ — text/event-stream без кэширования.
+    2. Создание, смена статуса, изменение и удаление заказа через API приходят событиями по порядку.
+    """
+    client, db = client_and_db
+
+    def write():
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('core:order_create_api'), content_type='application/json',
+                                   data=json.dumps({"table_number": 4}))
+            order_id = response.json()["id"]
+            client.post(reverse('core:update_order_status_api', args=[order_id]),
+                        content_type='application/json', data=json.dumps({"status": "ready"}))
+            client.put(reverse('core:order_detail_api', args=[order_id]),
+                       content_type='application/json', data=json.dumps({"table_number": 5}))
+            client.delete(reverse('core:order_delete_api', args=[order_id]))
+
+    headers, events = read_events(write, 4)
+
+    assert headers["Content-Type"] == "text/event-stream"
+    assert headers["Cache-Control"] == "no-cache"
+    assert [event["type"] for event in events] == ["created", "status", "updated", "deleted"]
+    assert events[1]["status"] == "ready"
+    assert events[2]["table_number"] == 5
+    assert len({event["id"] for event in events}) == 1
+    # После отключения клиента подписка удаляется из брокера
+    assert get_broker().subscribers_count() == 0
+
+
+@pytest.mark.django_db
+def test_order_stream_api_bulk_status(client_and_db: Tuple[Client, None], django_capture_on_commit_callbacks) -> None:
+    """Тест проверяет, что пакетная смена статуса отправляет событие по каждому заказу."""
+    client, db = client_and_db
+    orders = [Order.objects.create(table_number=number, status=Order.Status.READY) for number in (1, 2)]
+
+    def write():
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('core:order_bulk_update_status_api'), content_type='application/json',
+                        data=json.dumps({"changes": [{"id": order.id, "status": "paid"} for order in orders]}))
+
+    headers, events = read_events(write, 2)
+
+    assert {(event["type"], event["id"], event["status"]) for event in events} == {
+        ("status", order.id, "paid") for order in orders
+    }
+
+
+@pytest.mark.django_db
+def test_order_events_published_after_commit(django_capture_on_commit_callbacks) -> None:
+    """Тест проверяет, что событие не уходит подписчикам до коммита транзакции."""
+    broker = EventBroker('core.events.LocalBackend')
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        broker.publish("created", {"id": 1})
+
+    assert len(callbacks) == 1
+
+
+@pytest.mark.django_db
+def test_order_stream_api_wsgi(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что под WSGI поток не открывается (501) и не оставляет подписку в брокере."""
+    client, db = client_and_db
+    response = client.get(reverse('core:order_stream_api'))
+
+    assert response.status_code == 501
+    assert not response.streaming
+    assert get_broker().subscribers_count() == 0
@@ -0,0 +1,82 @@
+import re
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from core.cache import stats
+from core.models import Order
+from core.views.web_views import CSRF_PLACEHOLDER
+
+ITEMS = [{"name": "Борщ", "price": 5, "quantity": 2}]
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+def row_stats() -> Tuple[int, int]:
+    counts = stats.snapshot().get('order_row', {'hits': 0, 'misses': 0})
+    return counts['hits'], counts['misses']
+
+
+@pytest.mark.django_db
+def test_order_list_row_fragments(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест кэширования строк списка заказов по (id, version):
+    1. Повторный показ берёт все строки из кэша.
+    2. После смены статуса перерисовывается только изменённый заказ, и в нём выбран новый статус.
+    """
+    client, db = client_and_db
+    orders = [Order.objects.create(table_number=number, items=ITEMS, total_price=10) for number in range(1, 4)]
+
+    client.get(reverse('core:order_list'))
+    assert row_stats() == (0, 3)
+    client.get(reverse('core:order_list'))
+    assert row_stats() == (3, 3)
+
+    Order.objects.change_status(orders[0].id, Order.Status.READY)
+    response = client.get(reverse('core:order_list'))
+    assert row_stats() == (5, 4)
+    assert '<option value="ready" selected>' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_order_list_row_csrf(db) -> None:
+    """Тест проверяет, что в закэшированные строки подставляется CSRF-токен запроса и форма смены статуса работает."""
+    client = Client(enforce_csrf_checks=True)
+    order = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    client.get(reverse('core:order_list'))
+
+    content = client.get(reverse('core:order_list')).content.decode()
+    assert CSRF_PLACEHOLDER not in content
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', content)[1]
+
+    response = client.post(reverse('core:update_order_status', args=[order.id]),
+                           {'status': Order.Status.READY, 'csrfmiddlewaretoken': token})
+    assert response.status_code == 302
+    order.refresh_from_db()
+    assert order.status == Order.Status.READY
+
+
+@pytest.mark.django_db
+def test_revenue_page_cached(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест кэширования страницы выручки:
+    1. Повторный показ отдаётся из кэша.
+    2. После оплаты заказа страница показывает новую выручку.
+    """
+    client, db = client_and_db
+    client.get(reverse('core:revenue'))
+    client.get(reverse('core:revenue'))
+    assert stats.snapshot()['revenue_page'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    Order.objects.create(table_number=1, status=Order.Status.PAID, total_price=Decimal("25.50"))
+    response = client.get(reverse('core:revenue'))
+    assert "25.50 ₽" in response.content.decode()
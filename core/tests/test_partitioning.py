@@ -0,0 +1,167 @@
+from datetime import datetime, time
+from io import StringIO
+from typing import Tuple
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import localdate, make_aware
+from core.models import DailyRevenue, Order, OrderItem
+from core.partitioning import (
+    DEFAULT_PARTITION, add_months, convert_orders_table, create_partitions, detach_partitions, ensure_partitions,
+    is_partitioned, partition_name,
+)
+from core.revenue import rebuild_daily_revenue
+
+ITEMS = [{"name": "Борщ", "price": 5, "quantity": 2}]
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql', reason="Секционирование есть только в PostgreSQL")
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    DDL в PostgreSQL транзакционный, поэтому секционирование откатывается вместе с тестом.
+    """
+    return client, db
+
+
+def month_start(month) -> datetime:
+    return make_aware(datetime.combine(month, time.min))
+
+
+def skip_if_partitioned() -> None:
+    if is_partitioned(connection):
+        pytest.skip("core_order уже секционирована миграцией 0010 (ORDER_PARTITIONING=1)")
+
+
+def partition_orders_table(first, ahead: int = 1) -> None:
+    """
+    Переводит core_order на секции, а если это уже сделала миграция 0010 (ORDER_PARTITIONING=1),
+    создаёт секции с месяца first: заказы этих месяцев переносятся в них из DEFAULT-секции.
+    """
+    if is_partitioned(connection):
+        create_partitions(connection, first, add_months(localdate().replace(day=1), ahead))
+    else:
+        convert_orders_table(connection, ahead=ahead)
+
+
+@pytest.mark.django_db
+def test_convert_orders_table(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест перевода core_order на помесячные секции:
+    1. Заказы за прошлые месяцы и их позиции сохраняются, новые заказы получают следующий id.
+    2. Запрос с границей по created_at читает только секции нужных месяцев.
+    3. Отсоединённый месяц пропадает из заказов, остальные на месте.
+    """
+    skip_if_partitioned()
+    client, db = client_and_db
+    current = localdate().replace(day=1)
+    old_month = add_months(current, -3)
+    old = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    Order.objects.filter(pk=old.pk).update(created_at=month_start(old_month))
+    recent = Order.objects.create(table_number=2, items=ITEMS, total_price=10)
+
+    created = convert_orders_table(connection, ahead=1)
+
+    assert is_partitioned(connection)
+    assert created[0] == partition_name(old_month)
+    assert created[-1] == partition_name(add_months(current, 1))
+    assert set(Order.objects.values_list('id', flat=True)) == {old.id, recent.id}
+    assert OrderItem.objects.filter(order_id=old.id).exists()
+    response = client.post(reverse('core:order_create_api'), data={"table_number": 3, "items": ITEMS},
+                           content_type='application/json')
+    assert response.json()["id"] > recent.id
+
+    plan = Order.objects.filter(created_at__gte=month_start(current)).explain()
+    assert partition_name(current) in plan
+    assert partition_name(old_month) not in plan
+
+    assert detach_partitions(connection, add_months(old_month, 1)) == [partition_name(old_month)]
+    assert not Order.objects.filter(pk=old.pk).exists()
+    assert Order.objects.filter(pk=recent.pk).exists()
+
+
+@pytest.mark.django_db
+def test_partition_orders_command(client_and_db: Tuple[Client, None]) -> None:
+    """Тест команды partition_orders: без секционирования ничего не делает, после — создаёт секции впрок."""
+    client, db = client_and_db
+    if not is_partitioned(connection):
+        out = StringIO()
+        call_command('partition_orders', stdout=out)
+        assert "не секционирована" in out.getvalue()
+        call_command('partition_orders', '--convert', '--ahead', '1', stdout=StringIO())
+
+    ahead = max(settings.ORDER_PARTITIONS_AHEAD, 1) + 1
+    out = StringIO()
+    call_command('partition_orders', '--ahead', str(ahead), stdout=out)
+    assert partition_name(add_months(localdate().replace(day=1), ahead)) in out.getvalue()
+
+
+def partition_of(order: Order) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM core_order WHERE id = %s", [order.pk])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_default_partition(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест DEFAULT-секции:
+    1. Заказ за месяц без секции вставляется (в core_order_default), а не падает.
+    2. Создание секции этого месяца переносит заказ в неё.
+    """
+    client, db = client_and_db
+    current = localdate().replace(day=1)
+    partition_orders_table(current)
+    # Дальше, чем секции, которые миграция 0010 могла создать впрок
+    ahead = settings.ORDER_PARTITIONS_AHEAD + 2
+    future = add_months(current, ahead)
+    order = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    Order.objects.filter(pk=order.pk).update(created_at=month_start(future))
+    assert partition_of(order) == DEFAULT_PARTITION
+
+    assert partition_name(future) in ensure_partitions(connection, ahead=ahead)
+    assert partition_of(order) == partition_name(future)
+    assert Order.objects.filter(pk=order.pk).exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_keeps_detached_revenue(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что rebuild_daily_revenue не стирает выручку отсоединённых месяцев."""
+    client, db = client_and_db
+    current = localdate().replace(day=1)
+    old_month = add_months(current, -3)
+    old = Order.objects.create(table_number=1, status=Order.Status.PAID, items=ITEMS, total_price=10)
+    Order.objects.filter(pk=old.pk).update(created_at=month_start(old_month))
+    Order.objects.create(table_number=2, status=Order.Status.PAID, items=ITEMS, total_price=10)
+    rebuild_daily_revenue()
+    partition_orders_table(old_month)
+    detach_partitions(connection, add_months(old_month, 1))
+
+    rebuild_daily_revenue()
+
+    assert set(DailyRevenue.objects.values_list('date', 'table_number')) == {(old_month, 1), (localdate(), 2)}
+
+
+@pytest.mark.django_db
+def test_detach_invalidates_cache(client_and_db: Tuple[Client, None]) -> None:
+    """Тест проверяет, что после отсоединения секции закэшированные деталь и список не отдают её заказы."""
+    client, db = client_and_db
+    old_month = add_months(localdate().replace(day=1), -3)
+    old = Order.objects.create(table_number=1, items=ITEMS, total_price=10)
+    Order.objects.filter(pk=old.pk).update(created_at=month_start(old_month))
+    partition_orders_table(old_month)
+    detail_url = reverse('core:order_detail_api', args=[old.pk])
+    assert client.get(detail_url).status_code == 200
+    assert old.pk in [order["id"] for order in client.get(reverse('core:order_list_api')).json()["orders"]]
+
+    detach_partitions(connection, add_months(old_month, 1))
+
+    assert client.get(detail_url).status_code == 404
+    assert old.pk not in [order["id"] for order in client.get(reverse('core:order_list_api')).json()["orders"]]
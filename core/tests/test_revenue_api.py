@@ -0,0 +1,156 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Tuple
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from core.models import DailyRevenue, Order
+from core.revenue import revenue_summary
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def paid_order(db) -> Order:
+    """
+    Фикстура для создания оплаченного заказа.
+    """
+    return Order.objects.create(table_number=4, status=Order.Status.PAID, total_price=Decimal("25.50"))
+
+
+def create_paid_order(day: date, total_price: str, table_number: int = 1) -> Order:
+    """Создаёт оплаченный заказ с заданной датой создания."""
+    order = Order.objects.create(table_number=table_number, status=Order.Status.PAID, total_price=Decimal(total_price))
+    order.created_at = datetime.combine(day, time(12), tzinfo=timezone.utc)
+    order.save()
+    return order
+
+
+def today_revenue(client: Client) -> Decimal:
+    return Decimal(str(client.get(reverse('core:revenue_api')).json()["today_revenue"]))
+
+
+@pytest.mark.django_db
+def test_revenue_api_counts_paid_orders(client_and_db: Tuple[Client, None], paid_order: Order) -> None:
+    """
+    Тест проверяет, что выручка за сегодня учитывает только оплаченные заказы
+    и что для оплаченного заказа появилась строка DailyRevenue.
+    """
+    client, db = client_and_db
+    Order.objects.create(table_number=4, status=Order.Status.PENDING, total_price=Decimal("100.00"))
+
+    assert today_revenue(client) == Decimal("25.50")
+    rollup = DailyRevenue.objects.get(table_number=4)
+    assert rollup.total == Decimal("25.50")
+    assert rollup.orders_count == 1
+
+
+@pytest.mark.django_db
+def test_revenue_follows_status_and_total_changes(client_and_db: Tuple[Client, None], paid_order: Order) -> None:
+    """
+    Тест проверяет инкрементальное обновление DailyRevenue:
+    1. Изменение суммы оплаченного заказа меняет выручку.
+    2. Выход заказа из статуса «Оплачено» убирает его из выручки.
+    3. Повторная оплата и удаление заказа учитываются так же.
+    """
+    client, db = client_and_db
+
+    paid_order.total_price = Decimal("30.00")
+    paid_order.save()
+    assert today_revenue(client) == Decimal("30.00")
+
+    order = Order.objects.get(pk=paid_order.pk)
+    order.status = Order.Status.READY
+    order.save()
+    assert today_revenue(client) == 0
+
+    order.status = Order.Status.PAID
+    order.save()
+    assert today_revenue(client) == Decimal("30.00")
+
+    order.delete()
+    assert today_revenue(client) == 0
+    assert DailyRevenue.objects.get(table_number=4).orders_count == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_daily_revenue_command(client_and_db: Tuple[Client, None], paid_order: Order) -> None:
+    """
+    Тест проверяет, что команда rebuild_daily_revenue восстанавливает выручку
+    после того, как таблица DailyRevenue разошлась с заказами.
+    """
+    client, db = client_and_db
+    DailyRevenue.objects.all().delete()
+    assert today_revenue(client) == 0
+
+    call_command('rebuild_daily_revenue')
+
+    assert today_revenue(client) == Decimal("25.50")
+    assert DailyRevenue.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_revenue_summary_single_query(django_assert_num_queries, db) -> None:
+    """
+    Тест проверяет, что выручка за сегодня, неделю и месяц считается одним запросом
+    и что недельное и месячное окна не включают сегодняшний день.
+    """
+    today = date(2025, 3, 18)
+    create_paid_order(today, "25.50")
+    create_paid_order(date(2025, 3, 15), "10.00")
+    create_paid_order(date(2025, 2, 20), "4.00")
+
+    with django_assert_num_queries(1):
+        summary = revenue_summary(today)
+
+    assert summary == {
+        'today_revenue': Decimal("25.50"),
+        'last_week_revenue': Decimal("10.00"),
+        'last_month_revenue': Decimal("14.00"),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("granularity, expected", [
+    ("day", [("2025-03-03", "10.00", 1), ("2025-03-05", "5.00", 1), ("2025-03-18", "7.50", 2)]),
+    ("week", [("2025-03-03", "15.00", 2), ("2025-03-17", "7.50", 2)]),
+    ("month", [("2025-03-01", "22.50", 4)]),
+])
+def test_revenue_series_api(client_and_db: Tuple[Client, None], granularity: str, expected: list) -> None:
+    """
+    Тест проверяет временной ряд выручки по дням, неделям (с понедельника) и месяцам.
+    Заказы вне диапазона from/to не учитываются.
+    """
+    client, db = client_and_db
+    create_paid_order(date(2025, 3, 3), "10.00")
+    create_paid_order(date(2025, 3, 5), "5.00")
+    create_paid_order(date(2025, 3, 18), "5.00")
+    create_paid_order(date(2025, 3, 18), "2.50", table_number=2)
+    create_paid_order(date(2025, 4, 1), "100.00")
+
+    url: str = reverse('core:revenue_series_api')
+    response = client.get(url, {"from": "2025-03-01", "to": "2025-03-31", "granularity": granularity})
+
+    assert response.status_code == 200
+    series = response.json()["series"]
+    assert [(row["period"], row["revenue"], row["orders_count"]) for row in series] == expected
+
+
+@pytest.mark.django_db
+def test_revenue_series_api_invalid_params(client_and_db: Tuple[Client, None]) -> None:
+    """Тест некорректных параметров временного ряда."""
+    client, db = client_and_db
+    url: str = reverse('core:revenue_series_api')
+
+    assert client.get(url, {"granularity": "year"}).status_code == 400
+    assert client.get(url, {"from": "03.01.2025"}).status_code == 400
+    assert client.get(url, {"from": "2025-03-02", "to": "2025-03-01"}).status_code == 400
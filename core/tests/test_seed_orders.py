@@ -0,0 +1,29 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+from django.utils.timezone import now
+from core.models import DailyRevenue, Order, OrderItem, order_items_total
+
+
+@pytest.mark.django_db
+def test_seed_orders_command() -> None:
+    """
+    Тест команды seed_orders (заполнение базы для бенчмарков):
+    1. Создаётся заданное число заказов с блюдами, сумма совпадает с items, строки OrderItem созданы.
+    2. Заказы распределены по последним --days дням, DailyRevenue пересобрана по оплаченным.
+    3. --clear удаляет прежние заказы.
+    """
+    Order.objects.create(table_number=1, items=[{"name": "Чай", "price": 2, "quantity": 1}])
+
+    call_command('seed_orders', 120, days=3, clear=True, batch_size=50)
+
+    orders = list(Order.objects.all())
+    assert len(orders) == 120
+    assert all(order.items and order.total_price == order_items_total(order.items) for order in orders)
+    assert OrderItem.objects.count() == sum(len(order.items) for order in orders)
+    assert min(order.created_at for order in orders) > now() - timedelta(days=3)
+    paid = Order.objects.filter(status=Order.Status.PAID).aggregate(total=Sum('total_price'))['total']
+    assert DailyRevenue.objects.aggregate(total=Sum('total'))['total'] == (paid or Decimal('0'))
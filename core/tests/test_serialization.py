@@ -0,0 +1,58 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse as DjangoJsonResponse
+from core.models import Order
+from core.serialization import JsonResponse, dumps, loads, orjson
+
+PAYLOAD = {
+    "id": 1,
+    "status": Order.Status.PAID,
+    "total_price": Decimal("12.50"),
+    "created_at": datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "day": date(2025, 3, 1),
+    "items": [{"name": "Борщ", "price": Decimal("4.50"), "quantity": 2}],
+}
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson не установлен")
+def test_orjson_matches_django_encoder() -> None:
+    """
+    Тест проверяет, что через orjson значения кодируются так же, как DjangoJSONEncoder:
+    Decimal — строкой, datetime — с миллисекундами и 'Z', статус — значением.
+    """
+    expected = json.loads(json.dumps(PAYLOAD, cls=DjangoJSONEncoder))
+
+    assert json.loads(dumps(PAYLOAD)) == expected
+    assert expected["created_at"] == "2025-03-01T12:30:15.123Z"
+    assert expected["total_price"] == "12.50"
+
+
+def test_json_backend_is_unchanged(settings) -> None:
+    """Тест проверяет, что с JSON_SERIALIZER = 'json' ответ побайтно совпадает с django.http.JsonResponse."""
+    settings.JSON_SERIALIZER = 'json'
+
+    assert JsonResponse(PAYLOAD).content == DjangoJsonResponse(PAYLOAD).content
+    assert loads(b'{"a": 1}') == {"a": 1}
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson не установлен")
+def test_orjson_falls_back_to_json() -> None:
+    """Тест проверяет, что значения, которые orjson не кодирует (целые больше 64 бит), уходят в json."""
+    assert json.loads(dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    with pytest.raises(TypeError):
+        JsonResponse([1, 2])
+
+
+@pytest.mark.django_db
+def test_order_items_round_trip() -> None:
+    """Тест проверяет, что Order.items сохраняется и читается тем же сериализатором без потерь."""
+    order = Order.objects.create(table_number=1, items=PAYLOAD["items"])
+
+    order.refresh_from_db()
+
+    assert order.items == [{"name": "Борщ", "price": "4.50", "quantity": 2}]
+    assert not order._items_changed(None)
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client
+
+
+def test_static_files_are_compressed_and_cached(settings, tmp_path: Path) -> None:
+    """
+    Тест раздачи статических файлов через WhiteNoise после collectstatic:
+    1. {% static %} ссылается на файл с хэшем содержимого в имени.
+    2. Файл отдаётся сжатым gzip и с Cache-Control на год (immutable).
+    """
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+    }
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+    url = static('core/js/order_form.js')
+    response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+    assert url != '/static/core/js/order_form.js'
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Cache-Control'] == 'max-age=315360000, public, immutable'
@@ -3,7 +3,7 @@ from decimal import Decimal
 import pytest
 from django.urls import reverse
 from django.test import Client
-from core.models import Order
+from core.models import ConcurrentUpdateError, InvalidStatusTransition, Order
 from typing import Tuple, Dict, Any
 
 
@@ -34,7 +34,7 @@ def test_update_order_status_api_success(client_and_db: Tuple[Client, None], tes
     url: str = reverse('core:update_order_status_api', args=[order_to_update.id])
 
     # Данные для обновления статуса
-    new_status: Dict[str, str] = {'status': 'completed'}
+    new_status: Dict[str, str] = {'status': 'ready'}
 
     # Отправляем POST-запрос с новым статусом
     response = client.post(url, json.dumps(new_status), content_type='application/json')
@@ -44,7 +44,7 @@ def test_update_order_status_api_success(client_and_db: Tuple[Client, None], tes
 
     # Проверяем, что статус заказа обновился в базе данных
     order_to_update.refresh_from_db()
-    assert order_to_update.status == 'completed'
+    assert order_to_update.status == 'ready'
 
     # Проверяем содержимое ответа
     assert response.json() == {'message': 'Order status updated successfully'}
@@ -59,7 +59,7 @@ def test_update_order_status_api_not_found(client_and_db: Tuple[Client, None]) -
     url: str = reverse('core:update_order_status_api', args=[999])  # Используем несуществующий ID
 
     # Отправляем POST-запрос с новым статусом
-    new_status: Dict[str, str] = {'status': 'completed'}
+    new_status: Dict[str, str] = {'status': 'ready'}
     response = client.post(url, json.dumps(new_status), content_type='application/json')
 
     # Проверяем статус ответа
@@ -67,3 +67,74 @@ def test_update_order_status_api_not_found(client_and_db: Tuple[Client, None]) -
 
     # Проверяем содержимое ответа
     assert response.json() == {'error': 'Order not found'}
+
+
+@pytest.mark.django_db
+def test_update_order_status_api_transitions(client_and_db: Tuple[Client, None], test_order: Order) -> None:
+    """
+    Тест таблицы переходов pending → ready → paid:
+    1. Пропустить «Готово» и вернуть оплаченный заказ назад нельзя — 409 с текущим статусом, заказ не меняется.
+    2. Повторная установка текущего статуса ничего не меняет.
+    3. Неизвестный статус — 400.
+    """
+    client, db = client_and_db
+    url: str = reverse('core:update_order_status_api', args=[test_order.id])
+
+    def post(status: str):
+        return client.post(url, json.dumps({'status': status}), content_type='application/json')
+
+    response = post('paid')
+    assert response.status_code == 409
+    assert response.json() == {'error': 'Invalid status transition', 'status': 'pending', 'allowed': ['ready']}
+
+    assert post('ready').status_code == 200
+    assert post('ready').status_code == 200
+    assert post('paid').status_code == 200
+    assert post('pending').status_code == 409
+    assert post('cooking').status_code == 400
+
+    test_order.refresh_from_db()
+    assert (test_order.status, test_order.version) == (Order.Status.PAID, 3)
+
+
+@pytest.mark.django_db
+def test_change_status_is_conditional(test_order: Order) -> None:
+    """
+    Тест Order.objects.change_status: переход применяется одним условным UPDATE,
+    поэтому оплаченный заказ нельзя вернуть назад ни по id, ни через копию, прочитанную до оплаты.
+    """
+    stale = Order.objects.get(pk=test_order.pk)
+    Order.objects.change_status(test_order.pk, Order.Status.READY)
+    Order.objects.change_status(test_order.pk, Order.Status.PAID)
+
+    with pytest.raises(InvalidStatusTransition) as exc_info:
+        Order.objects.change_status(stale.pk, Order.Status.READY)
+    assert exc_info.value.current == Order.Status.PAID
+
+    # Для устаревшей копии переход pending → ready допустим, но сохранение не пройдёт compare-and-swap по версии
+    stale.status = Order.Status.READY
+    stale.check_status_transition()
+    with pytest.raises(ConcurrentUpdateError):
+        stale.save()
+    assert Order.objects.get(pk=test_order.pk).status == Order.Status.PAID
+
+
+@pytest.mark.django_db
+def test_order_edit_view_invalid_transition(client_and_db: Tuple[Client, None]) -> None:
+    """
+    Тест формы редактирования: запрещённый переход (из «Оплачено» обратно) не сохраняется,
+    форма показывает ошибку и сохранённый статус, а не отклонённый.
+    """
+    client, db = client_and_db
+    order = Order.objects.create(table_number=1, status=Order.Status.PAID, total_price=Decimal("10.99"))
+    url: str = reverse('core:order_edit', args=[order.id])
+
+    response = client.post(url, {"table_number": 1, "status": "pending", "version": order.version})
+
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert "Нельзя сменить статус «Оплачено» на «В ожидании»" in content
+    assert '<option value="paid" selected>' in content
+    assert '<option value="pending" selected>' not in content
+    order.refresh_from_db()
+    assert order.status == Order.Status.PAID
@@ -0,0 +1,116 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import URLPattern, reverse
+from django.test import AsyncClient, Client
+from core.models import Order
+from core.urls import app_name, urlpatterns
+
+ITEMS = [{"name": "Чай", "price": 2, "quantity": 1}]
+
+# (метод, имя URL, заказ для аргумента URL, данные или функция от заказов, которая их строит, число запросов).
+# SAVEPOINT/RELEASE считаются: в тестах transaction.atomic() внутри транзакции теста — это точки сохранения.
+# json-* — тело запроса в JSON, остальные POST — данные формы.
+QUERY_COUNTS: List[Tuple[str, str, Optional[str], Any, int]] = [
+    # Web-интерфейс
+    ('get', 'order_list', None, None, 1),
+    ('get', 'order_add', None, None, 0),
+    ('post', 'order_add', None, {"table_number": 3, "items_json": json.dumps(ITEMS)}, 5),
+    ('get', 'order_edit', 'pending', None, 1),
+    # SELECT, SAVEPOINT, UPDATE, DELETE/SELECT dish/INSERT строк заказа, RELEASE
+    ('post', 'order_edit', 'pending', {"table_number": 4, "status": "ready", "items_json": json.dumps(ITEMS * 2)}, 7),
+    ('get', 'order_delete', 'pending', None, 1),
+    ('post', 'order_delete', 'pending', None, 5),
+    ('post', 'update_order_status', 'pending', {"status": "ready"}, 3),
+    ('get', 'revenue', None, None, 1),
+    ('get', 'order_board', None, None, 1),
+    # API
+    ('get', 'order_list_api', None, None, 2),
+    ('get', 'order_export_api', None, None, 1),
+    ('get', 'order_active_api', None, None, 1),
+    ('json-post', 'order_create_api', None, {"table_number": 6, "items": ITEMS}, 5),
+    ('json-post', 'order_bulk_create_api', None, {"orders": [{"table_number": 7, "items": ITEMS}] * 3}, 5),
+    ('json-put', 'order_bulk_update_api', None,
+     lambda orders: {"orders": [{"id": orders['pending'].id, "table_number": 8}]}, 4),
+    ('json-post', 'order_bulk_update_status_api', None,
+     lambda orders: {"changes": [{"id": orders['ready'].id, "status": "paid"}]}, 5),
+    ('get', 'order_detail_api', 'pending', None, 2),
+    ('json-put', 'order_detail_api', 'pending', {"table_number": 5}, 4),
+    ('json-delete', 'order_detail_api', 'paid', None, 6),
+    ('json-put', 'order_update_api', 'pending', {"items": ITEMS * 2}, 7),
+    ('json-delete', 'order_delete_api', 'paid', None, 6),
+    # Условный UPDATE ... RETURNING без SELECT; при оплате заказа ещё upsert DailyRevenue
+    ('json-post', 'update_order_status_api', 'pending', {"status": "ready"}, 3),
+    ('json-post', 'update_order_status_api', 'ready', {"status": "paid"}, 4),
+    ('get', 'revenue_api', None, None, 1),
+    ('get', 'revenue_series_api', None, None, 1),
+    ('get', 'dish_analytics_api', None, None, 1),
+    ('get', 'cache_stats_api', None, None, 0),
+    ('get', 'metrics', None, None, 0),
+]
+
+
+@pytest.fixture
+def client_and_db(client: Client, db) -> Tuple[Client, None]:
+    """
+    Фикстура, которая предоставляет клиент и очищенную базу данных.
+    Это делается для того, чтобы каждый тест был изолирован.
+    """
+    return client, db
+
+
+@pytest.fixture
+def orders(db) -> Dict[str, Order]:
+    """Фикстура создаёт заказ в ожидании, готовый и оплаченный заказы."""
+    return {
+        'pending': Order.objects.create(table_number=1, items=ITEMS, total_price=2),
+        'ready': Order.objects.create(table_number=3, status=Order.Status.READY, items=ITEMS, total_price=2),
+        'paid': Order.objects.create(table_number=2, status=Order.Status.PAID, items=ITEMS, total_price=2),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method, url_name, order_key, data, expected', QUERY_COUNTS)
+def test_view_query_count(client_and_db: Tuple[Client, None], orders: Dict[str, Order], django_assert_num_queries,
+                          method: str, url_name: str, order_key: Optional[str], data: Any, expected: int) -> None:
+    """
+    Тест фиксирует число запросов к БД для каждого представления из core/urls.py.
+    Если число выросло — в представлении появился лишний запрос (N+1, повторный save и т.п.).
+    """
+    client, db = client_and_db
+    url: str = reverse(f'core:{url_name}', args=[orders[order_key].id] if order_key else [])
+    if callable(data):
+        data = data(orders)
+
+    with django_assert_num_queries(expected):
+        if method.startswith('json-'):
+            body = json.dumps(data) if data is not None else None
+            response = getattr(client, method[len('json-'):])(url, data=body, content_type='application/json')
+        else:
+            response = getattr(client, method)(url, data) if data is not None else getattr(client, method)(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+
+    assert response.status_code < 400
+
+
+@pytest.mark.django_db
+def test_order_stream_api_query_count(django_assert_num_queries) -> None:
+    """Тест проверяет, что подписка на поток событий не обращается к БД."""
+    async def connect():
+        response = await AsyncClient().get(reverse('core:order_stream_api'))
+        await anext(response.streaming_content)
+        await response.streaming_content.aclose()
+
+    with django_assert_num_queries(0):
+        async_to_sync(connect)()
+
+
+def test_query_counts_cover_all_urls() -> None:
+    """Тест проверяет, что в таблице QUERY_COUNTS есть каждое представление из core/urls.py."""
+    url_names = {pattern.name for pattern in urlpatterns if isinstance(pattern, URLPattern)}
+    covered = {url_name for _, url_name, _, _, _ in QUERY_COUNTS} | {'order_stream_api'}
+    assert app_name == 'core'
+    assert url_names == covered
@@ -8,15 +8,28 @@ urlpatterns = [
     path('orders/add/', views.OrderCreateView.as_view(), name='order_add'),
     path('orders/edit/<int:pk>/', views.OrderUpdateView.as_view(), name='order_edit'),
     path('orders/delete/<int:pk>/', views.OrderDeleteView.as_view(), name='order_delete'),
+    path('orders/board/', views.OrderBoardView.as_view(), name='order_board'),
     path('orders/update-order-status/<int:order_id>/', views.update_order_status, name='update_order_status'),
     path('revenue/', views.RevenueView.as_view(), name='revenue'),
 
     # API
     path('api-v1/orders/', views.order_list_api, name='order_list_api'),
+    path('api-v1/orders/active/', views.order_active_api, name='order_active_api'),
+    path('api-v1/orders/stream/', views.order_stream_api, name='order_stream_api'),
+    path('api-v1/orders/export/', views.order_export_api, name='order_export_api'),
     path('api-v1/orders/create/', views.order_create_api, name='order_create_api'),
+    path('api-v1/orders/bulk/create/', views.order_bulk_create_api, name='order_bulk_create_api'),
+    path('api-v1/orders/bulk/update/', views.order_bulk_update_api, name='order_bulk_update_api'),
+    path('api-v1/orders/bulk/update-status/', views.order_bulk_update_status_api, name='order_bulk_update_status_api'),
     path('api-v1/orders/<int:pk>/', views.order_detail_api, name='order_detail_api'),
     path('api-v1/orders/<int:pk>/update/', views.order_update_api, name='order_update_api'),
     path('api-v1/orders/<int:pk>/delete/', views.order_delete_api, name='order_delete_api'),
     path('api-v1/orders/update-status/<int:order_id>/', views.update_order_status_api, name='update_order_status_api'),
     path('api-v1/revenue/', views.revenue_view, name='revenue_api'),
+    path('api-v1/revenue/series/', views.revenue_series_api, name='revenue_series_api'),
+    path('api-v1/analytics/dishes/', views.dish_analytics_api, name='dish_analytics_api'),
+    path('api-v1/cache/stats/', views.cache_stats_api, name='cache_stats_api'),
+
+    # Метрики Prometheus (без завершающего слэша — путь по умолчанию для scrape)
+    path('metrics', views.metrics_view, name='metrics'),
 ]
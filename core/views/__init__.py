@@ -1,2 +1,5 @@
 from .api_views import *
+from .bulk_api_views import *
+from .metrics_views import *
+from .stream_views import *
 from .web_views import *
@@ -1,131 +1,428 @@
+import csv
 import json
-from datetime import timedelta
-from django.db.models import Sum
-from django.http import JsonResponse, HttpRequest
-from django.shortcuts import get_object_or_404, redirect
-from django.utils.timezone import now
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple
+from django.db.models import QuerySet
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpRequest, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.cache import get_conditional_response
+from django.utils.timezone import get_current_timezone, is_naive, localdate, make_aware
 from django.views.decorators.csrf import csrf_exempt
-from core.models import Order
+from django.views.decorators.http import require_GET
+from core.active_orders import snapshot as active_orders
+from core.archive import aget_archived_order
+from core.idempotency import idempotent
+from core.cache import acached_response, aconditional_response, aorder_detail_key, stats as cache_stats
+from core.models import ConcurrentUpdateError, InvalidStatusTransition, Order, new_order_total, order_items_total
+from core.serialization import JsonResponse, dumps, loads
+from core.revenue import DISH_ORDERINGS, GRANULARITIES, acached_revenue_summary, dish_sales, revenue_series
+
+
+# Эндпоинты заказов и выручки асинхронные: чтения идут через async ORM и async API кэша,
+# а запись — через asave()/adelete(), потому что Order.save() ведёт транзакцию
+# (OrderItem, DailyRevenue, инвалидация кэша) и в Django выполняется синхронно.
 
 
 @csrf_exempt
-def order_create_api(request: HttpRequest) -> JsonResponse:
+@idempotent
+async def order_create_api(request: HttpRequest) -> JsonResponse:
     if request.method == 'POST':
-        data: dict = json.loads(request.body)
+        data: dict = loads(request.body)
+        items = data.get('items', [])
         new_order: Order = Order(
             table_number=data['table_number'],
             status=data.get('status', Order.Status.PENDING),
-            items=data.get('items', []),
-            total_price=data.get('total_price', 0)
+            items=items,
+            total_price=new_order_total(items, data.get('total_price', 0)),
         )
-        new_order.save()
+        await new_order.asave()
         return JsonResponse({'message': 'Order created successfully', 'id': new_order.id}, status=201)
 
 
-@csrf_exempt
-def order_detail_api(request: HttpRequest, pk: int) -> JsonResponse:
+async def _order_detail_response(pk: int) -> JsonResponse:
     try:
-        order: Order = Order.objects.get(pk=pk)
+        order: Order = await Order.objects.aget(pk=pk)
     except Order.DoesNotExist:
+        return await _archived_order_response(pk)
+
+    data: dict = {
+        'id': order.id,
+        'table_number': order.table_number,
+        'status': order.status,
+        'total_price': order.total_price,
+        'items': order.items,
+        'created_at': order.created_at,
+        'version': order.version,
+    }
+    return JsonResponse(data)
+
+
+async def _archived_order_response(pk: int) -> JsonResponse:
+    # Старые оплаченные заказы перенесены из таблицы в архив (core.archive): там их только читают
+    archived = await aget_archived_order(pk)
+    if archived is None:
         return JsonResponse({'error': 'Order not found'}, status=404)
+    data: dict = {field: archived[field] for field in ('id', 'table_number', 'status', 'total_price', 'items',
+                                                       'created_at', 'version')}
+    data['archived'] = True
+    return JsonResponse(data)
+
+
+async def _order_detail_validator(pk: int) -> Tuple[Optional[str], Optional[datetime]]:
+    updated_at = await Order.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return None, None
+    return f'"order-{pk}-{updated_at.timestamp()}"', updated_at
 
+
+async def _version_conflict(pk: int) -> JsonResponse:
+    # Текущая версия нужна клиенту, чтобы перечитать заказ и повторить изменение
+    version = await Order.objects.filter(pk=pk).values_list('version', flat=True).afirst()
+    return JsonResponse({'error': 'Заказ изменён другим запросом', 'version': version}, status=409)
+
+
+def _invalid_transition(exc: InvalidStatusTransition) -> JsonResponse:
+    # Клиенту возвращается текущий статус и статусы, в которые из него можно перейти
+    return JsonResponse({
+        'error': 'Invalid status transition',
+        'status': exc.current,
+        'allowed': list(Order.STATUS_TRANSITIONS.get(exc.current, ())),
+    }, status=409)
+
+
+def _expected_version(data: dict, order: Optional[Order] = None) -> Optional[int]:
+    """
+    Версия заказа, которую видел клиент (необязательное поле "version").
+    Для уже прочитанного заказа по умолчанию берётся его версия: compare-and-swap защищает
+    от изменений между SELECT и UPDATE этого запроса.
+    """
+    version = data.get('version', order.version if order else None)
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        raise ValueError('version должен быть целым числом')
+    return version
+
+
+@csrf_exempt
+async def order_detail_api(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method == 'GET':
-        data: dict = {
-            'id': order.id,
-            'table_number': order.table_number,
-            'status': order.status,
-            'total_price': order.total_price,
-            'items': order.items,
-            'created_at': order.created_at
-        }
-        return JsonResponse(data)
-
-    elif request.method == 'PUT':
-        data: dict = json.loads(request.body)
+        # Кухонные экраны опрашивают заказ постоянно: ответ кэшируется до следующей записи в заказ,
+        # а при совпадении ETag/Last-Modified отдаётся 304 без тела
+        key = await aorder_detail_key(pk)
+        return await aconditional_response(
+            request, 'order_detail_validator', key,
+            lambda: _order_detail_validator(pk),
+            lambda: acached_response('order_detail', key, lambda: _order_detail_response(pk)),
+        )
+
+    try:
+        order: Order = await Order.objects.aget(pk=pk)
+    except Order.DoesNotExist:
+        return JsonResponse({'error': 'Order not found'}, status=404)
+
+    if request.method == 'PUT':
+        data: dict = loads(request.body)
+        try:
+            if _expected_version(data, order) != order.version:
+                return await _version_conflict(pk)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        if 'total_price' in data:
+            try:
+                total_price = Decimal(str(data['total_price']))
+            except ArithmeticError:
+                return JsonResponse({'error': 'Неверный формат total_price'}, status=400)
+            # Присланная сумма заказа с блюдами должна совпадать с items:
+            # иначе клиент перезаписал бы её устаревшим значением
+            if order.items and total_price != order_items_total(order.items):
+                return JsonResponse(
+                    {'error': 'total_price не совпадает с суммой items', 'total_price': order_items_total(order.items)},
+                    status=400,
+                )
+            order.total_price = total_price
         order.table_number = data.get('table_number', order.table_number)
         order.status = data.get('status', order.status)
-        order.total_price = data.get('total_price', order.total_price)
-        order.save()
-        return JsonResponse({'message': 'Order updated successfully'})
+        # items не меняются: UPDATE только изменяемых колонок, без пересинхронизации OrderItem
+        try:
+            order.check_status_transition()
+            await order.asave(update_fields=['table_number', 'status', 'total_price', 'updated_at'])
+        except InvalidStatusTransition as exc:
+            return _invalid_transition(exc)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        except ConcurrentUpdateError:
+            return await _version_conflict(pk)
+        return JsonResponse({'message': 'Order updated successfully', 'version': order.version})
 
     elif request.method == 'DELETE':
-        order.delete()
+        await order.adelete()
         return JsonResponse({'message': 'Order deleted successfully'})
 
 
 @csrf_exempt
-def order_update_api(request: HttpRequest, pk: int) -> JsonResponse:
-    order: Order = get_object_or_404(Order, pk=pk)
+async def order_update_api(request: HttpRequest, pk: int) -> JsonResponse:
+    order: Order = await aget_object_or_404(Order, pk=pk)
     if request.method == "PUT":
         try:
-            data: dict = json.loads(request.body)
+            data: dict = loads(request.body)
+            if _expected_version(data, order) != order.version:
+                return await _version_conflict(pk)
             order.table_number = data.get("table_number", order.table_number)
             order.status = data.get("status", order.status)
             order.items = data.get("items", order.items)
-            order.update_total_price()
-            order.save()
-            return JsonResponse({"message": "Заказ обновлён", "order_id": order.id})
+            order.check_status_transition()
+            # Один UPDATE вместе с пересчитанной суммой, только если версия не изменилась с момента чтения
+            await sync_to_async(order.update_total_price)()
+            return JsonResponse({"message": "Заказ обновлён", "order_id": order.id, "version": order.version})
         except json.JSONDecodeError:
             return JsonResponse({"error": "Неверный формат JSON"}, status=400)
+        except InvalidStatusTransition as exc:
+            return _invalid_transition(exc)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        except ConcurrentUpdateError:
+            return await _version_conflict(pk)
     return JsonResponse({"error": "Метод не разрешён"}, status=405)
 
 
 @csrf_exempt
-def update_order_status_api(request: HttpRequest, order_id: int) -> JsonResponse:
-    try:
-        order: Order = Order.objects.get(pk=order_id)
-    except Order.DoesNotExist:
-        return JsonResponse({'error': 'Order not found'}, status=404)
-
+@idempotent
+async def update_order_status_api(request: HttpRequest, order_id: int) -> JsonResponse:
     if request.method == 'POST':
-        data: dict = json.loads(request.body)
-        order.status = data.get('status', order.status)
-        order.save()
+        data: dict = loads(request.body)
+        if 'status' in data:
+            # Условный UPDATE ... WHERE status IN (разрешённые исходные) RETURNING без предварительного SELECT;
+            # с полем version — только если заказ не менялся с тех пор, как клиент его прочитал
+            try:
+                changed = await sync_to_async(Order.objects.change_status)(
+                    order_id, data['status'], _expected_version(data),
+                )
+            except InvalidStatusTransition as exc:
+                return _invalid_transition(exc)
+            except ValueError as exc:
+                return JsonResponse({'error': str(exc)}, status=400)
+            except ConcurrentUpdateError:
+                return await _version_conflict(order_id)
+            found = changed is not None
+        else:
+            found = await Order.objects.filter(pk=order_id).aexists()
+        if not found:
+            return JsonResponse({'error': 'Order not found'}, status=404)
         return JsonResponse({'message': 'Order status updated successfully'})
 
+    if not await Order.objects.filter(pk=order_id).aexists():
+        return JsonResponse({'error': 'Order not found'}, status=404)
+
+
+@require_GET
+async def order_active_api(request: HttpRequest) -> HttpResponse:
+    """
+    Активные заказы (в ожидании и готовые) для кухонных экранов, старые первыми.
+    Ответ — готовое тело из снимка в памяти процесса (core.active_orders): без запроса к БД, пока заказы
+    не менялись. Экраны опрашивают endpoint постоянно, поэтому при совпадении ETag отдаётся 304 без тела.
+    """
+    active = await active_orders.aget()
+    response = get_conditional_response(request, etag=active.etag)
+    if response is None:
+        response = HttpResponse(active.content, content_type='application/json')
+    response['ETag'] = active.etag
+    # Браузер может хранить ответ, но перед использованием должен сверить ETag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
 
 @csrf_exempt
-def order_delete_api(request, pk: int) -> JsonResponse:
+async def order_delete_api(request, pk: int) -> JsonResponse:
     try:
-        order = Order.objects.get(pk=pk)  # Получаем заказ по ID
+        order = await Order.objects.aget(pk=pk)  # Получаем заказ по ID
     except Order.DoesNotExist:
         return JsonResponse({"error": "Заказ не найден"}, status=404)
 
     if request.method == "DELETE":
-        order.delete()
+        await order.adelete()
         return JsonResponse({"message": "Заказ удалён"})
 
     return JsonResponse({"error": "Метод не разрешён"}, status=405)
 
 
+DISH_ANALYTICS_DEFAULT_LIMIT = 10
+DISH_ANALYTICS_MAX_LIMIT = 100
+
+EXPORT_FIELDS = ("id", "table_number", "status", "items", "total_price", "created_at")
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_ROWS_PER_WRITE = 500
+
+
+def _parse_export_datetime(value: str, end_of_day: bool = False) -> datetime:
+    day = parse_date(value)
+    if day is not None:
+        # Для даты без времени граница to включает весь день
+        parsed = datetime.combine(day + timedelta(days=1) if end_of_day else day, time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if is_naive(parsed):
+        parsed = make_aware(parsed, get_current_timezone())
+    return parsed
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи в буфер."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield dumps(row, ensure_ascii=False).decode() + "\n"
+
+
+def _csv_lines(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    for row in rows:
+        row["items"] = dumps(row["items"], ensure_ascii=False).decode()
+        row["created_at"] = row["created_at"].isoformat()
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def _batched(rows: Iterable[dict], render_lines: Callable[[Iterable[dict]], Iterator[str]], header: str,
+             size: int = EXPORT_ROWS_PER_WRITE) -> Iterator[str]:
+    # Отдаём строки пачками, чтобы не делать отдельную запись в сокет на каждый заказ
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield header + "".join(render_lines(batch))
+            header, batch = "", []
+    if batch or header:
+        yield header + "".join(render_lines(batch))
+
+
+async def _abatched(rows: AsyncIterator[dict], render_lines: Callable[[Iterable[dict]], Iterator[str]], header: str,
+                    size: int = EXPORT_ROWS_PER_WRITE) -> AsyncIterator[str]:
+    """Асинхронный вариант _batched: под ASGI синхронный итератор Django прочитал бы в память целиком."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield header + "".join(render_lines(batch))
+            header, batch = "", []
+    if batch or header:
+        yield header + "".join(render_lines(batch))
+
+
+# Формат: (строки заказов, заголовок файла, Content-Type)
+EXPORT_FORMATS = {
+    "ndjson": (_ndjson_lines, "", "application/x-ndjson"),
+    "csv": (_csv_lines, csv.writer(_Echo()).writerow(EXPORT_FIELDS), "text/csv"),
+}
+
+
+def order_export_api(request: HttpRequest) -> StreamingHttpResponse | JsonResponse:
+    if request.method != "GET":
+        return JsonResponse({"error": "Метод не разрешён"}, status=405)
+
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({"error": f"format должен быть одним из: {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+    queryset: QuerySet = Order.objects.all()
+
+    table_number = request.GET.get("table_number")
+    if table_number:
+        queryset = queryset.filter(table_number=table_number)
+
+    status = request.GET.get("status")
+    if status:
+        queryset = queryset.filter(status=status)
+
+    try:
+        if request.GET.get("created_from"):
+            queryset = queryset.filter(created_at__gte=_parse_export_datetime(request.GET["created_from"]))
+        if request.GET.get("created_to"):
+            queryset = queryset.filter(created_at__lt=_parse_export_datetime(request.GET["created_to"], end_of_day=True))
+    except ValueError:
+        return JsonResponse({"error": "Неверный формат даты, ожидается YYYY-MM-DD или ISO 8601"}, status=400)
+
+    # iterator()/aiterator() на PostgreSQL читают строки через серверный курсор порциями по chunk_size,
+    # поэтому память воркера не зависит от размера выгрузки
+    queryset = queryset.order_by("created_at", "id").values(*EXPORT_FIELDS)
+    render_lines, header, content_type = EXPORT_FORMATS[export_format]
+
+    if isinstance(request, ASGIRequest):
+        # ASGI-обработчик читает асинхронное тело по частям, а синхронное — сначала целиком в список
+        content = _abatched(queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE), render_lines, header)
+    else:
+        content = _batched(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), render_lines, header)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="orders.{export_format}"'
+    return response
+
+
 @csrf_exempt
-def revenue_view(request: HttpRequest) -> JsonResponse:
-    today = now().date()
-
-    # Выручка за сегодня
-    today_orders = Order.objects.filter(status=Order.Status.PAID, created_at__date=today)
-    total_revenue_today: float = today_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
-
-    # Выручка за неделю
-    last_week_orders = Order.objects.filter(
-        status=Order.Status.PAID,
-        created_at__gte=today - timedelta(days=7),
-        created_at__lt=today
-    )
-    total_revenue_last_week: float = last_week_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
-
-    # Выручка за месяц
-    last_month_orders = Order.objects.filter(
-        status=Order.Status.PAID,
-        created_at__gte=today.replace(day=1) - timedelta(days=today.day),
-        created_at__lt=today
-    )
-    total_revenue_last_month: float = last_month_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
+async def revenue_view(request: HttpRequest) -> JsonResponse:
+    return JsonResponse(await acached_revenue_summary())
 
-    data: dict = {
-        'today_revenue': total_revenue_today,
-        'last_week_revenue': total_revenue_last_week,
-        'last_month_revenue': total_revenue_last_month,
-    }
 
-    return JsonResponse(data)
\ No newline at end of file
+def cache_stats_api(request: HttpRequest) -> JsonResponse:
+    return JsonResponse({"endpoints": cache_stats.snapshot()})
+
+
+def _parse_date_range(request: HttpRequest) -> Tuple[date, date]:
+    """Диапазон дат из ?from=&to= (включительно), по умолчанию — последние 30 дней."""
+    try:
+        date_to = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else localdate()
+        date_from = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else date_to - timedelta(days=30)
+    except ValueError:
+        raise ValueError("Неверный формат даты, ожидается YYYY-MM-DD")
+    if date_from > date_to:
+        raise ValueError("from не может быть позже to")
+    return date_from, date_to
+
+
+def revenue_series_api(request: HttpRequest) -> JsonResponse:
+    try:
+        date_from, date_to = _parse_date_range(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    granularity = request.GET.get("granularity", "day")
+    if granularity not in GRANULARITIES:
+        return JsonResponse({"error": f"granularity должен быть одним из: {', '.join(GRANULARITIES)}"}, status=400)
+
+    return JsonResponse({
+        "from": date_from,
+        "to": date_to,
+        "granularity": granularity,
+        "series": revenue_series(date_from, date_to, granularity),
+    })
+
+
+def dish_analytics_api(request: HttpRequest) -> JsonResponse:
+    try:
+        date_from, date_to = _parse_date_range(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    order_by = request.GET.get("order_by", "revenue")
+    if order_by not in DISH_ORDERINGS:
+        return JsonResponse({"error": f"order_by должен быть одним из: {', '.join(DISH_ORDERINGS)}"}, status=400)
+
+    try:
+        limit = int(request.GET.get("limit", DISH_ANALYTICS_DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "limit должен быть числом"}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "limit должен быть больше нуля"}, status=400)
+
+    return JsonResponse({
+        "from": date_from,
+        "to": date_to,
+        "order_by": order_by,
+        "dishes": dish_sales(date_from, date_to, min(limit, DISH_ANALYTICS_MAX_LIMIT), order_by),
+    })
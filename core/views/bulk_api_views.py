@@ -0,0 +1,253 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpRequest
+from django.utils.timezone import now
+from django.views.decorators.csrf import csrf_exempt
+from core.cache import invalidate_orders
+from core.idempotency import idempotent
+from core.events import EVENT_CREATED, publish_order_event
+from core.serialization import JsonResponse, loads
+from core.models import DailyRevenue, InvalidStatusTransition, Order, OrderItem, new_order_total, order_items_total
+
+MAX_BULK_ITEMS = 5000
+BULK_BATCH_SIZE = 1000
+
+# Поля, которые нужны Order.revenue_state() для обновления DailyRevenue
+REVENUE_FIELDS = ('status', 'table_number', 'total_price', 'created_at', 'version')
+
+
+def _parse_batch(request: HttpRequest, key: str) -> List[Any]:
+    data = loads(request.body)
+    items = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError(f"Ожидается массив {key}")
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValueError(f"Не больше {MAX_BULK_ITEMS} элементов за запрос")
+    return items
+
+
+def _validation_error(exc: ValidationError) -> Dict[str, Any]:
+    return exc.message_dict if hasattr(exc, 'error_dict') else {'__all__': exc.messages}
+
+
+def _clean_order(order: Order) -> None:
+    # Пустой список блюд допустим (как в order_create_api), поэтому items проверяется отдельно от full_clean
+    errors = {}
+    try:
+        order.full_clean(exclude=['items', 'created_at'])
+    except ValidationError as exc:
+        errors = exc.message_dict
+    if not isinstance(order.items, list) or not all(isinstance(item, dict) for item in order.items):
+        errors['items'] = ['Ожидается список блюд']
+    if errors:
+        raise ValidationError(errors)
+
+
+def _order_id(item: Any) -> Optional[int]:
+    # id из JSON может оказаться чем угодно, в том числе списком или объектом, которые нельзя искать в словаре
+    pk = item.get('id') if isinstance(item, dict) else None
+    return pk if isinstance(pk, int) and not isinstance(pk, bool) else None
+
+
+def _load_orders(results: List[Dict[str, Any]], items: List[Any], only: Tuple[str, ...] = (),
+                 for_update: bool = False) -> Dict[int, Order]:
+    """
+    Одним запросом загружает заказы, на которые ссылаются элементы пачки.
+    Для элементов без корректного id, с повторяющимся id или с устаревшей версией
+    (необязательное поле "version") сразу записывает ошибку в results.
+    """
+    ids = [_order_id(item) for item in items]
+    queryset = Order.objects.only(*only) if only else Order.objects.all()
+    if for_update:
+        # Строки блокируются в порядке id, чтобы параллельные пачки не ждали друг друга по кругу
+        queryset = queryset.select_for_update().order_by('pk')
+    orders = queryset.in_bulk([pk for pk in ids if pk is not None])
+
+    seen = set()
+    for index, (item, pk) in enumerate(zip(items, ids)):
+        if pk is None:
+            results[index] = {'index': index, 'error': 'id должен быть целым числом'}
+        elif pk not in orders:
+            results[index] = {'index': index, 'error': 'Order not found'}
+        elif pk in seen:
+            results[index] = {'index': index, 'error': 'Duplicate order id in batch'}
+        elif item.get('version', orders[pk].version) != orders[pk].version:
+            results[index] = {'index': index, 'error': 'Version conflict', 'version': orders[pk].version}
+        seen.add(pk)
+    return orders
+
+
+@csrf_exempt
+@idempotent
+def order_bulk_create_api(request: HttpRequest) -> JsonResponse:
+    """
+    Создаёт пачку заказов одним INSERT (по BULK_BATCH_SIZE строк) в одной транзакции.
+    Тело: {"orders": [{"table_number": ..., "status": ..., "items": [...], "total_price": ...}, ...]}.
+    Некорректные элементы не создаются, по каждому элементу возвращается id или ошибка.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Метод не разрешён'}, status=405)
+    try:
+        items = _parse_batch(request, 'orders')
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    new_orders: List[Tuple[int, Order]] = []
+    for index, data in enumerate(items):
+        if not isinstance(data, dict):
+            results[index] = {'index': index, 'error': 'Ожидается объект заказа'}
+            continue
+        order_items = data.get('items', [])
+        order = Order(
+            table_number=data.get('table_number'),
+            status=data.get('status', Order.Status.PENDING),
+            items=order_items,
+            total_price=new_order_total(order_items, data.get('total_price', 0)),
+        )
+        try:
+            _clean_order(order)
+        except ValidationError as exc:
+            results[index] = {'index': index, 'error': _validation_error(exc)}
+            continue
+        new_orders.append((index, order))
+
+    with transaction.atomic():
+        created = Order.objects.bulk_create([order for _, order in new_orders], batch_size=BULK_BATCH_SIZE)
+        OrderItem.objects.replace_for(created, created=True)
+        DailyRevenue.objects.apply_changes((None, order.revenue_state()) for order in created)
+        invalidate_orders(order.pk for order in created)
+        for order in created:
+            publish_order_event(EVENT_CREATED, order)
+
+    for index, order in new_orders:
+        results[index] = {'index': index, 'id': order.id}
+
+    return JsonResponse({'created': len(new_orders), 'results': results}, status=201 if new_orders else 200)
+
+
+@csrf_exempt
+def order_bulk_update_api(request: HttpRequest) -> JsonResponse:
+    """
+    Обновляет пачку заказов так же, как order_update_api: table_number, status, items
+    и пересчитанный total_price. Один SELECT на всю пачку и bulk_update в одной транзакции.
+    Тело: {"orders": [{"id": ..., "table_number": ..., "status": ..., "items": [...]}, ...]}.
+    """
+    if request.method != 'PUT':
+        return JsonResponse({'error': 'Метод не разрешён'}, status=405)
+    try:
+        items = _parse_batch(request, 'orders')
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    with transaction.atomic():
+        # bulk_update не умеет compare-and-swap по каждой строке, поэтому строки пачки блокируются
+        # на время транзакции: между чтением и записью их никто не изменит
+        orders = _load_orders(results, items, for_update=True)
+
+        changed: List[Tuple[int, Order]] = []
+        for index, data in enumerate(items):
+            if results[index]:
+                continue
+            order = orders[data['id']]
+            order.table_number = data.get('table_number', order.table_number)
+            order.status = data.get('status', order.status)
+            order.items = data.get('items', order.items)
+            try:
+                _clean_order(order)
+                order.check_status_transition()
+            except ValidationError as exc:
+                results[index] = {'index': index, 'error': _validation_error(exc)}
+                continue
+            except InvalidStatusTransition:
+                results[index] = {'index': index, 'error': 'Invalid status transition', 'status': order._loaded_status}
+                continue
+            changed.append((index, order))
+
+        # Строки OrderItem пересоздаются пачкой только у заказов, где поменялся список блюд;
+        # сумма считается по items так же, как в Order.update_total_price()
+        OrderItem.objects.replace_for(order for _, order in changed if order._items_changed(None))
+        updated_at = now()
+        for _, order in changed:
+            order.total_price = order_items_total(order.items)
+            order.updated_at = updated_at
+            order.version += 1
+        # bulk_update и update() не проставляют auto_now, поэтому updated_at задаётся явно
+        Order.objects.bulk_update(
+            [order for _, order in changed],
+            ['table_number', 'status', 'items', 'total_price', 'updated_at', 'version'],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        DailyRevenue.objects.apply_changes(
+            (order._loaded_revenue_state, order.revenue_state()) for _, order in changed
+        )
+        invalidate_orders(order.pk for _, order in changed)
+        for _, order in changed:
+            publish_order_event(order._event_type(adding=False), order)
+
+    for index, order in changed:
+        order._loaded_revenue_state = order.revenue_state()
+        order._loaded_status = order.status
+        results[index] = {'index': index, 'id': order.id, 'version': order.version}
+
+    return JsonResponse({'updated': len(changed), 'results': results})
+
+
+@csrf_exempt
+@idempotent
+def order_bulk_update_status_api(request: HttpRequest) -> JsonResponse:
+    """
+    Меняет статус у пачки заказов.
+    Тело: {"changes": [{"id": ..., "status": ...}, ...]}.
+    Заказы с одинаковым новым статусом обновляются одним UPDATE ... WHERE id IN (...).
+    Переходы проверяются по Order.STATUS_TRANSITIONS на заблокированных строках.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Метод не разрешён'}, status=405)
+    try:
+        items = _parse_batch(request, 'changes')
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    by_status: Dict[str, List[int]] = defaultdict(list)
+    revenue_changes = []
+    changed: List[Tuple[int, Order]] = []
+    updated_at = now()
+    with transaction.atomic():
+        # Прочитанные статусы идут в DailyRevenue, поэтому строки блокируются до конца транзакции
+        orders = _load_orders(results, items, only=REVENUE_FIELDS, for_update=True)
+        for index, data in enumerate(items):
+            if results[index]:
+                continue
+            if data.get('status') not in Order.Status.values:
+                results[index] = {'index': index, 'error': 'Invalid status'}
+                continue
+            order = orders[data['id']]
+            if not Order.can_change_status(order.status, data['status']):
+                results[index] = {'index': index, 'error': 'Invalid status transition', 'status': order.status}
+                continue
+            old_state = order.revenue_state()
+            order.status = data['status']
+            revenue_changes.append((old_state, order.revenue_state()))
+            by_status[order.status].append(order.id)
+            changed.append((index, order))
+
+        for status, ids in by_status.items():
+            Order.objects.filter(pk__in=ids).update(status=status, updated_at=updated_at, version=F('version') + 1)
+        DailyRevenue.objects.apply_changes(revenue_changes)
+        invalidate_orders(pk for ids in by_status.values() for pk in ids)
+        for _, order in changed:
+            order.updated_at = updated_at
+            order.version += 1
+            publish_order_event(order._event_type(adding=False), order)
+
+    for index, order in changed:
+        results[index] = {'index': index, 'id': order.id, 'version': order.version}
+
+    updated = sum(len(ids) for ids in by_status.values())
+    return JsonResponse({'updated': updated, 'results': results})
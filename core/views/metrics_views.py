@@ -0,0 +1,11 @@
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.http import require_GET
+from core.metrics import metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Метрики запросов этого процесса в текстовом формате Prometheus (см. core.middleware.RequestMetricsMiddleware)."""
+    return HttpResponse(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
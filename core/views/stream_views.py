@@ -0,0 +1,45 @@
+from typing import AsyncIterator
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from core.events import get_broker, iter_messages
+from core.serialization import JsonResponse
+
+# Комментарий-пинг раз в STREAM_KEEPALIVE секунд не даёт прокси закрыть простаивающее соединение
+STREAM_KEEPALIVE = 15
+# Через сколько миллисекунд EventSource переподключается после обрыва
+STREAM_RETRY_MS = 2000
+
+
+async def _order_events(subscription) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        async for message in iter_messages(subscription, STREAM_KEEPALIVE):
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {message}\n\n"
+    finally:
+        # Вызывается и при отключении клиента: ASGI-обработчик отменяет генератор
+        subscription.close()
+
+
+@require_GET
+async def order_stream_api(request: HttpRequest) -> StreamingHttpResponse | JsonResponse:
+    """
+    Поток событий заказов (Server-Sent Events): created, updated, status, deleted.
+    Каждое событие — JSON с полем "type" и полями заказа (без items).
+    Работает только под ASGI (iikoLike.asgi, SERVER_MODE=asgi): WSGI-обработчик читает асинхронное тело
+    в список до конца, и бесконечный поток занял бы синхронный воркер до таймаута, не отправив ни одного
+    события, поэтому под WSGI возвращается 501.
+    После переподключения клиент должен перечитать order_list_api — пропущенные события не повторяются.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Поток событий доступен только при запуске под ASGI (SERVER_MODE=asgi)'},
+                            status=501)
+    subscription = get_broker().subscribe()
+    response = StreamingHttpResponse(_order_events(subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Отключает буферизацию ответа в nginx
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,13 +1,23 @@
+import hashlib
 import json
-from datetime import timedelta
-from django.db.models import Sum, QuerySet
-from django.http import HttpResponseRedirect, HttpResponseBadRequest, JsonResponse
+from datetime import datetime
+from functools import partial
+from django.db.models import QuerySet
+from django.http import HttpResponse, HttpResponseRedirect, HttpResponseBadRequest, Http404
+from django.middleware.csrf import get_token
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+from django.utils.timezone import localdate
 from django.shortcuts import get_object_or_404, redirect
-from django.utils.timezone import now
 from django.views.generic import ListView, CreateView, DeleteView, UpdateView, TemplateView
 from django.urls import reverse_lazy
-from core.models import Order
-from typing import Any, Dict, List
+from core.active_orders import snapshot as active_orders
+from core.models import ConcurrentUpdateError, InvalidStatusTransition, Order
+from core.pagination import PaginationError, paginate_keyset, parse_limit
+from core.cache import cached_many, cached_response, conditional_response, order_list_key, order_row_key, revenue_key
+from core.revenue import cached_revenue_summary
+from core.serialization import JsonResponse
+from typing import Any, Dict, List, Optional, Tuple
 from django.shortcuts import render
 
 
@@ -19,6 +29,7 @@ class OrderListView(ListView):
     model = Order
     template_name = 'core/order_list.html'
     context_object_name = 'orders'
+    page_size = 50
 
     def get_queryset(self) -> QuerySet[Order]:
         queryset = super().get_queryset()
@@ -36,6 +47,21 @@ class OrderListView(ListView):
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
 
+        # Постраничный вывод по курсору (created_at, id) вместо рендера всей таблицы
+        try:
+            limit = parse_limit(self.request.GET.get('limit'), default=self.page_size)
+            orders, next_cursor = paginate_keyset(self.object_list, self.request.GET.get('cursor'), limit)
+        except PaginationError as exc:
+            raise Http404(str(exc))
+
+        context['orders'] = orders
+        context['order_rows'] = _order_rows(self.request, orders)
+        context['next_page_query'] = None
+        if next_cursor:
+            query = self.request.GET.copy()
+            query['cursor'] = next_cursor
+            context['next_page_query'] = query.urlencode()
+
         context['STATUS_CHOICES'] = Order.Status.choices
         context['search_table_number'] = self.request.GET.get('table_number', '')
         context['search_status'] = self.request.GET.get('status', '')
@@ -43,6 +69,28 @@ class OrderListView(ListView):
         return context
 
 
+# Вместо CSRF-токена в закэшированную строку рендерится заглушка: токен у каждого запроса свой
+CSRF_PLACEHOLDER = 'csrf-token-placeholder'
+ORDER_ROW_TEMPLATE = 'core/order_list_row.html'
+
+
+def _order_rows(request: Any, orders: List[Order]) -> List[str]:
+    """
+    HTML строк списка заказов. Строка кэшируется по (id, version) заказа, и перерисовываются только
+    заказы, изменившиеся с прошлого показа, — остальные берутся из кэша одним get_many.
+    """
+    template = get_template(ORDER_ROW_TEMPLATE)
+    keys = {order.pk: order_row_key(order.pk, order.version) for order in orders}
+    rows = cached_many('order_row', {
+        keys[order.pk]: partial(template.render, {
+            'order': order, 'STATUS_CHOICES': Order.Status.choices, 'csrf_token': CSRF_PLACEHOLDER,
+        })
+        for order in orders
+    })
+    csrf_token = get_token(request)
+    return [mark_safe(rows[keys[order.pk]].replace(CSRF_PLACEHOLDER, csrf_token)) for order in orders]
+
+
 class OrderCreateView(CreateView):
     model = Order
     fields = ['table_number']
@@ -53,13 +101,11 @@ class OrderCreateView(CreateView):
         items_json = self.request.POST.get('items_json')
         items: List[Dict[str, Any]] = json.loads(items_json)  # Безопаснее, чем eval
 
-        total_price = sum(item["price"] * item["quantity"] for item in items)
-
         order = form.save(commit=False)
         order.status = Order.Status.PENDING
         order.items = items
-        order.total_price = total_price
-        order.save()
+        # Один INSERT заказа с посчитанной суммой и строки OrderItem
+        order.update_total_price()
 
         return HttpResponseRedirect(self.success_url)
 
@@ -73,15 +119,38 @@ class OrderUpdateView(UpdateView):
     def form_valid(self, form: Any) -> Any:
         order = form.save(commit=False)
 
+        # Версия, с которой открывали форму: если заказ с тех пор изменили, правки не сохраняются
+        if self.request.POST.get('version', str(order.version)) != str(order.version):
+            return self.version_conflict()
+
         # Получаем JSON из формы
         items_json = self.request.POST.get('items_json')
 
         if items_json:
             order.items = json.loads(items_json)
 
-        order.update_total_price()
-        order.save()
-        return super().form_valid(form)
+        try:
+            order.check_status_transition()
+        except InvalidStatusTransition as exc:
+            current, requested = Order.Status(exc.current).label, Order.Status(exc.requested).label
+            form.add_error('status', f"Нельзя сменить статус «{current}» на «{requested}»")
+            # Форма показывается с сохранённым статусом, а не с отклонённым; остальные правки остаются
+            order.status = exc.current
+            return self.form_invalid(form)
+
+        # Один UPDATE вместе с пересчитанной суммой; super().form_valid() сохранил бы заказ ещё раз
+        try:
+            order.update_total_price()
+        except ConcurrentUpdateError:
+            return self.version_conflict()
+        self.object = order
+        return HttpResponseRedirect(self.get_success_url())
+
+    def version_conflict(self) -> HttpResponse:
+        # Форма заново заполняется текущим состоянием заказа
+        self.object = self.get_object()
+        form = self.get_form_class()(instance=self.object)
+        return self.render_to_response(self.get_context_data(form=form, version_conflict=True), status=409)
 
 
 class OrderDeleteView(DeleteView):
@@ -92,65 +161,125 @@ class OrderDeleteView(DeleteView):
 
 # Функция для обновления статуса заказа
 def update_order_status(request: Any, order_id: int) -> HttpResponseBadRequest | HttpResponseRedirect:
-    order = get_object_or_404(Order, id=order_id)
-
     if request.method == 'POST':
         new_status = request.POST.get('status')
 
         if new_status in dict(Order.Status.choices):
-            order.status = new_status
-            order.save()
+            # Условный UPDATE ... RETURNING без предварительного SELECT
+            try:
+                changed = Order.objects.change_status(order_id, new_status)
+            except InvalidStatusTransition:
+                return HttpResponseBadRequest("Invalid status transition")
+            if changed is None:
+                raise Http404("No Order matches the given query.")
             return redirect('core:order_list')
         else:
+            get_object_or_404(Order, id=order_id)
             return HttpResponseBadRequest("Invalid status format")
 
+    get_object_or_404(Order, id=order_id)
     return HttpResponseBadRequest("Invalid HTTP method")
 
 
-class RevenueView(TemplateView):
-    template_name = 'core/revenue.html'
+class OrderBoardView(TemplateView):
+    """Доска активных заказов для кухни: колонки «В ожидании» и «Готово», обновляется опросом order_active_api."""
+    template_name = 'core/order_board.html'
+    # Как часто страница перечитывает order_active_api, секунд
+    poll_interval = 5
+    # Сколько самых старых заказов показывать в колонке; остальные — только в счётчике
+    orders_per_column = 50
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
 
-        # Получаем текущую дату
-        today = now().date()
+        # Тот же снимок в памяти процесса, что и у order_active_api: без запроса к БД, пока заказы не менялись
+        active = active_orders.get()
+        context['columns'] = []
+        for status in Order.ACTIVE_STATUSES:
+            orders = active.by_status(status)
+            next_status = Order.STATUS_TRANSITIONS[status][0]
+            context['columns'].append({
+                'status': status,
+                'label': Order.Status(status).label,
+                'orders': orders[:self.orders_per_column],
+                'count': len(orders),
+                'next_status': next_status,
+                'next_label': Order.Status(next_status).label,
+            })
+        context['poll_interval'] = self.poll_interval
+        context['orders_per_column'] = self.orders_per_column
+
+        return context
 
-        # Фильтруем заказы за сегодняшний день
-        today_orders = Order.objects.filter(status=Order.Status.PAID, created_at__date=today)
 
-        # Вычисляем общую выручку
-        total_revenue = today_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
+class RevenueView(TemplateView):
+    template_name = 'core/revenue.html'
 
-        # Фильтруем заказы за предыдущую неделю
-        last_week_orders = Order.objects.filter(status=Order.Status.PAID, created_at__gte=today - timedelta(days=7), created_at__lt=today)
-        last_week_revenue = last_week_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
+    def get(self, request: Any, *args: Any, **kwargs: Any) -> HttpResponse:
+        # Страница целиком кэшируется до следующего изменения выручки (или смены дня)
+        return cached_response(
+            'revenue_page', revenue_key(f'page:{localdate().isoformat()}'),
+            lambda: super(RevenueView, self).get(request, *args, **kwargs).render(),
+        )
 
-        # Фильтруем заказы за предыдущий месяц
-        last_month_orders = Order.objects.filter(status=Order.Status.PAID, created_at__gte=today.replace(day=1) - timedelta(days=today.day), created_at__lt=today)
-        last_month_revenue = last_month_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
 
-        # Добавляем данные в контекст
-        context['today_revenue'] = total_revenue
-        context['last_week_revenue'] = last_week_revenue
-        context['last_month_revenue'] = last_month_revenue
+        # Выручка за сегодня, неделю и месяц: один запрос в core.revenue, результат кэшируется
+        context.update(cached_revenue_summary())
 
         return context
 
 
-def order_list_api(request: Any) -> JsonResponse:
-    queryset = Order.objects.all()
-
+def _filter_orders(queryset: QuerySet[Order], params: Dict[str, str]) -> QuerySet[Order]:
     # Поиск по номеру стола
-    table_number = request.GET.get("table_number")
-    if table_number:
-        queryset = queryset.filter(table_number=table_number)
+    if params.get("table_number"):
+        queryset = queryset.filter(table_number=params["table_number"])
 
     # Поиск по статусу
-    status = request.GET.get("status")
-    if status:
-        queryset = queryset.filter(status=status)
-
-    orders = list(queryset.values("id", "table_number", "status", "items", "total_price", "created_at"))
-
-    return JsonResponse({"orders": orders})
+    if params.get("status"):
+        queryset = queryset.filter(status=params["status"])
+
+    return queryset
+
+
+def _order_list_validator(params: Dict[str, str]) -> Tuple[Optional[str], Optional[datetime]]:
+    # Валидатор считается по той же странице, что и ответ, но только по (id, updated_at):
+    # меняется при изменении, удалении или появлении заказа на странице, а стоимость не зависит от размера таблицы
+    try:
+        rows, next_cursor = paginate_keyset(
+            _filter_orders(Order.objects.all(), params).values("id", "created_at", "updated_at"),
+            params["cursor"],
+            parse_limit(params["limit"]),
+        )
+    except PaginationError:
+        return None, None
+    last_modified = max((row["updated_at"] for row in rows), default=None)
+    raw = repr((sorted(params.items()), [(row["id"], row["updated_at"].timestamp()) for row in rows], next_cursor))
+    return f'"orders-{hashlib.md5(raw.encode()).hexdigest()}"', last_modified
+
+
+def order_list_api(request: Any) -> HttpResponse:
+    params = {key: request.GET.get(key, "") for key in ("table_number", "status", "limit", "cursor")}
+    key = order_list_key(params)
+    return conditional_response(
+        request, "order_list_validator", key,
+        lambda: _order_list_validator(params),
+        lambda: cached_response("order_list", key, lambda: _order_list_response(params)),
+    )
+
+
+def _order_list_response(params: Dict[str, str]) -> JsonResponse:
+    queryset = _filter_orders(Order.objects.all(), params)
+
+    try:
+        limit = parse_limit(params["limit"])
+        orders, next_cursor = paginate_keyset(
+            queryset.values("id", "table_number", "status", "items", "total_price", "created_at"),
+            params["cursor"],
+            limit,
+        )
+    except PaginationError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({"orders": orders, "next_cursor": next_cursor})
@@ -0,0 +1,65 @@
+"""
+Настройки gunicorn для production-режимов (SERVER_MODE в docker-compose.yml):
+
+    gunicorn -c gunicorn.conf.py                    # wsgi: синхронные воркеры, iikoLike.wsgi
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py   # asgi: воркеры uvicorn, iikoLike.asgi
+
+В режиме asgi асинхронные представления API и SSE-поток заказов (/api-v1/orders/stream/) не занимают
+воркер на всё время ожидания. В режиме wsgi каждый открытый поток держит целый воркер.
+
+Плавный перезапуск после выкладки: kill -HUP <pid мастера> (в compose — docker compose kill -s HUP web).
+Мастер запускает воркеры с новым кодом, а старые дообрабатывают текущие запросы в пределах graceful_timeout.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+# Те же переменные из .env, что видит iikoLike.settings: проверка кэша ниже должна совпадать с настройками
+load_dotenv()
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise RuntimeError(f"SERVER_MODE должен быть 'wsgi' или 'asgi', а не {SERVER_MODE!r}")
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'iikoLike.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Один event loop на ядро: ожидание БД и SSE-клиентов не блокирует воркер
+    default_workers = multiprocessing.cpu_count()
+else:
+    wsgi_app = 'iikoLike.wsgi:application'
+    worker_class = 'sync'
+    # Рекомендация gunicorn для синхронных воркеров: пока одни ждут БД, другие заняты CPU
+    default_workers = multiprocessing.cpu_count() * 2 + 1
+
+# WEB_CONCURRENCY — переопределение числа воркеров, например при ограничении CPU контейнера
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+
+# Кэш LocMem у каждого воркера свой, а версии для инвалидации (core.cache) хранятся в том же кэше:
+# запись сбросила бы их только в своём воркере, и остальные до ORDER_CACHE_TIMEOUT отдавали бы старые
+# ответы, ETag и страницу выручки. С несколькими воркерами нужен общий кэш (CACHE_BACKEND — Redis)
+if workers > 1 and os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache').endswith('LocMemCache'):
+    raise RuntimeError(
+        f"{workers} воркеров с LocMemCache отдают устаревшие ответы: задайте общий кэш "
+        "(CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://...) или WEB_CONCURRENCY=1"
+    )
+
+# Воркер, не ответивший мастеру за timeout секунд, перезапускается
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# Сколько секунд старые воркеры дообрабатывают запросы при HUP/TERM
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# Воркер перезапускается после max_requests запросов (со случайным разбросом, чтобы не все сразу):
+# так ограничивается рост памяти процесса
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+# Сердцебиение воркеров — в памяти, а не на диске контейнера
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'iikoLike.settings')
+# Под ASGI каждый запрос получает своё подключение к БД, и постоянные подключения не переиспользуются,
+# а копятся до CONN_MAX_AGE. Поэтому по умолчанию они выключены; для переиспользования — пул (DB_POOL=1)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -44,7 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,8 +62,15 @@ TEMPLATES = [
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны разбираются один раз на процесс; в режиме DEBUG Django сбрасывает этот кэш
+            # при изменении файлов шаблонов, так что runserver по-прежнему подхватывает правки
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -86,9 +95,102 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'password'),
         'HOST': os.getenv('DB_HOST', 'db'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Постоянные подключения: без них каждый запрос тратит время на новое подключение к PostgreSQL.
+        # DB_CONN_MAX_AGE — сколько секунд держать подключение между запросами (0 — закрывать после запроса).
+        # Перед повторным использованием подключение проверяется (CONN_HEALTH_CHECKS), так что обрыв
+        # со стороны сервера БД не роняет первый запрос после простоя
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Пул подключений psycopg 3 (DB_POOL=1, нужен пакет psycopg-pool) — для ASGI, где Django не переиспользует
+# постоянные подключения между запросами, и для ограничения числа подключений к БД на воркер.
+# С пулом CONN_MAX_AGE должен быть 0: подключения держит пул, а не Django. При CONN_HEALTH_CHECKS
+# пул проверяет подключение при выдаче и заменяет разорванные
+if os.getenv('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            # Сколько секунд запрос ждёт свободное подключение, прежде чем упасть с PoolTimeout
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            # Закрывать подключения, простаивающие дольше max_idle секунд (но не меньше min_size)
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '600')),
+        },
+    }
+
+# SQLite вместо PostgreSQL — только для локальных замеров (benchmarks/routes.py) без запущенного сервера БД
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# По умолчанию LocMem (работает без Redis) — только для одного процесса: версии инвалидации core.cache
+# хранятся в самом кэше, и с LocMem запись в одном воркере не сбрасывает ответы других. Для нескольких
+# воркеров нужен общий кэш (docker-compose.yml так и делает, а gunicorn.conf.py не запустит их с LocMem):
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://redis:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'iikolike'),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    # По умолчанию LocMem хранит 300 ключей: строк одной страницы списка заказов (до 500) хватает,
+    # чтобы вытеснить все закэшированные ответы
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))}
+
+# Кэш ответов API заказов и выручки (core.cache)
+ORDER_CACHE_ALIAS = 'default'
+ORDER_CACHE_TIMEOUT = int(os.getenv('ORDER_CACHE_TIMEOUT', '300'))
+
+# Снимок активных заказов в памяти процесса (core.active_orders) перестраивается после записи в заказы
+# и не реже, чем раз в ACTIVE_ORDERS_MAX_AGE секунд (с LocMem запись в другом воркере его не сбрасывает)
+ACTIVE_ORDERS_MAX_AGE = float(os.getenv('ACTIVE_ORDERS_MAX_AGE', '5'))
+
+# Ответы на запросы с Idempotency-Key (core.idempotency) хранятся IDEMPOTENCY_KEY_TTL секунд;
+# просроченные ключи удаляются в фоне не чаще, чем раз в IDEMPOTENCY_EVICT_INTERVAL секунд.
+# Ключ, занятый запросом без ответа дольше IDEMPOTENCY_LEASE секунд (больше таймаута воркера gunicorn),
+# считается брошенным, и повтор выполняется заново
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+IDEMPOTENCY_LEASE = int(os.getenv('IDEMPOTENCY_LEASE', '60'))
+IDEMPOTENCY_EVICT_INTERVAL = int(os.getenv('IDEMPOTENCY_EVICT_INTERVAL', '300'))
+
+# Помесячные секции core_order по created_at (core.partitioning, только PostgreSQL): с ORDER_PARTITIONING=1
+# миграция 0010 переводит таблицу на секции; partition_orders держит ORDER_PARTITIONS_AHEAD секций впрок
+# и с ORDER_PARTITION_RETENTION_MONTHS отсоединяет месяцы старше этого срока
+ORDER_PARTITIONING = os.getenv('ORDER_PARTITIONING') == '1'
+ORDER_PARTITIONS_AHEAD = int(os.getenv('ORDER_PARTITIONS_AHEAD', '3'))
+ORDER_PARTITION_RETENTION_MONTHS = int(os.getenv('ORDER_PARTITION_RETENTION_MONTHS', '0')) or None
+
+# Архив оплаченных заказов (core.archive): archive_orders переносит заказы старше ORDER_ARCHIVE_AFTER_MONTHS
+# месяцев в сжатые файлы ORDER_ARCHIVE_DIR блоками по ORDER_ARCHIVE_BLOCK_SIZE заказов
+ORDER_ARCHIVE_DIR = Path(os.getenv('ORDER_ARCHIVE_DIR', BASE_DIR / 'archive'))
+ORDER_ARCHIVE_AFTER_MONTHS = int(os.getenv('ORDER_ARCHIVE_AFTER_MONTHS', '12'))
+ORDER_ARCHIVE_BLOCK_SIZE = int(os.getenv('ORDER_ARCHIVE_BLOCK_SIZE', '1000'))
+
+# Бэкенд событий заказов для SSE (core.events): LocalBackend — в пределах процесса,
+# core.events.PostgresBackend — между воркерами через LISTEN/NOTIFY
+ORDER_EVENTS_BACKEND = os.getenv('ORDER_EVENTS_BACKEND', 'core.events.LocalBackend')
+
+# Сериализация JSON ответов API и Order.items (core.serialization): 'auto' — orjson, если установлен,
+# 'orjson' — только orjson (ошибка, если его нет), 'json' — стандартный json с DjangoJSONEncoder
+JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'auto')
+
+# Метрики запросов (core.middleware.RequestMetricsMiddleware, /metrics): предупреждение в лог 'core.metrics'
+# с самыми долгими SQL, если запрос сделал больше METRICS_QUERY_BUDGET запросов или шёл дольше METRICS_TIME_BUDGET_MS
+METRICS_QUERY_BUDGET = int(os.getenv('METRICS_QUERY_BUDGET', '20'))
+METRICS_TIME_BUDGET_MS = int(os.getenv('METRICS_TIME_BUDGET_MS', '500'))
+# Допустимые накладные расходы middleware на запрос, мкс
+METRICS_OVERHEAD_BUDGET_US = 50
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -125,6 +227,20 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+# Куда collectstatic собирает файлы; их раздаёт WhiteNoise прямо из процесса приложения
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Имена собранных файлов содержат хэш содержимого, рядом лежат сжатые .gz-копии (и .br с пакетом brotli).
+# Поэтому WhiteNoise отдаёт их с Cache-Control на год (immutable) и сжатыми, если браузер это поддерживает.
+# Шаблоны ссылаются на файлы через {% static %}, так что без collectstatic страницы не отрисуются
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field